@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Prueba de carga de main.py de punta a punta, sin red: levanta bench/mock_sites.py,
+genera un series.yaml sintético de --series entradas repartidas entre los dominios
+soportados y ejecuta main.py (un proceso por run) para cada backend y modo.
+
+  python -m bench.load_test --series 1000
+  python -m bench.load_test --series 10000 --backends requests,auto --modes serial,async,async-pool
+  python -m bench.load_test --series 500 --latency 400 --p403 0.02 --p429 0.02 --pslow 0.05
+  python -m bench.load_test --series 200 --env HOST_LIMITS=zonatmo.com=4/0 --json out.json
+
+Cada combinación empieza con estado limpio (series.yaml, backend_stats, métricas) y se
+ejecuta --runs veces seguidas: el primer run es en frío (sin ETag ni backends
+aprendidos) y los siguientes en caliente. Antes de cada run el servidor avanza un
+epoch, así que --update-rate de las series tiene capítulo nuevo.
+
+Por run: series/s de punta a punta, tiempo acumulado por etapa y pico de RSS del
+proceso de main.py (los dos de METRICS_FILE), CPU, backends usados, respuestas del
+servidor y series cuyo capítulo guardado no coincide con el que sirve el sitio. El RSS
+es solo el del proceso principal: ni Chromium (FETCH_BACKEND=playwright) ni los
+procesos de PARSE_WORKERS cuentan.
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.parse import urlsplit
+
+import yaml
+
+from bench.markup import SITE_URLS, expected_value
+from bench.mock_sites import add_arguments, config_from_args, start
+from scraper.chapter import Chapter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# modo de ejecución → variables de entorno de main.py
+MODES = {
+    "serial": {"PIPELINE_MODE": "serial"},
+    "serial-stream": {"PIPELINE_MODE": "serial", "STREAM_PARSE": "true"},
+    "serial-pool": {"PIPELINE_MODE": "serial", "PARSE_WORKERS": "2"},
+    "async": {"PIPELINE_MODE": "async"},
+    "async-stream": {"PIPELINE_MODE": "async", "STREAM_PARSE": "true"},
+    "async-pool": {"PIPELINE_MODE": "async", "PARSE_WORKERS": "2"},
+}
+
+# variables del entorno que no deben llegar a main.py: avisos reales, proxies reales
+SCRUB = ("DISCORD_WEBHOOK", "PROXY_POOL", "http_proxy", "https_proxy", "no_proxy", "NO_PROXY",
+         "SNAPSHOT_DIR", "METRICS_PROM", "SHARD_COUNT")
+
+
+def series_url(site: str, i: int) -> str:
+    # http: el servidor de mentira hace de proxy HTTP y no habla TLS
+    return (SITE_URLS[site].replace("https://", "http://", 1)
+            .replace("serie-de-prueba", f"serie-{i}").replace("1234", str(10000 + i)))
+
+
+def expected_chapter(mock, url: str) -> str | None:
+    site = urlsplit(url).hostname
+    return expected_value(mock.labels(site, urlsplit(url).path), site)
+
+
+def make_series(mock, count: int) -> dict:
+    """series.yaml sintético; el capítulo guardado es el que sirve el sitio en el epoch actual."""
+    sites = list(SITE_URLS)
+    series = []
+    for i in range(count):
+        site = sites[i % len(sites)]
+        url = series_url(site, i)
+        series.append({"name": f"Serie {i}", "site": site, "url": url,
+                       "last_chapter": expected_chapter(mock, url) or ""})
+    return {"series": series}
+
+
+def mismatches(mock, path: str) -> int:
+    """Series cuyo capítulo guardado no es el que sirve el sitio ahora."""
+    with open(path, "r", encoding="utf-8") as fh:
+        data = yaml.safe_load(fh) or {}
+    bad = 0
+    for s in data.get("series", []):
+        want = Chapter.valid(expected_chapter(mock, s["url"]))
+        got = Chapter.valid(s.get("last_chapter"))
+        bad += want != got
+    return bad
+
+
+def read_metrics(path: str) -> tuple:
+    """(resumen del run, backends usados) del JSONL de métricas."""
+    summary, backends = {}, {}
+    if not os.path.exists(path):
+        return summary, backends
+    with open(path, "r", encoding="utf-8") as fh:
+        for line in fh:
+            rec = json.loads(line)
+            if rec.get("type") == "run":
+                summary = rec
+            elif rec.get("stage") == "fetch":
+                b = rec.get("backend") or "?"
+                backends[b] = backends.get(b, 0) + 1
+    return summary, backends
+
+
+def run_main(env: dict, log_path: str) -> tuple:
+    """Ejecuta main.py; devuelve (código de salida, segundos, CPU en segundos)."""
+    t0 = time.perf_counter()
+    with open(log_path, "w", encoding="utf-8") as log:
+        proc = subprocess.Popen([sys.executable, "main.py"], cwd=ROOT, env=env,
+                                stdout=log, stderr=subprocess.STDOUT)
+        _, status, usage = os.wait4(proc.pid, 0)
+        proc.returncode = os.waitstatus_to_exitcode(status)
+    wall = time.perf_counter() - t0
+    # el ru_maxrss de wait4 no sirve: incluye el RSS de este proceso (y el servidor) heredado en el fork
+    return proc.returncode, wall, usage.ru_utime + usage.ru_stime
+
+
+def run_combo(mock, proxy: str, backend: str, mode: str, args, workdir: str) -> list:
+    series_file = os.path.join(workdir, "series.yaml")
+    with open(series_file, "w", encoding="utf-8") as fh:
+        yaml.safe_dump(make_series(mock, args.series), fh, allow_unicode=True, sort_keys=False)
+
+    env = {k: v for k, v in os.environ.items() if k not in SCRUB}
+    env.update({
+        "SERIES_FILE": series_file,
+        "STATE_DB": os.path.join(workdir, "state.db"),
+        "BACKEND_STATS_FILE": os.path.join(workdir, "backend_stats.json"),
+        "HTTP_PROXY": proxy,
+        "HTTPS_PROXY": proxy,
+        "FETCH_BACKEND": backend,
+        "SCRAPER_SLEEP": str(args.sleep),
+        "PYTHONUNBUFFERED": "1",
+    })
+    env.update(MODES[mode])
+    env.update(dict(kv.split("=", 1) for kv in args.env))
+
+    rows = []
+    for run in range(1, args.runs + 1):
+        epoch = mock.bump()
+        before = mock.stats()
+        metrics_file = os.path.join(workdir, f"metrics-{run}.jsonl")
+        env["METRICS_FILE"] = metrics_file
+        code, wall, cpu = run_main(env, os.path.join(workdir, f"main-{run}.log"))
+        after = mock.stats()
+        summary, backends = read_metrics(metrics_file)
+        rows.append({
+            "backend": backend, "mode": mode, "run": run, "epoch": epoch, "series": args.series,
+            "exit": code, "wall": round(wall, 2), "series_per_s": round(args.series / wall, 1),
+            "rss_mb": summary.get("peak_rss_mb"), "cpu": round(cpu, 2),
+            "stages": {k: v["seconds"] for k, v in summary.get("stages", {}).items()},
+            "stage_errors": sum(v["errors"] for v in summary.get("stages", {}).values()),
+            "backends": backends,
+            "responses": {k: v - before["counts"].get(k, 0) for k, v in after["counts"].items()
+                          if v != before["counts"].get(k, 0)},
+            "mb_served": round((after["bytes"] - before["bytes"]) / 1e6, 1),
+            "server_cpu": round(after["cpu_seconds"] - before["cpu_seconds"], 2),
+            "mismatches": mismatches(mock, series_file),
+        })
+        print_row(rows[-1])
+    return rows
+
+
+def print_row(r: dict):
+    stages = " ".join(f"{k}={v:.1f}" for k, v in r["stages"].items())
+    backends = ",".join(f"{k}:{v}" for k, v in sorted(r["backends"].items()))
+    responses = ",".join(f"{k}:{v}" for k, v in sorted(r["responses"].items()))
+    print(f"{r['backend']:<10} {r['mode']:<13} run {r['run']}  {r['wall']:7.1f}s  {r['series_per_s']:7.1f} series/s"
+          f"  RSS {r['rss_mb'] if r['rss_mb'] is not None else '?':>6} MB  CPU {r['cpu']:6.1f}s  errores {r['stage_errors']}  descuadres {r['mismatches']}"
+          + (f"  (salida {r['exit']})" if r["exit"] else ""))
+    print(f"{'':<25} etapas[s]: {stages}")
+    print(f"{'':<25} backends: {backends}  servidor: {responses}, {r['mb_served']} MB, CPU {r['server_cpu']}s")
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--series", type=int, default=200, help="tamaño del series.yaml sintético")
+    ap.add_argument("--backends", default="requests,auto", help="FETCH_BACKEND a probar (requests,auto,playwright)")
+    ap.add_argument("--modes", default="serial,async", help="modos: " + ",".join(MODES))
+    ap.add_argument("--runs", type=int, default=2, help="runs seguidos por combinación (1º en frío)")
+    ap.add_argument("--sleep", type=float, default=0.0, help="SCRAPER_SLEEP del modo serie")
+    ap.add_argument("--env", action="append", default=[], metavar="K=V", help="variable extra para main.py")
+    ap.add_argument("--json", help="guarda las filas en este fichero")
+    ap.add_argument("--keep", help="directorio para dejar series.yaml, logs y métricas de cada combinación")
+    add_arguments(ap)
+    args = ap.parse_args(argv)
+
+    modes = [m.strip() for m in args.modes.split(",") if m.strip()]
+    unknown = [m for m in modes if m not in MODES]
+    if unknown:
+        ap.error(f"modo desconocido: {', '.join(unknown)}")
+    backends = [b.strip() for b in args.backends.split(",") if b.strip()]
+
+    server, mock = start(config_from_args(args))
+    proxy = f"http://127.0.0.1:{server.server_address[1]}"
+    print(f"sitios de mentira en {proxy}: {args.series} series, latencia {args.latency:g} ms, "
+          f"403 {args.p403:g}, 429 {args.p429:g}, goteo {args.pslow:g}")
+
+    base = args.keep or tempfile.mkdtemp(prefix="loadtest-")
+    rows = []
+    try:
+        for backend in backends:
+            for mode in modes:
+                workdir = os.path.join(base, f"{backend}-{mode}")
+                os.makedirs(workdir, exist_ok=True)
+                rows += run_combo(mock, proxy, backend, mode, args, workdir)
+    finally:
+        server.shutdown()
+        if not args.keep:
+            shutil.rmtree(base, ignore_errors=True)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump(rows, fh, indent=2, ensure_ascii=False)
+    return 1 if any(r["exit"] for r in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
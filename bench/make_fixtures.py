@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Genera (o graba) el corpus de fixtures del benchmark de parsers.
+
+  python -m bench.make_fixtures                       # regenera los sintéticos
+  python -m bench.make_fixtures --record SITE SIZE URL  # guarda una página real
+
+Cada fixture queda en bench/fixtures/<sitio>/<tamaño>.html.gz y se registra
+en bench/fixtures/manifest.json con la URL y el capítulo esperado.
+"""
+import argparse
+import gzip
+import json
+import os
+import sys
+
+from bench.markup import SITE_URLS, SIZES, chapter_labels, expected_value, render_series_page
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+MANIFEST = os.path.join(FIXTURES_DIR, "manifest.json")
+
+
+def load_manifest() -> dict:
+    if not os.path.exists(MANIFEST):
+        return {}
+    with open(MANIFEST, "r", encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+def save_manifest(manifest: dict):
+    with open(MANIFEST, "w", encoding="utf-8") as fh:
+        json.dump(manifest, fh, ensure_ascii=False, indent=2, sort_keys=True)
+        fh.write("\n")
+
+
+def write_fixture(site: str, size: str, html: str) -> str:
+    rel = f"{site}/{size}.html.gz"
+    path = os.path.join(FIXTURES_DIR, rel)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # mtime=0 → el .gz es reproducible byte a byte
+    with open(path, "wb") as fh, gzip.GzipFile(fileobj=fh, mode="wb", mtime=0) as gz:
+        gz.write(html.encode("utf-8"))
+    return rel
+
+
+def generate(manifest: dict):
+    for site, url in SITE_URLS.items():
+        for size, count in SIZES.items():
+            labels = chapter_labels(count, seed=count)
+            html = render_series_page(site, labels, pad_kb=8 if size == "small" else 40, seed=count)
+            rel = write_fixture(site, size, html)
+            manifest[rel] = {"url": url, "expected": expected_value(labels, site), "source": "synthetic"}
+            print(f"  {rel}: {len(html) // 1024} KB, esperado {manifest[rel]['expected']}")
+
+
+def record(manifest: dict, site: str, size: str, url: str):
+    from scraper.sites import pick_parser
+    from scraper.utils import http_get
+
+    html = http_get(url, backend=os.environ.get("FETCH_BACKEND", "playwright"))
+    rel = write_fixture(site, size, html)
+    # en páginas reales el valor esperado es lo que resuelve hoy el parser: revísalo a mano
+    manifest[rel] = {"url": url, "expected": pick_parser(url)(url, html), "source": "recorded"}
+    print(f"  {rel}: {len(html) // 1024} KB, esperado {manifest[rel]['expected']} (revisar)")
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--record", nargs=3, metavar=("SITE", "SIZE", "URL"))
+    args = ap.parse_args(argv)
+
+    manifest = load_manifest()
+    if args.record:
+        record(manifest, *args.record)
+    else:
+        generate(manifest)
+    save_manifest(manifest)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+# Marcado sintético de cada sitio soportado, con los selectores de los que dependen los parsers.
+# Lo usan los fixtures del benchmark y el servidor de pruebas de carga.
+import random
+from xml.sax.saxutils import escape
+
+SIZES = {"small": 8, "typical": 60, "large": 600}
+
+SITE_URLS = {
+    "animebbg.net": "https://animebbg.net/comics/serie-de-prueba.1234/capitulos",
+    "m440.in": "https://m440.in/manga/serie-de-prueba",
+    "zonatmo.com": "https://zonatmo.com/library/manga/1234/serie-de-prueba",
+    "bokugents.com": "https://bokugents.com/manga/serie-de-prueba/",
+    "mangasnosekai.com": "https://mangasnosekai.com/manga/serie-de-prueba/",
+    "leercapitulo.co": "https://leercapitulo.co/manga/1234/serie-de-prueba/",
+}
+
+
+def chapter_labels(count: int, seed: int = 0) -> list:
+    """Capítulos de más nuevo a más viejo; algunos con decimales (extras)."""
+    rnd = random.Random(seed)
+    out = []
+    for n in range(count, 0, -1):
+        if n % 9 == 0 and rnd.random() < 0.6:
+            out.append(f"{n}.5")
+        out.append(str(n))
+    return out
+
+
+def expected_value(labels: list, site: str) -> str | None:
+    """Valor canónico que deben devolver los parsers (mismo formato que _pick_max)."""
+    if not labels:
+        return None
+
+    def key(s):
+        a, _, b = s.partition(".")
+        return (int(a), int(b.ljust(2, "0")[:2]) if b else -1)
+
+    best = max(labels, key=key)
+    if site == "zonatmo.com" and "." not in best:
+        best += ".00"
+    a, _, b = best.partition(".")
+    return f"{int(a)}.{b.ljust(2, '0')[:2]}" if b else str(int(a))
+
+
+def _chrome(title: str, body: str, pad_kb: int, rnd: random.Random) -> str:
+    nav = "".join(f'<li><a href="/genero/{i}">Género {i}</a></li>' for i in range(40))
+    script = "var cfg = {" + ",".join(f'"k{i}": "{rnd.getrandbits(64):x}"' for i in range(pad_kb * 20)) + "};"
+    style = ".c{color:#1e1e1e}" * 50
+    return (
+        "<!DOCTYPE html><html lang=\"es\"><head><meta charset=\"utf-8\">"
+        f"<title>{title}</title><style>{style}</style><script>{script}</script></head><body>"
+        f"<header><nav><ul><li><a href=\"/\">Inicio</a></li>{nav}</ul></nav></header>"
+        f"<main>{body}</main>"
+        "<footer><a href=\"/tos\">Términos</a> <a href=\"/dmca\">DMCA</a> <a href=\"#top\">Subir</a></footer>"
+        "</body></html>"
+    )
+
+
+def _animebbg(labels):
+    items = "".join(
+        '<div class="structItem structItem--resourceAlbum js-inlineModContainer">'
+        '<div class="structItem-cell structItem-cell--main"><div class="structItem-title">'
+        f'<a href="/comics/capitulo/{9000 + i}/" data-tp-primary="on">Capítulo {c}</a></div>'
+        f'<div class="structItem-minor"><ul class="structItem-parts"><li>Subido hace {i} días</li></ul></div>'
+        '</div></div>'
+        for i, c in enumerate(labels)
+    )
+    return f'<h1 class="p-title-value">Serie de prueba</h1><h2>Capítulos ({len(labels)})</h2><div class="structItemContainer">{items}</div>'
+
+
+def _m440(labels):
+    items = "".join(
+        f'<li class="litext-chapters DTyuZxQygzByzNbtcmg-lis"><h5 class="chapter-title-rtl">'
+        f'<a href="https://m440.in/manga/serie-de-prueba/{c}-abc" data-number="{c}">Serie de prueba #{c}</a>'
+        f' <em>Capítulo {c}</em></h5><div class="date-chapter-title-rtl">01 Ene. 2024</div></li>'
+        for c in labels
+    )
+    return f'<h2 class="widget-title">Capítulos</h2><ul class="chapters">{items}</ul>'
+
+
+def _zonatmo(labels):
+    items = "".join(
+        '<li class="list-group-item p-0 bg-light upload-link"><h4 class="px-2 py-3 m-0"><div class="row">'
+        f'<div class="col-10 text-truncate"><a class="btn-collapse" onclick="collapseChapter(\'c{i}\')">'
+        f'<i class="fa fa-chevron-down fa-fw"></i> Capítulo {c if "." in c else c + ".00"} </a></div></div></h4>'
+        '<div class="card chapter-list-element"><ul class="list-group list-group-flush chapter-list">'
+        '<li class="list-group-item"><div class="row"><div class="col-4 text-truncate"><span>Scan</span></div>'
+        f'<div class="col-2 text-right"><a href="https://zonatmo.com/view_uploads/{70000 + i}" class="btn btn-default btn-sm">'
+        '<span class="fas fa-play fa-2x"></span></a></div></div></li></ul></div></li>'
+        for i, c in enumerate(labels)
+    )
+    return f'<div id="chapters"><ul class="list-group">{items}</ul></div>'
+
+
+def _madara(labels, host):
+    items = "".join(
+        f'<li class="wp-manga-chapter"><a href="https://{host}/manga/serie-de-prueba/capitulo-{c.replace(".", "-")}/">'
+        f'Capítulo {c}</a> <span class="chapter-release-date"><i>hace {i + 1} días</i></span></li>'
+        for i, c in enumerate(labels)
+    )
+    return (
+        '<div class="c-page"><div class="listing-chapters_wrap cols-1 show-more">'
+        f'<ul class="main version-chap no-volumn">{items}</ul></div></div>'
+    )
+
+
+def _mangasnosekai(labels):
+    items = "".join(
+        f'<div class="contenedor-capitulo-miniatura"><a href="https://mangasnosekai.com/capitulo/{c}/">'
+        f'<div class="text-sm">Capítulo {c}</div></a></div>'
+        for c in labels
+    )
+    return f'<section id="section-list-cap"><div class="container-capitulos">{items}</div></section>'
+
+
+def _leercapitulo(labels):
+    items = "".join(
+        f'<li class="row"><div class="col-xs-9 chapter"><h4><a class="xanh" href="/leer/serie-de-prueba/{c}/">'
+        f'Capitulo {c}</a></h4></div><div class="col-xs-3 text-right">2024-01-01</div></li>'
+        for c in labels
+    )
+    return f'<div class="chapter-list"><ul>{items}</ul></div>'
+
+
+def render_series_page(site: str, labels: list, pad_kb: int = 40, seed: int = 0) -> str:
+    """Página de serie de `site` con los capítulos `labels` (más nuevo primero)."""
+    rnd = random.Random(seed)
+    if site == "animebbg.net":
+        body = _animebbg(labels)
+    elif site == "m440.in":
+        body = _m440(labels)
+    elif site == "zonatmo.com":
+        body = _zonatmo(labels)
+    elif site == "mangasnosekai.com":
+        body = _mangasnosekai(labels)
+    elif site == "leercapitulo.co":
+        body = _leercapitulo(labels)
+    else:
+        body = _madara(labels, site)
+    return _chrome("Serie de prueba", body, pad_kb, rnd)
+
+
+def render_wp_ajax(host: str, slug: str, labels: list) -> str:
+    """Respuesta de POST <serie>/ajax/chapters/ en un sitio Madara."""
+    return _madara(labels, host).replace("serie-de-prueba", slug)
+
+
+def render_wp_feed(host: str, slug: str, labels: list) -> str:
+    """Respuesta de GET <serie>/feed/ en un sitio Madara: un <item> por capítulo."""
+    items = "".join(
+        f"<item><title>{escape(slug)} – Capítulo {c}</title>"
+        f"<link>http://{host}/manga/{slug}/capitulo-{c.replace('.', '-')}/</link></item>"
+        for c in labels
+    )
+    return f'<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel><title>{escape(slug)}</title>{items}</channel></rss>'
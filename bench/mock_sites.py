@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Sitios de mentira para pruebas de carga: un servidor HTTP local que imita el marcado
+de cada dominio soportado (bench/markup.py) y se usa como proxy HTTP.
+
+  python -m bench.mock_sites [--port 8792] [--latency 150] [--p403 0.01] [--p429 0.01] [--pslow 0.05]
+  HTTP_PROXY=http://127.0.0.1:8792 python main.py     # con series http://<dominio real>/...
+
+Al ir como proxy, las series conservan su dominio (pick_parser, límites por host,
+backend_stats) y no hace falta tocar /etc/hosts. Por serie:
+  GET  <serie>                 → página de la serie del sitio
+  POST <serie>/ajax/chapters/  → fragmento Madara (bokugents, mangasnosekai)
+  GET  <serie>/feed/           → RSS de capítulos
+Los capítulos son estables por URL; `epoch` (POST /_mock/epoch) añade uno nuevo a
+la fracción --update-rate de las series. GET /_mock/stats devuelve los contadores.
+"""
+import argparse
+import hashlib
+import json
+import random
+import resource
+import sys
+import threading
+import time
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+from bench.markup import SITE_URLS, chapter_labels, render_series_page, render_wp_ajax, render_wp_feed
+
+WP_SUFFIXES = {"ajax/chapters": "ajax", "feed": "rss"}
+METHODS = {"page": "GET", "ajax": "POST", "rss": "GET"}
+BLOCK_PAGE = "<html><head><title>Just a moment...</title></head><body>Checking your browser</body></html>"
+
+
+class MockConfig:
+    def __init__(self, latency_ms: float = 150, jitter: float = 0.5, pad_kb: int = 40,
+                 min_chapters: int = 20, max_chapters: int = 300, p403: float = 0.0, p429: float = 0.0,
+                 pslow: float = 0.0, drip_kb: int = 4, drip_ms: float = 50, update_rate: float = 0.1,
+                 seed: int = 0):
+        self.latency = latency_ms / 1000
+        self.jitter = jitter                  # ± fracción de la latencia
+        self.pad_kb = pad_kb                  # relleno de la página (scripts, estilos): tamaño del cuerpo
+        self.min_chapters = min_chapters
+        self.max_chapters = max_chapters
+        self.p403 = p403
+        self.p429 = p429
+        self.pslow = pslow                    # respuestas servidas por goteo
+        self.drip_bytes = drip_kb * 1024
+        self.drip = drip_ms / 1000
+        self.update_rate = update_rate        # series que suben un capítulo por epoch
+        self.seed = seed
+
+
+class MockSites:
+    """Contenido y contadores del servidor; compartido por todos los hilos."""
+
+    def __init__(self, cfg: MockConfig):
+        self.cfg = cfg
+        self.epoch = 0
+        self.rnd = random.Random(cfg.seed)
+        self.counts = {}
+        self.bytes = 0
+        self._lock = threading.Lock()
+        self._render = lru_cache(maxsize=2048)(self._render_uncached)
+
+    def _hash(self, key: str) -> int:
+        return int(hashlib.sha1(f"{self.cfg.seed}:{key}".encode()).hexdigest()[:12], 16)
+
+    def labels(self, host: str, path: str) -> list:
+        """Capítulos de la serie (más nuevo primero) en el epoch actual."""
+        h = self._hash(host + path)
+        span = max(1, self.cfg.max_chapters - self.cfg.min_chapters + 1)
+        count = self.cfg.min_chapters + h % span
+        if (h >> 20) % 1000 < self.cfg.update_rate * 1000:
+            count += self.epoch
+        return chapter_labels(count, seed=h)
+
+    def bump(self) -> int:
+        with self._lock:
+            self.epoch += 1
+            return self.epoch
+
+    def count(self, key: str, nbytes: int = 0):
+        with self._lock:
+            self.counts[key] = self.counts.get(key, 0) + 1
+            self.bytes += nbytes
+
+    def roll(self) -> float:
+        with self._lock:
+            return self.rnd.random()
+
+    def stats(self) -> dict:
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        with self._lock:
+            return {"epoch": self.epoch, "counts": dict(self.counts), "bytes": self.bytes,
+                    "cpu_seconds": round(usage.ru_utime + usage.ru_stime, 3)}
+
+    def _render_uncached(self, site: str, path: str, kind: str, epoch: int) -> tuple:
+        labels = self.labels(site, path)
+        slug = path.rstrip("/").rsplit("/", 1)[-1]
+        if kind == "ajax":
+            body = render_wp_ajax(site, slug, labels)
+        elif kind == "rss":
+            body = render_wp_feed(site, slug, labels)
+        else:
+            body = render_series_page(site, labels, pad_kb=self.cfg.pad_kb).replace("serie-de-prueba", slug)
+        data = body.encode("utf-8")
+        return data, '"' + hashlib.sha1(data).hexdigest()[:16] + '"'
+
+    def render(self, site: str, path: str, kind: str) -> tuple:
+        """(bytes, etag) de la respuesta; cacheado por epoch."""
+        return self._render(site, path, kind, self.epoch)
+
+
+def split_target(path: str) -> tuple:
+    """'/manga/x/feed/' → ('/manga/x/', 'rss'); la página de la serie → (path, 'page')."""
+    bare = path.rstrip("/")
+    for suffix, kind in WP_SUFFIXES.items():
+        if bare.endswith("/" + suffix):
+            return bare[: -len(suffix)], kind
+    return path, "page"
+
+
+def make_handler(mock: MockSites):
+    cfg = mock.cfg
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"     # keep-alive: los clientes reutilizan la conexión
+
+        def _serve(self, method: str):
+            # como proxy llega la URL absoluta; en acceso directo, la ruta y el Host
+            parts = urlsplit(self.path)
+            host = (parts.hostname or self.headers.get("Host", "").split(":", 1)[0]).lower()
+            if host.startswith("www."):
+                host = host[4:]
+            path = parts.path or "/"
+
+            if path.startswith("/_mock/"):
+                return self._control(method, path)
+            if host not in SITE_URLS:
+                mock.count("404")
+                return self._reply(404, b"")
+            target, kind = split_target(path)
+            if METHODS[kind] != method:
+                mock.count("404")
+                return self._reply(404, b"")
+
+            jitter = 1 + cfg.jitter * (2 * mock.roll() - 1)
+            time.sleep(max(0.0, cfg.latency * jitter))
+
+            roll = mock.roll()
+            if roll < cfg.p403:
+                mock.count("403")
+                return self._reply(403, BLOCK_PAGE.encode("utf-8"))
+            if roll < cfg.p403 + cfg.p429:
+                mock.count("429")
+                return self._reply(429, b"Too Many Requests", {"Retry-After": "1"})
+
+            data, etag = mock.render(host, target, kind)
+            if self.headers.get("If-None-Match") == etag:
+                mock.count("304")
+                return self._reply(304, b"", {"ETag": etag})
+            ctype = "application/rss+xml" if kind == "rss" else "text/html"
+            slow = mock.roll() < cfg.pslow
+            mock.count("200-slow" if slow else "200", len(data))
+            self._reply(200, data, {"ETag": etag}, ctype, slow)
+
+        def _control(self, method: str, path: str):
+            if path.rstrip("/") == "/_mock/epoch" and method == "POST":
+                body = {"epoch": mock.bump()}
+            elif path.rstrip("/") == "/_mock/stats":
+                body = mock.stats()
+            else:
+                return self._reply(404, b"")
+            self._reply(200, json.dumps(body).encode("utf-8"), ctype="application/json")
+
+        def _reply(self, code: int, data: bytes, headers: dict | None = None, ctype: str = "text/html",
+                   slow: bool = False):
+            self.send_response(code)
+            if code != 304:
+                self.send_header("Content-Type", f"{ctype}; charset=UTF-8")
+            self.send_header("Content-Length", str(len(data)))
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.end_headers()
+            try:
+                if not slow:
+                    self.wfile.write(data)
+                    return
+                # goteo: el cuerpo llega a trozos, como un origen saturado
+                for i in range(0, len(data), cfg.drip_bytes):
+                    self.wfile.write(data[i:i + cfg.drip_bytes])
+                    self.wfile.flush()
+                    time.sleep(cfg.drip)
+            except ConnectionError:
+                # el cliente cortó a medias (STREAM_PARSE deja de leer al tener el listado)
+                mock.count("cut")
+                self.close_connection = True
+
+        def do_GET(self):
+            self._serve("GET")
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0) or 0))
+            self._serve("POST")
+
+        def log_message(self, fmt, *args):
+            pass
+
+    return Handler
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+    def handle_error(self, request, client_address):
+        # clientes que cierran sin leer todo (streaming, timeouts): no es un error del servidor
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+def start(cfg: MockConfig, port: int = 0) -> tuple:
+    """Arranca el servidor en un hilo; devuelve (server, MockSites). `port=0` elige uno libre."""
+    mock = MockSites(cfg)
+    server = _Server(("127.0.0.1", port), make_handler(mock))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, mock
+
+
+def add_arguments(ap: argparse.ArgumentParser):
+    ap.add_argument("--latency", type=float, default=150, help="ms hasta el primer byte (media)")
+    ap.add_argument("--jitter", type=float, default=0.5, help="± fracción de la latencia")
+    ap.add_argument("--pad-kb", type=int, default=40, help="relleno por página (tamaño del cuerpo)")
+    ap.add_argument("--chapters", default="20-300", help="capítulos por serie, min-max")
+    ap.add_argument("--p403", type=float, default=0.0, help="probabilidad de 403 (bloqueo)")
+    ap.add_argument("--p429", type=float, default=0.0, help="probabilidad de 429 (rate limit)")
+    ap.add_argument("--pslow", type=float, default=0.0, help="probabilidad de respuesta por goteo")
+    ap.add_argument("--drip-kb", type=int, default=4, help="tamaño de cada trozo del goteo")
+    ap.add_argument("--drip-ms", type=float, default=50, help="pausa entre trozos del goteo")
+    ap.add_argument("--update-rate", type=float, default=0.1, help="fracción de series con capítulo nuevo por epoch")
+    ap.add_argument("--seed", type=int, default=0)
+
+
+def config_from_args(args) -> MockConfig:
+    lo, _, hi = args.chapters.partition("-")
+    return MockConfig(
+        latency_ms=args.latency, jitter=args.jitter, pad_kb=args.pad_kb,
+        min_chapters=int(lo), max_chapters=int(hi or lo),
+        p403=args.p403, p429=args.p429, pslow=args.pslow,
+        drip_kb=args.drip_kb, drip_ms=args.drip_ms,
+        update_rate=args.update_rate, seed=args.seed,
+    )
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--port", type=int, default=8792)
+    add_arguments(ap)
+    args = ap.parse_args(argv)
+
+    server, _ = start(config_from_args(args), args.port)
+    print(f"sitios de mentira en http://127.0.0.1:{server.server_address[1]} (úsalo como HTTP_PROXY)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark offline de los parsers sobre bench/fixtures.
+
+  python -m bench.run_parsers                          # tabla de resultados
+  python -m bench.run_parsers --save bench/baseline.json
+  python -m bench.run_parsers --compare bench/baseline.json [--tolerance 0.25]
+
+Por fixture: páginas/s, MB/s, pico de memoria del parseo (RSS en un proceso
+limpio) y el capítulo extraído. Con --compare sale con código 1 si algún
+parser es más lento que la base (menos la tolerancia) o si cambia el capítulo.
+"""
+import argparse
+import gzip
+import json
+import os
+import subprocess
+import sys
+import time
+
+from bench.make_fixtures import FIXTURES_DIR, load_manifest
+from scraper.sites import pick_parser
+
+
+def read_fixture(rel: str) -> str:
+    path = os.path.join(FIXTURES_DIR, rel)
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as fh:
+        return fh.read()
+
+
+def throughput(parser, url: str, html: str, min_time: float):
+    """Repite el parseo hasta `min_time` segundos; devuelve (valor, páginas/s)."""
+    value = parser(url, html)
+    runs = 0
+    t0 = time.perf_counter()
+    elapsed = 0.0
+    while elapsed < min_time or runs < 3:
+        parser(url, html)
+        runs += 1
+        elapsed = time.perf_counter() - t0
+    return value, runs / elapsed
+
+
+def peak_rss_kb(rel: str):
+    """Pico de RSS que añade un único parseo, medido en un intérprete nuevo."""
+    try:
+        out = subprocess.run(
+            [sys.executable, "-m", "bench.run_parsers", "--mem-probe", rel],
+            capture_output=True, text=True, timeout=120,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        )
+        return int(out.stdout.strip())
+    except Exception:
+        return None
+
+
+def _proc_status_kb(field: str):
+    with open("/proc/self/status", "r") as fh:
+        for line in fh:
+            if line.startswith(field + ":"):
+                return int(line.split()[1])
+    return None
+
+
+def _mem_probe(rel: str, url: str) -> int:
+    import gc
+    import resource
+
+    html = read_fixture(rel)
+    parser = pick_parser(url)
+    gc.collect()
+    try:
+        # Linux: "5" reinicia VmHWM, así el pico no incluye la descompresión del fixture
+        with open("/proc/self/clear_refs", "w") as fh:
+            fh.write("5")
+        before = _proc_status_kb("VmRSS")
+        parser(url, html)
+        return _proc_status_kb("VmHWM") - before
+    except OSError:
+        before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        parser(url, html)
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - before
+
+
+def run(min_time: float, with_memory: bool) -> dict:
+    results = {}
+    for rel, meta in sorted(load_manifest().items()):
+        url = meta["url"]
+        html = read_fixture(rel)
+        parser = pick_parser(url)
+        value, pps = throughput(parser, url, html, min_time)
+        mb = len(html.encode("utf-8")) / 1e6
+        results[rel] = {
+            "parser": parser.__name__,
+            "value": value,
+            "expected": meta.get("expected"),
+            "pages_s": round(pps, 2),
+            "mb_s": round(pps * mb, 2),
+            "peak_kb": peak_rss_kb(rel) if with_memory else None,
+        }
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    problems = []
+    for rel, r in results.items():
+        if r["expected"] is not None and r["value"] != r["expected"]:
+            problems.append(f"{rel}: extrae {r['value']!r}, se esperaba {r['expected']!r}")
+        base = baseline.get(rel)
+        if not base:
+            continue
+        if r["value"] != base["value"]:
+            problems.append(f"{rel}: cambió el capítulo {base['value']!r} → {r['value']!r}")
+        if r["pages_s"] < base["pages_s"] * (1 - tolerance):
+            problems.append(f"{rel}: {r['pages_s']} pág/s vs base {base['pages_s']} (-{tolerance:.0%} permitido)")
+    return problems
+
+
+def print_table(results: dict):
+    print(f"{'fixture':<36} {'parser':<22} {'valor':>8} {'pág/s':>9} {'MB/s':>7} {'pico KB':>8}")
+    for rel, r in results.items():
+        peak = "-" if r["peak_kb"] is None else r["peak_kb"]
+        print(f"{rel:<36} {r['parser']:<22} {str(r['value']):>8} {r['pages_s']:>9} {r['mb_s']:>7} {peak:>8}")
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--min-time", type=float, default=0.5, help="segundos mínimos por fixture")
+    ap.add_argument("--no-memory", action="store_true", help="no medir pico de memoria")
+    ap.add_argument("--save", metavar="PATH")
+    ap.add_argument("--compare", metavar="PATH")
+    ap.add_argument("--tolerance", type=float, default=0.25)
+    ap.add_argument("--mem-probe", metavar="FIXTURE", help=argparse.SUPPRESS)
+    args = ap.parse_args(argv)
+
+    if args.mem_probe:
+        print(_mem_probe(args.mem_probe, load_manifest()[args.mem_probe]["url"]))
+        return 0
+
+    results = run(args.min_time, with_memory=not args.no_memory)
+    print_table(results)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as fh:
+            json.dump(results, fh, ensure_ascii=False, indent=2, sort_keys=True)
+            fh.write("\n")
+        print(f"\nBase guardada en {args.save}")
+
+    problems = compare(results, {}, args.tolerance)
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as fh:
+            problems = compare(results, json.load(fh), args.tolerance)
+    if problems:
+        print("\nRegresiones:")
+        for p in problems:
+            print(f"  - {p}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,17 +7,44 @@ import time
 from typing import Optional, Tuple
 
 from scraper.utils import (
-    load_yaml,
-    save_yaml,
     http_get,
     sanity_filter,
-    comparable_tuple,
     cap_to_pretty,
 )
-from scraper.sites import pick_parser
+from scraper.chapter import Chapter
+from scraper.sites import pick_parser, chapter_fragment, site_key
+from scraper.metrics import RunMetrics
+from scraper.notifier import notify_event, flush_notifications
+from scraper.schedule import (
+    Deferred,
+    RunDeadline,
+    defer,
+    estimate_cost,
+    host_costs,
+    is_due,
+    priority_order,
+    record_check,
+    record_cost,
+    save_costs,
+)
+from scraper.state_store import open_store
+from scraper.shard import SHARD_COUNT, SHARD_INDEX, SHARD_KEY, SHARD_OUT, PartialResult, select_shard
+from scraper.conditional import NotModified, accept_validators, current_validators, fragment_hash
+from scraper.extractors import Extracted
+from scraper.feeds import FEED_FASTPATH
+from scraper.parse_pool import PARSE_WORKERS, ParsePool
+from scraper.proxy_pool import get_proxy_pool
+from scraper.backend_stats import save_stats
+from scraper.browser_pool import close_pool
+from scraper.resilience import CircuitOpen, get_breaker
+from scraper.session import close_all
+from scraper.snapshots import get_snapshots, save_snapshots
+from scraper.streaming import STREAM_PARSE
+from scraper.wp_api import EndpointUnavailable, enabled_for, fetch_endpoint
 
 SERIES_FILE = os.environ.get("SERIES_FILE", "series.yaml")
 FETCH_BACKEND = os.environ.get("FETCH_BACKEND", "playwright")
+PIPELINE_MODE = os.environ.get("PIPELINE_MODE", "serial").lower()   # serial | async
 
 
 def log(msg: str):
@@ -38,8 +65,8 @@ def compare_caps(prev: Optional[str], new: Optional[str]) -> int:
         return -1
     if not prev and not new:
         return 0
-    tp = comparable_tuple(prev)
-    tn = comparable_tuple(new)
+    tp = Chapter.of(prev)
+    tn = Chapter.of(new)
     if tn > tp:
         return 1
     if tn < tp:
@@ -47,103 +74,426 @@ def compare_caps(prev: Optional[str], new: Optional[str]) -> int:
     return 0
 
 
-def main() -> int:
-    data = load_yaml(SERIES_FILE)
-    series = data.get("series", [])
-    updated = 0
-    same = 0
-    errors = []
+def stored_chapter(s: dict) -> str:
+    """last_chapter de la serie, o "" si lo guardado no es un capítulo (id como 771093)."""
+    prev = s.get("last_chapter") or ""
+    return prev if Chapter.valid(prev) else ""
+
 
-    log(f"[cfg] FETCH_BACKEND='{FETCH_BACKEND}'  HTTPS_PROXY={os.environ.get('HTTPS_PROXY','unset')}  HTTP_PROXY={os.environ.get('HTTP_PROXY','unset')}")
+def series_state(s: dict) -> dict:
+    """Estado de fetch de la serie (validadores HTTP, hash de fragmento) guardado en series.yaml."""
+    st = s.get("state")
+    if st is None:
+        st = s["state"] = {}
+    return st
 
-    for s in series:
-        name = s.get("name") or "(sin nombre)"
-        url = s.get("url")
-        site = s.get("site", "")
-        prev = s.get("last_chapter") or ""
-        status = "ok"
 
-        log(f"==> {name}")
+def fetch_validators(s: dict) -> dict:
+    """
+    Estado de la serie para el GET condicional. Sin capítulo guardado válido (vacío para
+    re-inicializar, o un id como 771093) un 304 no serviría de nada, y con validadores de
+    otra versión del parser tampoco: se olvidan ETag y Last-Modified y la página se pide entera.
+    """
+    st = series_state(s)
+    if not stored_chapter(s) or not current_validators(st):
+        st.pop("etag", None)
+        st.pop("last_modified", None)
+    return st
 
-        if not url:
-            log("   [skip] sin url")
-            continue
 
-        try:
-            html = http_get(url, backend=FETCH_BACKEND)
-            log(f"   [fetch] {FETCH_BACKEND} → {url}")
-        except Exception as e:
-            msg = f"fetch error: {e}"
-            log(f"   [skip] {msg}")
-            # Silenciado: no notificar a Discord (solo queda en resumen)
-            errors.append((name, f"fetch: {e}"))
-            continue
+def notify_change(s: dict, prev: str, new_val: str, stats: dict):
+    """Encola el aviso a Discord (notify_event decide si de verdad se envía)."""
+    name = s.get("name") or "(sin nombre)"
+    with stats["metrics"].span("notify", series=name, host=site_key(s["url"])):
+        notify_event("update" if prev else "init", name, s.get("site", ""), s["url"], prev or None, new_val)
+
+
+def process_series(s: dict, html, stats: dict, meta: dict, job=None):
+    """
+    Aplica el resultado de un fetch a la entrada de la serie.
+    `html` es el HTML descargado, los candidatos sacados en el navegador (Extracted,
+    con EXTRACT_MODE=dom|both) o la excepción del fetch; `meta` trae el backend
+    usado y los segundos del fetch. `job` (PARSE_WORKERS) es el parseo ya encargado
+    al pool de procesos para ese HTML.
+    Actualiza `stats` (updated / same / errors / metrics) y `s["last_chapter"]`.
+    Devuelve el resultado: "updated" | "normalized" | "same" | "error" | "skip".
+    """
+    name = s.get("name") or "(sin nombre)"
+    url = s.get("url")
+    site = s.get("site", "")
+    prev = stored_chapter(s)
+    state = series_state(s)
+    metrics = stats["metrics"]
+    if s.get("last_chapter") and not prev:
+        log(f"   [fix] capítulo guardado inválido ({s['last_chapter']}): se vuelve a inicializar")
+    fetched_with = meta.get("backend", FETCH_BACKEND)
+
+    metrics.add(
+        "fetch", meta.get("elapsed", 0.0), series=name, host=site_key(url),
+        backend=fetched_with,
+        bytes=len(html.encode("utf-8")) if isinstance(html, str) else meta.get("bytes", 0),
+        ok=isinstance(html, (str, Extracted, NotModified)),
+        status=304 if isinstance(html, NotModified) else None,
+        error=str(html)[:200] if isinstance(html, BaseException) and not isinstance(html, NotModified) else None,
+    )
+
+    if isinstance(html, NotModified) and prev:
+        log(f"   [ok] sin cambios (304, cap {cap_to_pretty(prev)})")
+        stats["same"] += 1
+        return "same"
+    if isinstance(html, BaseException):
+        msg = f"fetch error: {html}"
+        log(f"   [skip] {msg}")
+        # Silenciado: no notificar a Discord (solo queda en resumen)
+        stats["errors"].append((name, f"fetch: {html}"))
+        return "error"
+    log(f"   [fetch] {fetched_with} → {url}")
+
+    extracted = None
+    if isinstance(html, Extracted):
+        extracted, html = html, html.html
+
+    snapshots = get_snapshots()
+    if snapshots is not None and html is not None:
+        # SNAPSHOT_DIR: copia para re-parsear sin red (tools/reparse_snapshots.py)
+        snapshots.put(url, html, backend=fetched_with, name=name)
+
+    frag = None
+    if html is None:
+        # EXTRACT_MODE=dom o feed: los candidatos ya vienen resueltos, no hay HTML que parsear
+        with metrics.span("parse", series=name, host=site_key(url), parser=extracted.source) as sp:
+            candidate = sp["value"] = extracted.chapter()
+    else:
+        # Mismo listado de capítulos que el run anterior → no hace falta parsear
+        # (en modo both se parsea siempre: el objetivo es comparar)
+        frag = job.fragment if job is not None else fragment_hash(chapter_fragment(url, html))
+        if prev and state.get("fragment") == frag and extracted is None:
+            log(f"   [ok] sin cambios (fragmento idéntico, cap {cap_to_pretty(prev)})")
+            accept_validators(state, meta)     # mismo listado que uno ya aceptado
+            stats["same"] += 1
+            return "same"
 
         parser = pick_parser(url)
         if not parser:
             log("   [skip] sin parser registrado para este dominio")
-            continue
+            return "skip"
 
-        try:
-            candidate = parser(url, html)
-        except Exception as e:
-            msg = f"parse error: {e}"
-            log(f"   [skip] {msg}")
-            errors.append((name, f"parse: {e}"))
-            continue
-
-        if not candidate:
-            log("   [info] no se detectó capítulo válido")
-            continue
-
-        # Guardarraíles de cordura
+        with metrics.span("parse", series=name, host=site_key(url), parser=parser.__name__) as sp:
+            try:
+                if job is not None:
+                    candidate, sp["cpu"] = job.result()    # espera al worker si aún no ha terminado
+                else:
+                    candidate = parser(url, html)
+            except Exception as e:
+                msg = f"parse error: {e}"
+                log(f"   [skip] {msg}")
+                stats["errors"].append((name, f"parse: {e}"))
+                sp["ok"] = False
+                sp["error"] = str(e)[:200]
+                return "error"
+            sp["value"] = candidate
+            if extracted is not None:
+                # EXTRACT_MODE=both: manda el parser de Python; el extractor solo se contrasta
+                sp["dom_value"] = dom_value = extracted.chapter()
+                if dom_value != candidate:
+                    log(f"   [dom] no coincide: dom={dom_value} html={candidate}")
+                    stats.setdefault("dom_mismatch", []).append((name, dom_value, candidate))
+
+    if not candidate:
+        log("   [info] no se detectó capítulo válido")
+        return "skip"
+
+    # Guardarraíles de cordura
+    with metrics.span("sanity", series=name, host=site_key(url)) as sp:
         ok, sane_value, reason = sanity_filter(site, candidate, prev)
-        if not ok:
-            if reason == "regresion-evitada" and sane_value:
-                log(f"   [keep] regresión evitada → se mantiene (cap {sane_value})")
-                # mantenemos prev, no se notifica
-                same += 1
-                continue
-            else:
-                log(f"   [skip] descartado por '{reason}'")
-                same += 1
-                continue
+        sp["reason"] = reason
+    if not ok:
+        if reason == "regresion-evitada" and sane_value:
+            log(f"   [keep] regresión evitada → se mantiene (cap {sane_value})")
+            # mantenemos prev, no se notifica
+            stats["same"] += 1
+        else:
+            log(f"   [skip] descartado por '{reason}'")
+            stats["same"] += 1
+        return "same"
 
-        # Aceptamos valor normalizado
-        new_val = sane_value
-        cmp = compare_caps(prev, new_val)
+    # Aceptamos valor normalizado. Solo ahora se guardan validadores y fragmento: con un
+    # parseo fallido o descartado, un 304 o un fragmento igual en el siguiente run se
+    # saltarían la página sin volver a mirarla.
+    accept_validators(state, meta)
+    if frag is not None:
+        state["fragment"] = frag
+    new_val = sane_value
+    cmp = compare_caps(prev, new_val)
 
-        if prev and cmp == 0:
-            log(f"   [ok] sin cambios (cap {cap_to_pretty(prev)})")
-            same += 1
-        elif cmp > 0:
-            log(f"   [update] {prev or '∅'} → {cap_to_pretty(new_val)}")
+    if prev and cmp == 0:
+        log(f"   [ok] sin cambios (cap {cap_to_pretty(prev)})")
+        stats["same"] += 1
+    elif cmp > 0:
+        log(f"   [update] {prev or '∅'} → {cap_to_pretty(new_val)}")
+        s["last_chapter"] = new_val
+        stats["updated"] += 1
+        notify_change(s, prev, new_val, stats)
+        return "updated"
+    else:
+        # cmp < 0 (más bajo) pero no fue regresión brusca (porque ya lo bloquea sanity_filter)
+        # Puede pasar por normalización de formato (ej: 3.2 → 3.20)
+        if prev != new_val:
+            log(f"   [update] {prev} → {new_val}")
             s["last_chapter"] = new_val
-            updated += 1
+            stats["updated"] += 1
+            notify_change(s, prev, new_val, stats)
+            return "normalized"
         else:
-            # cmp < 0 (más bajo) pero no fue regresión brusca (porque ya lo bloquea sanity_filter)
-            # Puede pasar por normalización de formato (ej: 3.2 → 3.20)
-            if prev != new_val:
-                log(f"   [update] {prev} → {new_val}")
-                s["last_chapter"] = new_val
-                updated += 1
+            log(f"   [ok] sin cambios (cap {cap_to_pretty(prev)})")
+            stats["same"] += 1
+    return "same"
+
+
+def apply_result(s: dict, html, stats: dict, meta: dict, job=None):
+    if isinstance(html, Deferred):
+        defer_series(s, stats)
+        return
+    t0 = time.perf_counter()
+    prev = stored_chapter(s)
+    outcome = process_series(s, html, stats, meta, job)
+    state = series_state(s)
+    # solo una subida real de capítulo cuenta para la cadencia de publicación:
+    # inicializar (∅ → N) o re-inicializar tras un valor inválido no es un estreno
+    changed = outcome == "updated" and bool(prev) and compare_caps(prev, s.get("last_chapter")) > 0
+    record_check(state, changed=changed, ok=outcome != "error")
+    if meta.get("elapsed") and outcome != "error":
+        # un error o un timeout no mide lo que cuesta revisar la serie
+        record_cost(s, meta["elapsed"] + time.perf_counter() - t0)
+    stats["store"].commit_series(s, outcome)
+
+
+def write_series(s: dict, html, stats: dict, meta: dict, job=None, header: bool = True):
+    """Único escritor del run: cabecera en el log y resultado aplicado a la serie."""
+    if header:
+        log(f"==> {s.get('name') or '(sin nombre)'}")
+    if not s.get("url"):
+        log("   [skip] sin url")
+        return
+    apply_result(s, html, stats, meta, job)
+
+
+def parse_job(pool, s: dict, html):
+    """PARSE_WORKERS: encarga el parseo de `html` al pool (None si no hay HTML que parsear)."""
+    if pool is None or not isinstance(html, str):
+        return None
+    known = series_state(s).get("fragment") if stored_chapter(s) else None
+    return pool.job(s["url"], html, known)
+
+
+def defer_series(s: dict, stats: dict):
+    """Sin tiempo para esta serie: pasa al principio del siguiente run."""
+    log("   [deferred] no cabe en el plazo del run; queda para el siguiente")
+    defer(series_state(s))
+    stats["deferred"] = stats.get("deferred", 0) + 1
+    stats["store"].commit_series(s, "deferred")
+
+
+def run_feeds(series: list, stats: dict) -> list:
+    """
+    FEED_FASTPATH: resuelve con la página de novedades de cada sitio las series que
+    salen en ella. Devuelve las que siguen necesitando su propio fetch.
+    """
+    from scraper.feeds import feed_pass
+
+    metrics = stats["metrics"]
+
+    def fetch(url):
+        with metrics.span("feed", host=site_key(url), url=url) as sp:
+            meta = {}
+            html = get_breaker().call(url, lambda: http_get(url, backend=FETCH_BACKEND, meta=meta))
+            sp["backend"] = meta.get("backend")
+            sp["bytes"] = len(html.encode("utf-8"))
+            return html
+
+    resolved, unchanged, rest = feed_pass(series, fetch)
+    for s, nums in resolved:
+        log(f"==> {s.get('name') or '(sin nombre)'}")
+        apply_result(s, Extracted(s["url"], nums, source="feed"), stats, {"backend": "feed"})
+    stats["feed_same"] = len(unchanged)
+    return rest
+
+
+def due_series(series: list, stats: dict) -> list:
+    """Series a revisar en este run (todas, salvo con ADAPTIVE_SCHEDULE)."""
+    now = time.time()
+    due = [s for s in series if is_due(s, now)]
+    stats["not_due"] = len(series) - len(due)
+    return due
+
+
+def fetch_series(url: str, s: dict, meta: dict):
+    """Endpoint ligero de WordPress si el sitio lo tiene; si no, el fetch HTML de siempre."""
+    if enabled_for(url):
+        try:
+            res = fetch_endpoint(url)
+            meta["backend"] = res.source
+            return res
+        except EndpointUnavailable:
+            pass
+    return http_get(url, backend=FETCH_BACKEND, validators=fetch_validators(s), meta=meta, stream=STREAM_PARSE)
+
+
+def run_serial(series: list, stats: dict):
+    deadline = stats["deadline"]
+    per_host = host_costs(series, site_key)
+    pause = float(os.environ.get("SCRAPER_SLEEP", "0.2"))
+    # PARSE_WORKERS: mientras el pool parsea, el bucle sigue descargando; los resultados
+    # se escriben en orden (y con ellos la cabecera de cada serie, como en modo async)
+    pool = ParsePool() if PARSE_WORKERS > 0 else None
+    try:
+        for s in series:
+            if pool is None:
+                log(f"==> {s.get('name') or '(sin nombre)'}")
+            url = s.get("url")
+            meta = {}
+            if not url:
+                html = None
+            elif not deadline.fits(estimate_cost(s, per_host, site_key) + pause):
+                html = Deferred(url)
+            else:
+                t0 = time.perf_counter()
+                try:
+                    # con el circuito del host abierto falla al instante, sin red
+                    html = get_breaker().call(url, lambda: fetch_series(url, s, meta))
+                except Exception as e:
+                    html = e
+                meta["elapsed"] = time.perf_counter() - t0
+
+            if pool is None:
+                write_series(s, html, stats, meta, header=False)
+            else:
+                pool.put((s, html, stats, meta, parse_job(pool, s, html)), write_series)
+
+            # Evita ser muy agresivo con sitios delicados (si no hubo petición, no hace falta)
+            if url and not isinstance(html, (CircuitOpen, Deferred)):
+                time.sleep(pause)
+        if pool is not None:
+            pool.flush(write_series)
+    finally:
+        if pool is not None:
+            pool.close()
+        # Chromium se comparte durante todo el run; se cierra una sola vez aquí
+        close_pool()
+
+
+def run_async(series: list, stats: dict):
+    """
+    Descarga todo en paralelo (límites por dominio en lugar del sleep global)
+    y luego aplica los resultados en el orden de series.yaml, igual que el modo serie.
+    """
+    from scraper.async_fetch import fetch_all
+
+    todo = [s for s in series if s.get("url")]
+    per_host = host_costs(series, site_key)
+    fetched = fetch_all(
+        [s["url"] for s in todo],
+        backend=FETCH_BACKEND,
+        validators=[fetch_validators(s) for s in todo],
+        deadline=stats["deadline"],
+        costs=[estimate_cost(s, per_host, site_key) for s in todo],
+        stream=STREAM_PARSE,
+    )
+    results = dict(zip(map(id, todo), fetched))
+
+    # PARSE_WORKERS: los parseos van por delante del escritor, hasta PARSE_QUEUE páginas
+    pool = ParsePool() if PARSE_WORKERS > 0 else None
+    try:
+        for s in series:
+            html, meta = results.pop(id(s), (None, {}))
+            if pool is None:
+                write_series(s, html, stats, meta)
             else:
-                log(f"   [ok] sin cambios (cap {cap_to_pretty(prev)})")
-                same += 1
+                pool.put((s, html, stats, meta, parse_job(pool, s, html)), write_series)
+        if pool is not None:
+            pool.flush(write_series)
+    finally:
+        if pool is not None:
+            pool.close()
+
 
-        # Evita ser muy agresivo con sitios delicados
-        time.sleep(float(os.environ.get("SCRAPER_SLEEP", "0.2")))
+def main() -> int:
+    store = open_store(SERIES_FILE)
+    data = store.load()
+    series = data.get("series", [])
+    stats = {"updated": 0, "same": 0, "errors": [], "metrics": RunMetrics(), "store": store}
+    metrics = stats["metrics"]
+
+    log(f"[cfg] FETCH_BACKEND='{FETCH_BACKEND}'  PIPELINE_MODE='{PIPELINE_MODE}'  HTTPS_PROXY={os.environ.get('HTTPS_PROXY','unset')}  HTTP_PROXY={os.environ.get('HTTP_PROXY','unset')}")
+    proxies = get_proxy_pool()
+    if proxies is not None:
+        log(f"[cfg] PROXY_POOL: {len(proxies.proxies)} salidas")
+
+    if SHARD_COUNT > 1:
+        # cada shard solo escribe su resultado parcial; tools/merge_shards.py actualiza el estado
+        store.close()
+        series = select_shard(series, SHARD_INDEX, SHARD_COUNT)
+        out = SHARD_OUT or f"shard-{SHARD_INDEX}.json"
+        stats["store"] = store = PartialResult(out, SHARD_INDEX, SHARD_COUNT, stats)
+        log(f"[cfg] shard {SHARD_INDEX + 1}/{SHARD_COUNT} (por {SHARD_KEY}): {len(series)} series → {out}")
 
-    # Guardar YAML si hubo cambios
-    save_yaml(SERIES_FILE, data)
+    todo = due_series(series, stats)
+    deadline = stats["deadline"] = RunDeadline()
+    if deadline.enabled:
+        # con plazo: primero lo aplazado, lo atrasado, lo activo y lo barato
+        todo = priority_order(todo, site_key)
+        log(f"[cfg] plazo del run: {deadline.seconds / 60:g} min")
+    if FEED_FASTPATH:
+        todo = run_feeds(todo, stats)
+    if PIPELINE_MODE == "async":
+        run_async(todo, stats)
+    else:
+        run_serial(todo, stats)
+
+    # los avisos salen en segundo plano; aquí solo se espera a que termine la cola
+    with metrics.span("notify-flush"):
+        sent, failed = flush_notifications()
+    if sent or failed:
+        log(f"[notify] enviados {sent}, fallidos {failed}")
+
+    close_all()
+    save_stats()   # lo aprendido por FETCH_BACKEND=auto sirve para el siguiente run
+    save_costs()
+    save_snapshots()
+
+    # Guardar estado si hubo cambios
+    with metrics.span("save"):
+        store.save(data)
+    store.close()
 
     # Resumen
+    errors = stats["errors"]
     log("\nResumen:")
-    log(f"  Actualizados: {updated}")
-    log(f"  Sin actualización: {same}")
+    log(f"  Actualizados: {stats['updated']}")
+    log(f"  Sin actualización: {stats['same']}")
+    if stats["not_due"]:
+        log(f"  No tocaba revisar (calendario adaptativo): {stats['not_due']}")
+    if stats.get("feed_same"):
+        log(f"  Sin cambios según la página de novedades: {stats['feed_same']}")
+    if stats.get("deferred"):
+        log(f"  Aplazadas al siguiente run (plazo): {stats['deferred']}")
     log(f"  Con errores (silenciados en Discord): {len(errors)}")
     for name, err in errors[:50]:
         log(f"   - {name}: {err}")
+    breaker = get_breaker()
+    for host, err in breaker.opened.items():
+        log(f"  Circuito abierto: {host} ({breaker.skipped.get(host, 0)} series sin intentar) — {err}")
+    if proxies is not None:
+        for line in proxies.summary():
+            log(f"  Proxy {line}")
+    if stats.get("dom_mismatch"):
+        log(f"  Extractor DOM distinto del parser HTML: {len(stats['dom_mismatch'])}")
+        for name, dom_value, html_value in stats["dom_mismatch"]:
+            log(f"   - {name}: dom={dom_value} html={html_value}")
+
+    totals = metrics.stage_totals()
+    log("  Tiempo por etapa: " + ", ".join(f"{k} {v['seconds']:.1f}s" for k, v in totals.items()))
+    metrics.export({"updated": stats["updated"], "same": stats["same"], "errors": len(errors)})
 
     return 0
 
@@ -0,0 +1,336 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import os
+import time
+
+from .backend_stats import Blocked, check_blocked, get_stats
+from .browser_pool import PW_BLOCK_RESOURCES, PW_FALLBACK_WAIT_MS, PW_WAIT_MS, should_block
+from .conditional import NotModified, conditional_headers, remember_validators
+from .extractors import extract_async
+from .http_client import HEADERS, TIMEOUT, UA, USE_PROXY
+from .proxy_pool import get_proxy_pool, lease_async, playwright_proxy
+from .resilience import CircuitOpen, get_breaker
+from .schedule import Deferred
+from .session import client_kwargs, proxied_kwargs
+from .wp_api import EndpointUnavailable, enabled_for, fetch_endpoint_async
+from .sites import HOST_LIMITS, has_chapter_list, site_key, wait_selector
+
+HOST_CONCURRENCY = int(os.getenv("HOST_CONCURRENCY", "2"))     # para dominios sin límite propio
+HOST_DELAY = float(os.getenv("HOST_DELAY", "0.5"))
+PW_CONCURRENCY = int(os.getenv("PW_CONCURRENCY", "4"))         # páginas de Chromium abiertas a la vez
+
+
+def _parse_host_limits(raw: str) -> dict:
+    """
+    "zonatmo.com=1/2.0,m440.in=3" → {"zonatmo.com": (1, 2.0), "m440.in": (3, HOST_DELAY)}
+    """
+    out = {}
+    for item in (raw or "").split(","):
+        if "=" not in item:
+            continue
+        host, spec = item.split("=", 1)
+        conc, _, delay = spec.partition("/")
+        try:
+            out[host.strip().lower()] = (int(conc), float(delay) if delay else HOST_DELAY)
+        except ValueError:
+            print(f"   [cfg] HOST_LIMITS inválido: {item!r}")
+    return out
+
+
+class HostLimiter:
+    """
+    Un semáforo por dominio + separación mínima entre arranques de petición.
+    Sustituye al SCRAPER_SLEEP global: cada sitio tiene su propio ritmo.
+    Los límites son por IP de salida: con PROXY_POOL el pool aplica la concurrencia y
+    el intervalo de cada dominio por proxy, y aquí solo queda el tope total
+    (concurrencia × proxies), sin intervalo global.
+    """
+
+    def __init__(self, limits: dict | None = None):
+        self.limits = dict(HOST_LIMITS)
+        self.limits.update(limits if limits is not None else _parse_host_limits(os.getenv("HOST_LIMITS", "")))
+        self.pool = get_proxy_pool()
+        if self.pool is not None:
+            self.pool.host_limits = self.ip_limit
+        self._sems = {}
+        self._locks = {}
+        self._last = {}
+
+    def ip_limit(self, host: str) -> tuple:
+        """(peticiones a la vez, segundos entre peticiones) de `host` para una IP."""
+        return self.limits.get(host, (HOST_CONCURRENCY, HOST_DELAY))
+
+    def _limit(self, host: str):
+        conc, delay = self.ip_limit(host)
+        if self.pool is None:
+            return conc, delay
+        return conc * len(self.pool.proxies), 0.0
+
+    def _get(self, host: str):
+        if host not in self._sems:
+            conc, _ = self._limit(host)
+            self._sems[host] = asyncio.Semaphore(max(1, conc))
+            self._locks[host] = asyncio.Lock()
+        return self._sems[host], self._locks[host]
+
+    async def acquire(self, host: str):
+        sem, lock = self._get(host)
+        await sem.acquire()
+        _, delay = self._limit(host)
+        async with lock:
+            wait = self._last.get(host, 0.0) + delay - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            self._last[host] = time.monotonic()
+
+    def release(self, host: str):
+        self._sems[host].release()
+
+
+class _Clients:
+    """
+    AsyncClient por proxy del pool (httpx fija el proxy al crear el cliente).
+    get(None) es el cliente de siempre (sin PROXY_POOL).
+    """
+
+    def __init__(self, default):
+        self.default = default
+        self._proxied = {}
+
+    def get(self, proxy: str | None = None):
+        if proxy is None:
+            return self.default
+        cli = self._proxied.get(proxy)
+        if cli is None:
+            import httpx
+            cli = self._proxied[proxy] = httpx.AsyncClient(**proxied_kwargs(proxy, headers=HEADERS, timeout=TIMEOUT))
+        return cli
+
+    async def aclose(self):
+        for cli in self._proxied.values():
+            await cli.aclose()
+        self._proxied.clear()
+
+
+async def _fetch_httpx(clients, url: str, validators: dict | None = None, stream: bool = False, meta=None):
+    async with lease_async(url) as proxy:
+        client = clients.get(proxy)
+        if stream:
+            from .streaming import stream_httpx_async
+            return await stream_httpx_async(client, url, validators, meta)
+        r = await client.get(url, headers=conditional_headers(validators))
+        if r.status_code == 304:
+            raise NotModified(url)
+        check_blocked(url, r.status_code, r.text)
+        r.raise_for_status()
+        remember_validators(meta, r.headers)
+        return r.text
+
+
+async def _route(route):
+    req = route.request
+    if should_block(req.resource_type, req.url):
+        await route.abort()
+    else:
+        await route.continue_()
+
+
+class _LazyBrowser:
+    """Chromium se lanza la primera vez que algún fetch lo necesita (en 'auto' puede que ninguno)."""
+
+    def __init__(self):
+        self.pw = self.browser = None
+        self.failed = False
+        self._lock = asyncio.Lock()
+
+    async def get(self):
+        async with self._lock:
+            if self.browser is None and not self.failed:
+                try:
+                    from playwright.async_api import async_playwright
+                    self.pw = await async_playwright().start()
+                    self.browser = await self.pw.chromium.launch(headless=True)
+                except Exception as e:
+                    self.failed = True
+                    print(f"   [async] playwright no disponible ({e}); se usa httpx")
+        return self.browser
+
+    async def close(self):
+        if self.browser is not None:
+            await self.browser.close()
+        if self.pw is not None:
+            await self.pw.stop()
+
+
+async def _fetch_playwright(browsers, pw_sem, url: str) -> str:
+    browser = await browsers.get()
+    if browser is None:
+        raise RuntimeError("playwright no disponible")
+    async with pw_sem, lease_async(url) as pooled:
+        if pooled is not None:
+            proxy = playwright_proxy(pooled)
+        else:
+            proxy = {"server": USE_PROXY} if USE_PROXY else None
+        context = await browser.new_context(
+            user_agent=UA,
+            proxy=proxy,
+            locale="es-ES",
+            viewport={"width": 1280, "height": 1024},
+        )
+        try:
+            page = await context.new_page()
+            page.set_default_timeout(int(TIMEOUT * 1000))
+            if PW_BLOCK_RESOURCES:
+                await page.route("**/*", _route)
+            await page.goto(url, wait_until="domcontentloaded")
+            # mismo criterio que browser_pool.render
+            selector = wait_selector(url)
+            if selector:
+                try:
+                    await page.wait_for_selector(selector, state="attached", timeout=PW_WAIT_MS)
+                except Exception:
+                    pass
+            else:
+                await page.wait_for_timeout(PW_FALLBACK_WAIT_MS)
+            return await extract_async(page, url)
+        finally:
+            await context.close()
+
+
+async def _fetch_auto(url, validators, clients, browsers, pw_sem, meta, stream=False) -> str:
+    """Versión async de backend_stats.fetch_auto (httpx como backend barato)."""
+    stats = get_stats()
+    host = site_key(url)
+    static = None
+    tried_cheap = stats.choose(host, "httpx") == "httpx"
+    if tried_cheap:
+        t0 = time.perf_counter()
+        meta["backend"] = "httpx"
+        try:
+            html = await _fetch_httpx(clients, url, validators, stream, meta)
+        except NotModified:
+            stats.record(host, "httpx", True, time.perf_counter() - t0)
+            raise
+        except Blocked:
+            stats.record(host, "httpx", False, time.perf_counter() - t0, blocked=True)
+        except Exception:
+            stats.record(host, "httpx", False, time.perf_counter() - t0)
+            raise
+        else:
+            listed = has_chapter_list(url, html)
+            stats.record(host, "httpx", True, time.perf_counter() - t0, chapters=listed)
+            if listed:
+                return html
+            static = html
+
+    t0 = time.perf_counter()
+    try:
+        html = await _fetch_playwright(browsers, pw_sem, url)
+    except Exception as e:
+        stats.record(host, "playwright", False, time.perf_counter() - t0, blocked=isinstance(e, Blocked))
+        if static is not None:
+            return static
+        if tried_cheap:
+            raise
+        meta["backend"] = "httpx"
+        return await _fetch_httpx(clients, url, validators, stream, meta)
+    stats.record(host, "playwright", True, time.perf_counter() - t0, chapters=has_chapter_list(url, html))
+    meta["backend"] = "playwright"
+    meta.pop("validators", None)     # eran del HTML estático que se descartó
+    return html
+
+
+async def _fetch_backend(url, validators, backend, clients, browsers, pw_sem, meta, stream=False):
+    if enabled_for(url):
+        try:
+            res = await fetch_endpoint_async(clients, url)
+            meta["backend"] = res.source
+            return res
+        except EndpointUnavailable:
+            pass  # sin endpoint ligero: fetch HTML normal
+    if backend == "auto":
+        return await _fetch_auto(url, validators, clients, browsers, pw_sem, meta, stream)
+    if backend == "playwright" and not browsers.failed:
+        try:
+            meta["backend"] = "playwright"
+            html = await _fetch_playwright(browsers, pw_sem, url)
+            if html and (not isinstance(html, str) or len(html) > 200):
+                return html
+        except Exception:
+            pass  # igual que utils.http_get: cae a HTTP plano
+    meta["backend"] = "httpx"
+    return await _fetch_httpx(clients, url, validators, stream, meta)
+
+
+async def _fetch_one(url, validators, backend, limiter, clients, browsers, pw_sem, deadline=None, cost=0.0,
+                     stream=False):
+    """
+    Devuelve (html o excepción, meta) con meta = {"backend", "elapsed"}.
+    Con `deadline`, si al llegarle el turno ya no cabe `cost`, devuelve Deferred sin hacer la petición.
+    """
+    host = site_key(url)
+    meta = {"elapsed": 0.0}
+    breaker = get_breaker()
+    try:
+        breaker.check(url)     # host ya dado por caído: ni siquiera espera turno
+    except CircuitOpen as e:
+        return e, meta
+    await limiter.acquire(host)
+    t0 = time.perf_counter()
+    if deadline is not None and not deadline.fits(cost):
+        limiter.release(host)
+        return Deferred(url), meta
+    try:
+        breaker.check(url)     # pudo abrirse mientras esperaba turno
+        html = await _fetch_backend(url, validators, backend, clients, browsers, pw_sem, meta, stream)
+    except Exception as e:
+        breaker.record(url, e)
+        return e, meta
+    finally:
+        meta["elapsed"] = time.perf_counter() - t0
+        limiter.release(host)
+    breaker.record(url, None)
+    return html, meta
+
+
+async def fetch_all_async(urls: list, backend: str = "playwright", limiter: HostLimiter | None = None,
+                          validators: list | None = None, deadline=None, costs: list | None = None,
+                          stream: bool = False) -> list:
+    """
+    Descarga todas las URLs en paralelo respetando los límites por dominio.
+    Devuelve una lista alineada con `urls` de pares (resultado, meta): el resultado es
+    el HTML (str) o la excepción de ese fetch (NotModified si el GET condicional devolvió 304);
+    meta lleva el backend usado y los segundos del fetch (sin contar la espera por dominio).
+    `validators`, si se pasa, es una lista alineada con `urls` de dicts etag/last_modified.
+    `deadline` (schedule.RunDeadline) + `costs` (segundos estimados por URL): las que
+    ya no caben cuando les toca turno se devuelven como Deferred.
+    `stream=True`: httpx parsea por trozos y devuelve Extracted en lugar del HTML.
+    """
+    import httpx
+
+    limiter = limiter or HostLimiter()
+    backend = (backend or "").lower()
+
+    browsers = _LazyBrowser()
+    try:
+        async with httpx.AsyncClient(**client_kwargs(headers=HEADERS, timeout=TIMEOUT)) as client:
+            clients = _Clients(client)
+            pw_sem = asyncio.Semaphore(max(1, PW_CONCURRENCY))
+            vals = validators or [None] * len(urls)
+            costs = costs or [0.0] * len(urls)
+            tasks = [
+                _fetch_one(u, v, backend, limiter, clients, browsers, pw_sem, deadline, c, stream)
+                for u, v, c in zip(urls, vals, costs)
+            ]
+            try:
+                return await asyncio.gather(*tasks)
+            finally:
+                await clients.aclose()
+    finally:
+        await browsers.close()
+
+
+def fetch_all(urls: list, backend: str = "playwright", validators: list | None = None,
+              deadline=None, costs: list | None = None, stream: bool = False) -> list:
+    return asyncio.run(fetch_all_async(urls, backend, validators=validators, deadline=deadline, costs=costs,
+                                       stream=stream))
@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+# Estadísticas persistentes por dominio y backend para el modo 'auto' de fetch:
+# si el HTML estático de un host ya trae el listado, nunca se abre Chromium;
+# si un host siempre bloquea, no se pierde un round trip de httpx/requests.
+import json
+import os
+import threading
+import time
+
+from .conditional import NotModified
+
+BACKEND_STATS_FILE = os.getenv("BACKEND_STATS_FILE", ".cache/backend_stats.json")
+REPROBE_EVERY = int(os.getenv("BACKEND_REPROBE_EVERY", "25"))    # cada N fetches se vuelve a probar el barato
+MIN_SAMPLES = 3
+GOOD_RATE = 0.7
+ALPHA = 0.3      # peso de la última muestra en la latencia media (EWMA)
+RATE_ALPHA = 0.2 # peso de la última muestra en la tasa de éxito (EWMA): ~6 aciertos seguidos
+                 # devuelven un host al backend barato y 2 bloqueos seguidos lo sacan
+
+# páginas de desafío anti-bot que llegan con 200/503 en lugar de 403
+_CHALLENGE_MARKERS = ("cf-chl-", "challenge-platform", "Just a moment...", "g-recaptcha")
+
+
+class Blocked(RuntimeError):
+    """403 o página de desafío: no tiene sentido reintentar con el mismo backend."""
+
+
+def check_blocked(url: str, status: int, text: str = ""):
+    if status == 403:
+        raise Blocked(f"HTTP 403 for {url}")
+    if status in (200, 503) and any(m in text[:20000] for m in _CHALLENGE_MARKERS):
+        raise Blocked(f"captcha/challenge for {url}")
+
+
+class BackendStats:
+    def __init__(self, path: str = BACKEND_STATS_FILE):
+        self.path = path
+        self.data = {}
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as fh:
+                self.data = json.load(fh)
+        except (OSError, ValueError):
+            self.data = {}
+        for host in self.data.values():
+            host.pop("picks", None)     # formato anterior: un contador por host para todos los backends
+
+    def save(self):
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp"
+        with self._lock, open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(self.data, fh, indent=1, sort_keys=True)
+        os.replace(tmp, self.path)
+
+    def _entry(self, host: str, backend: str) -> dict:
+        return self.data.setdefault(host, {}).setdefault(
+            backend, {"n": 0, "ok": 0, "blocked": 0, "errors": 0, "chapters": 0, "latency": None}
+        )
+
+    def record(self, host: str, backend: str, ok: bool, latency: float,
+               blocked: bool = False, chapters: bool | None = None):
+        """
+        ok: el fetch devolvió HTML; blocked: 403/429/captcha;
+        chapters: el HTML traía el listado de capítulos (None = no se comprobó).
+        """
+        with self._lock:
+            e = self._entry(host, backend)
+            good = ok and chapters is not False
+            if ok or blocked:
+                # los errores que no son bloqueos (404, timeouts) no dicen nada del backend
+                rate = e["rate"] if "rate" in e else self._lifetime_rate(e)
+                e["rate"] = round(float(good) if rate is None else RATE_ALPHA * good + (1 - RATE_ALPHA) * rate, 4)
+            e["n"] += 1
+            e["ok"] += 1 if ok else 0
+            e["blocked"] += 1 if blocked else 0
+            e["errors"] += 1 if not ok and not blocked else 0
+            e["chapters"] += 1 if good else 0
+            e["latency"] = round(latency if e["latency"] is None else ALPHA * latency + (1 - ALPHA) * e["latency"], 3)
+
+    def works(self, host: str, backend: str):
+        """
+        True/False si hay muestras suficientes; None si aún no se sabe.
+        Los errores que no son bloqueos (404, timeouts) no dicen nada del backend y no cuentan.
+        """
+        e = self.data.get(host, {}).get(backend)
+        useful = (e["n"] - e.get("errors", 0)) if e else 0
+        if useful < MIN_SAMPLES:
+            return None
+        # tasa reciente (EWMA), no la de toda la vida: un host se recupera o se estropea
+        rate = e["rate"] if "rate" in e else self._lifetime_rate(e)
+        return rate >= GOOD_RATE
+
+    @staticmethod
+    def _lifetime_rate(e: dict):
+        """Tasa de éxito con los contadores acumulados (ficheros sin "rate")."""
+        useful = e["n"] - e.get("errors", 0)
+        return e["chapters"] / useful if useful > 0 else None
+
+    def choose(self, host: str, cheap: str, expensive: str = "playwright") -> str:
+        """
+        El backend barato mientras funcione (o mientras se explora con pocas muestras);
+        si no funciona, el caro, volviendo a probar el barato cada REPROBE_EVERY fetches.
+        """
+        if self.works(host, cheap) is not False:
+            return cheap
+        with self._lock:
+            # un contador por backend barato: httpx, wp-ajax y wp-rss re-prueban cada uno a su ritmo
+            e = self._entry(host, cheap)
+            e["picks"] = e.get("picks", 0) + 1
+            if REPROBE_EVERY and e["picks"] % REPROBE_EVERY == 0:
+                return cheap
+        return expensive
+
+
+_stats = None
+
+
+def get_stats() -> BackendStats:
+    global _stats
+    if _stats is None:
+        _stats = BackendStats()
+    return _stats
+
+
+def save_stats():
+    if _stats is not None:
+        _stats.save()
+
+
+def fetch_auto(url: str, cheap: str, fetch_cheap, fetch_browser, meta: dict) -> str:
+    """
+    Modo 'auto' compartido por http_client.fetch_html y utils.http_get.
+    fetch_cheap / fetch_browser: callables sin argumentos. Se prueba primero el backend
+    que las estadísticas del dominio dicen que sirve; el barato cae al navegador si lo
+    bloquean o si su HTML no trae el listado, y el navegador al barato si no arranca.
+    """
+    from .sites import has_chapter_list, site_key
+
+    stats = get_stats()
+    host = site_key(url)
+    tried_cheap = False
+    static = None      # HTML del backend barato sin listado: se devuelve si el navegador falla
+    if stats.choose(host, cheap) == cheap:
+        tried_cheap = True
+        t0 = time.perf_counter()
+        try:
+            html = fetch_cheap()
+        except NotModified:
+            stats.record(host, cheap, True, time.perf_counter() - t0)
+            meta["backend"] = cheap
+            raise
+        except Blocked:
+            stats.record(host, cheap, False, time.perf_counter() - t0, blocked=True)
+            print(f"   [fallback] playwright → {url}")
+        except Exception:
+            stats.record(host, cheap, False, time.perf_counter() - t0)
+            raise
+        else:
+            listed = has_chapter_list(url, html)
+            stats.record(host, cheap, True, time.perf_counter() - t0, chapters=listed)
+            if listed:
+                meta["backend"] = cheap
+                return html
+            static = html
+            print(f"   [fallback] sin listado en el HTML estático; playwright → {url}")
+
+    t0 = time.perf_counter()
+    try:
+        html = fetch_browser()
+    except Exception as e:
+        stats.record(host, "playwright", False, time.perf_counter() - t0, blocked=isinstance(e, Blocked))
+        if static is not None:
+            meta["backend"] = cheap
+            return static
+        if tried_cheap:
+            raise
+        meta["backend"] = cheap
+        return fetch_cheap()
+    stats.record(host, "playwright", True, time.perf_counter() - t0, chapters=has_chapter_list(url, html))
+    meta["backend"] = "playwright"
+    meta.pop("validators", None)     # eran del HTML estático que se descartó
+    return html
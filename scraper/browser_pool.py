@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+import atexit
+import os
+import threading
+from contextlib import contextmanager
+
+from .sites import wait_selector
+
+PW_MAX_USES = int(os.getenv("PW_MAX_USES", "40"))      # páginas antes de relanzar Chromium
+PW_HEADLESS = os.getenv("PW_HEADLESS", "true").lower() != "false"
+PW_BLOCK_RESOURCES = os.getenv("PW_BLOCK_RESOURCES", "true").lower() != "false"
+PW_BLOCK_TYPES = frozenset(
+    t.strip() for t in os.getenv("PW_BLOCK_TYPES", "image,media,font,stylesheet").split(",") if t.strip()
+)
+PW_WAIT_MS = int(os.getenv("PW_WAIT_MS", "5000"))            # espera máxima al selector del listado
+PW_FALLBACK_WAIT_MS = int(os.getenv("PW_FALLBACK_WAIT_MS", "1200"))   # espera fija si el sitio no tiene selector
+
+# Publicidad y trackers habituales en estos sitios: nunca aportan al listado de capítulos
+AD_HOSTS = (
+    "googlesyndication.com", "doubleclick.net", "google-analytics.com", "googletagmanager.com",
+    "adservice.google.", "amazon-adsystem.com", "adsterra", "popads.net", "popcash.net",
+    "propellerads", "a-ads.com", "exoclick.com", "juicyads.com", "histats.com",
+    "disqus.com", "facebook.net", "hotjar.com", "clarity.ms", "onesignal.com",
+)
+
+
+def should_block(resource_type: str, url: str) -> bool:
+    if not PW_BLOCK_RESOURCES:
+        return False
+    if resource_type in PW_BLOCK_TYPES:
+        return True
+    u = url.lower()
+    return any(h in u for h in AD_HOSTS)
+
+
+def _route(route):
+    req = route.request
+    if should_block(req.resource_type, req.url):
+        route.abort()
+    else:
+        route.continue_()
+
+
+def render(page, url: str, timeout_ms: int):
+    """
+    Carga `url` sin imágenes/fuentes/CSS/anuncios y devuelve el HTML en cuanto
+    aparece el listado de capítulos (selector del sitio). La espera fija solo se
+    usa en sitios sin selector conocido.
+    Con EXTRACT_MODE=dom|both devuelve un extractors.Extracted en lugar del HTML.
+    """
+    from .extractors import extract
+
+    if PW_BLOCK_RESOURCES:
+        page.route("**/*", _route)
+    page.set_default_navigation_timeout(timeout_ms)
+    page.goto(url, wait_until="domcontentloaded")
+    selector = wait_selector(url)
+    if selector:
+        try:
+            page.wait_for_selector(selector, state="attached", timeout=PW_WAIT_MS)
+        except Exception:
+            pass  # si no aparece, seguimos con el HTML cargado
+    else:
+        page.wait_for_timeout(PW_FALLBACK_WAIT_MS)
+    return extract(page, url)
+
+
+class BrowserPool:
+    """
+    Un único Chromium por hilo de trabajo.
+      - se lanza la primera vez que se pide una página (no al importar)
+      - cada fetch recibe su propio contexto aislado (cookies, UA, proxy)
+      - se relanza tras `max_uses` páginas o si el navegador se cae
+    La API sync de Playwright está atada al hilo que la arrancó, por eso
+    `get_pool()` devuelve un pool por hilo.
+    """
+
+    def __init__(self, max_uses: int = PW_MAX_USES, headless: bool = PW_HEADLESS):
+        self.max_uses = max(1, max_uses)
+        self.headless = headless
+        self._pw = None
+        self._browser = None
+        self._uses = 0
+        self.launches = 0
+
+    def _start(self):
+        if self._pw is None:
+            try:
+                from playwright.sync_api import sync_playwright
+            except Exception as e:
+                raise RuntimeError("playwright no disponible") from e
+            self._pw = sync_playwright().start()
+        self._browser = self._pw.chromium.launch(headless=self.headless)
+        self._uses = 0
+        self.launches += 1
+
+    def _close_browser(self):
+        if self._browser is not None:
+            try:
+                self._browser.close()
+            except Exception:
+                pass
+        self._browser = None
+        self._uses = 0
+
+    def _ensure_browser(self):
+        b = self._browser
+        if b is not None and (not b.is_connected() or self._uses >= self.max_uses):
+            self._close_browser()
+        if self._browser is None:
+            self._start()
+        return self._browser
+
+    @contextmanager
+    def page(self, **context_kwargs):
+        """
+        Entrega una página nueva en un contexto aislado; cierra el contexto al salir.
+        Si el navegador murió durante el fetch, se descarta para relanzarlo en el siguiente.
+        """
+        browser = self._ensure_browser()
+        self._uses += 1
+        context = browser.new_context(**context_kwargs)
+        try:
+            yield context.new_page()
+        except Exception:
+            if not browser.is_connected():
+                self._close_browser()
+            raise
+        finally:
+            try:
+                context.close()
+            except Exception:
+                self._close_browser()
+
+    def close(self):
+        self._close_browser()
+        if self._pw is not None:
+            try:
+                self._pw.stop()
+            except Exception:
+                pass
+        self._pw = None
+
+
+_local = threading.local()
+
+
+def get_pool() -> BrowserPool:
+    pool = getattr(_local, "pool", None)
+    if pool is None:
+        pool = _local.pool = BrowserPool()
+    return pool
+
+
+def close_pool():
+    """Cierra el pool del hilo actual (los hilos de trabajo deben llamarlo al terminar)."""
+    pool = getattr(_local, "pool", None)
+    if pool is not None:
+        pool.close()
+        _local.pool = None
+
+
+atexit.register(close_pool)
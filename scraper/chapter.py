@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+# Número de capítulo como valor: una sola definición de orden y formato para los parsers,
+# sanity_filter, compare_caps y el notificador. Cada texto se parsea una vez (caché).
+from functools import lru_cache
+
+MAX_CHAPTER = 2000      # por encima no es un capítulo sino un id (p.ej. 771093 en animebbg)
+
+
+class Chapter:
+    """
+    "119" → (119, -1) ; "17.3" → (17, 30) ; "17.30" → (17, 30) ; "17.305" → (17, 30)
+    Inmutable: se comparte entre llamadas a través de la caché de Chapter.of().
+    """
+    __slots__ = ("major", "minor", "key")
+
+    def __init__(self, major: int, minor: int = -1):
+        object.__setattr__(self, "major", major)
+        object.__setattr__(self, "minor", minor)
+        object.__setattr__(self, "key", (major, minor))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Chapter es inmutable")
+
+    # Chapter.of(raw): parsea `raw` (str o número) con caché; ValueError si no es un número
+    # de capítulo. Se asigna tras la clase (_parse) para no añadir una llamada en los parsers.
+
+    @staticmethod
+    def valid(raw) -> "Chapter | None":
+        """Como of(), pero None si está vacío, no es un número o es un id (> MAX_CHAPTER)."""
+        if raw is None or raw == "":
+            return None
+        try:
+            ch = Chapter.of(raw)
+        except ValueError:
+            return None
+        return ch if ch.plausible else None
+
+    @staticmethod
+    def many(raws) -> list:
+        """Candidatos de una página, en orden, sin los que no son números."""
+        out = []
+        for raw in raws:
+            try:
+                out.append(Chapter.of(raw))
+            except ValueError:
+                pass
+        return out
+
+    @property
+    def plausible(self) -> bool:
+        return self.major <= MAX_CHAPTER
+
+    @property
+    def pretty(self) -> str:
+        return f"{self.major}.{str(self.minor).zfill(2)}" if self.minor >= 0 else str(self.major)
+
+    def __eq__(self, other):
+        if not isinstance(other, Chapter):
+            return NotImplemented
+        return self.key == other.key
+
+    # orden total por (capítulo, centésimas); sin total_ordering, que añade una llamada por comparación
+    def __lt__(self, other):
+        return self.key < other.key if isinstance(other, Chapter) else NotImplemented
+
+    def __le__(self, other):
+        return self.key <= other.key if isinstance(other, Chapter) else NotImplemented
+
+    def __gt__(self, other):
+        return self.key > other.key if isinstance(other, Chapter) else NotImplemented
+
+    def __ge__(self, other):
+        return self.key >= other.key if isinstance(other, Chapter) else NotImplemented
+
+    def __hash__(self):
+        return hash(self.key)
+
+    def __str__(self):
+        return self.pretty
+
+    def __repr__(self):
+        return f"Chapter({self.pretty!r})"
+
+
+@lru_cache(maxsize=8192)
+def _parse(raw) -> Chapter:
+    s = str(raw).strip()
+    if "." in s:
+        a, b = s.split(".", 1)
+        return Chapter(int(a), int(b.ljust(2, "0")[:2]))
+    return Chapter(int(s))
+
+
+Chapter.of = staticmethod(_parse)
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+# GET condicional (ETag / Last-Modified) y hash del fragmento de capítulos.
+# Los validadores viven en `serie["state"]` dentro de series.yaml. Los fetchers solo los
+# dejan en `meta["validators"]`: main.py los guarda si el parseo dio un capítulo sano.
+import hashlib
+import os
+from typing import Optional
+
+CONDITIONAL_FETCH = os.getenv("CONDITIONAL_FETCH", "true").lower() != "false"
+
+# código que decide qué capítulo sale de una página: si cambia, lo guardado con la versión
+# anterior (ETag, hash del fragmento) ya no garantiza que el resultado sería el mismo
+_PARSER_MODULES = ("parsers.py", "sites.py", "chapter.py", "extractors.py", "streaming.py")
+
+
+def _parser_version() -> str:
+    h = hashlib.sha1()
+    here = os.path.dirname(os.path.abspath(__file__))
+    for name in _PARSER_MODULES:
+        try:
+            with open(os.path.join(here, name), "rb") as fh:
+                h.update(fh.read())
+        except OSError:
+            pass
+    return h.hexdigest()[:8]
+
+
+PARSER_VERSION = _parser_version()
+
+
+class NotModified(Exception):
+    """El servidor respondió 304: la página no cambió desde el último run."""
+
+
+def conditional_headers(validators: Optional[dict]) -> dict:
+    if not CONDITIONAL_FETCH or not validators:
+        return {}
+    h = {}
+    if validators.get("etag"):
+        h["If-None-Match"] = validators["etag"]
+    if validators.get("last_modified"):
+        h["If-Modified-Since"] = validators["last_modified"]
+    return h
+
+
+def remember_validators(meta: Optional[dict], headers) -> None:
+    """Anota ETag / Last-Modified de la respuesta en `meta`; accept_validators los guarda."""
+    if meta is None or not CONDITIONAL_FETCH:
+        return
+    meta["validators"] = {key: headers.get(header) for key, header in
+                          (("etag", "ETag"), ("last_modified", "Last-Modified"))}
+
+
+def accept_validators(state: dict, meta: Optional[dict]) -> None:
+    """El parseo de la respuesta fue bueno: sus validadores pasan al estado de la serie."""
+    new = (meta or {}).get("validators")
+    if new is None:
+        return      # navegador, 304 o extractor: la respuesta no trajo validadores que guardar
+    for key, val in new.items():
+        if val:
+            state[key] = val
+        else:
+            state.pop(key, None)
+    state["parser"] = PARSER_VERSION
+
+
+def current_validators(state: dict) -> bool:
+    """Los validadores guardados son de esta versión del parser."""
+    return state.get("parser") == PARSER_VERSION
+
+
+def fragment_hash(fragment: str) -> str:
+    return hashlib.sha1((PARSER_VERSION + fragment).encode("utf-8", "replace")).hexdigest()[:16]
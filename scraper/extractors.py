@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+# Extractores dentro del navegador (page.evaluate): cada parser de parsers.py tiene aquí
+# su equivalente en JS, que devuelve solo los candidatos a número de capítulo.
+# Así no se serializa el DOM entero con page.content() ni se vuelve a parsear en Python.
+import os
+
+from .parsers import _pick_max, parse_animebbg, parse_generic_caplist, parse_m440, parse_zonatmo
+from .sites import pick_parser
+
+EXTRACT_MODE = os.getenv("EXTRACT_MODE", "html").lower()     # html | dom | both
+
+# Texto como get_text(sep, strip=True): nodos de texto recortados, sin script/style/template
+_JS_TEXT = r"""
+const NO_TEXT = new Set(["SCRIPT", "STYLE", "TEMPLATE"]);
+const text = (el, sep) => {
+  const out = [];
+  const walk = (node) => {
+    for (const c of node.childNodes) {
+      if (c.nodeType === 3) {
+        const t = c.nodeValue.trim();
+        if (t) out.push(t);
+      } else if (c.nodeType === 1 && !NO_TEXT.has(c.tagName)) {
+        walk(c);
+      }
+    }
+  };
+  walk(el);
+  return out.join(sep);
+};
+"""
+
+# Cada extractor es el cuerpo de una función sin argumentos que devuelve una lista de strings
+_JS_ANIMEBBG = _JS_TEXT + r"""
+const CAP = /Cap[ií]tulo\s*([0-9]+(?:\.[0-9]+)?)/i;
+const out = [];
+for (const a of document.querySelectorAll(
+    '.structItem--resourceAlbum .structItem-title a[href^="/comics/capitulo/"]')) {
+  const m = CAP.exec(text(a, ""));
+  if (m) out.push(m[1]);
+}
+if (!out.length) {
+  for (const t of document.querySelectorAll(".structItem--resourceAlbum .structItem-title")) {
+    const m = CAP.exec(text(t, " "));
+    if (m) out.push(m[1]);
+  }
+}
+return out;
+"""
+
+_JS_M440 = _JS_TEXT + r"""
+const out = [];
+for (const a of document.querySelectorAll("h5 a[data-number]")) {
+  const raw = (a.getAttribute("data-number") || "").trim();
+  if (/^\d+(?:\.\d+)?$/.test(raw)) out.push(raw);
+}
+if (!out.length) {
+  for (const h5 of document.querySelectorAll('li[class*="DTyuZxQygzByzNbtcmg-lis"] h5')) {
+    const m = /#\s*([0-9]+(?:\.[0-9]+)?)\b/.exec(text(h5, " "));
+    if (m) out.push(m[1]);
+  }
+}
+return out;
+"""
+
+
+def _js_links(pattern: str) -> str:
+    # mismo recorrido que parsers._scan_links (sin PARSE_EARLY_STOP)
+    return _JS_TEXT + r"""
+const RX = new RegExp(%r, "i");
+const out = [];
+for (const a of document.getElementsByTagName("a")) {
+  const raw = a.textContent;
+  if (!raw.includes("#") && !raw.toLowerCase().includes("cap")) continue;
+  const m = RX.exec(text(a, " "));
+  if (m) out.push(m[1]);
+}
+return out;
+""" % pattern
+
+
+EXTRACTORS = {
+    parse_animebbg: _JS_ANIMEBBG,
+    parse_m440: _JS_M440,
+    parse_zonatmo: _js_links(r"(?:Cap[ií]tulo|#)\s*([0-9]+(?:\.[0-9]+)?)"),
+    parse_generic_caplist: _js_links(r"(?:Cap[ií]tulo|Capitulo|#)\s*([0-9]+(?:\.[0-9]+)?)"),
+}
+
+
+def extractor_js(url: str) -> str:
+    return "() => {" + EXTRACTORS[pick_parser(url)] + "}"
+
+
+class Extracted:
+    """
+    Resultado de un fetch con EXTRACT_MODE=dom|both: los candidatos sacados en la página
+    y, solo en 'both', también el HTML para poder comparar con el parser de Python.
+    feeds.py lo usa igual para las series resueltas desde la página de novedades.
+    """
+    __slots__ = ("url", "nums", "html", "source")
+
+    def __init__(self, url: str, nums: list, html: str | None = None, source: str = "dom"):
+        self.url = url
+        self.nums = [str(n) for n in nums or []]
+        self.html = html
+        self.source = source      # "dom" (extractor en la página) | "feed" | "wp-ajax" | "wp-rss" | "stream"
+
+    def __bool__(self):
+        return bool(self.nums) or bool(self.html)
+
+    def chapter(self) -> str | None:
+        return _pick_max(self.nums)
+
+
+def extract(page, url: str) -> "Extracted | str":
+    """Tras cargar la página: HTML (modo html) o Extracted (modos dom / both)."""
+    if EXTRACT_MODE == "html":
+        return page.content()
+    nums = page.evaluate(extractor_js(url))
+    return Extracted(url, nums, page.content() if EXTRACT_MODE == "both" else None)
+
+
+async def extract_async(page, url: str) -> "Extracted | str":
+    if EXTRACT_MODE == "html":
+        return await page.content()
+    nums = await page.evaluate(extractor_js(url))
+    return Extracted(url, nums, await page.content() if EXTRACT_MODE == "both" else None)
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+# Atajo por página de "últimas actualizaciones": en sitios con muchas series seguidas,
+# una o dos páginas del listado de novedades sustituyen a decenas de fetch por serie.
+import os
+import re
+from urllib.parse import urljoin, urlsplit
+
+from .parsers import _GENERIC_RE, _doc, _pick_max, _text
+from .sites import FEEDS, site_key
+from .chapter import Chapter
+
+FEED_FASTPATH = os.getenv("FEED_FASTPATH", "false").lower() == "true"
+FEED_MAX_PAGES = int(os.getenv("FEED_MAX_PAGES", "3"))
+
+# .../capitulo-12/ o .../capitulo-12-5/ (12.5) cuando el texto del enlace no trae el número
+_HREF_CAP_RE = re.compile(r'cap[ií]tulo-(\d+)(?:[-.](\d+))?/?$', re.I)
+
+
+def norm_url(url: str) -> str:
+    """Clave de comparación: sin esquema, sin www., sin barra final, en minúsculas."""
+    p = urlsplit(url)
+    host = p.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    return host + p.path.rstrip("/").lower()
+
+
+def parse_feed(feed_url: str, html: str, tracked: dict) -> dict:
+    """
+    Enlaces a capítulos de series seguidas: {clave de serie: [números]}.
+    Un enlace es de la serie si su URL cuelga de la URL de la serie
+    (https://sitio/manga/slug/capitulo-12/ → https://sitio/manga/slug/).
+    """
+    doc = _doc(html)
+    out = {}
+    if doc is None:
+        return out
+    for a in doc.iter("a"):
+        href = a.get("href")
+        if not href:
+            continue
+        key = norm_url(urljoin(feed_url, href))
+        parent = key
+        for _ in range(2):      # capítulo directo o un nivel más (…/slug/capitulo-12/pagina-1)
+            parent = parent.rsplit("/", 1)[0]
+            if parent in tracked:
+                break
+        else:
+            continue
+        m = _GENERIC_RE.search(_text(a, " "))
+        if m:
+            out.setdefault(parent, []).append(m.group(1))
+            continue
+        m = _HREF_CAP_RE.search(key)
+        if m:
+            out.setdefault(parent, []).append(m.group(1) + (f".{m.group(2)}" if m.group(2) else ""))
+    return out
+
+
+def _is_newer(s: dict, nums: list) -> bool:
+    new = _pick_max(nums)
+    prev = Chapter.valid(s.get("last_chapter"))
+    return new is not None and (prev is None or Chapter.of(new) > prev)
+
+
+def feed_pass(series: list, fetch) -> tuple:
+    """
+    Recorre el feed de cada sitio con FEEDS, página a página, hasta dar con una serie
+    seguida que no ha cambiado: el listado va por fecha de actualización, así que lo que
+    queda detrás es anterior al último run.
+    Devuelve (resueltas, sin_cambios, pendientes):
+      - resueltas: [(serie, números del feed)]
+      - sin_cambios: series del sitio que no salen en un feed recorrido hasta el último run
+      - pendientes: el resto, que necesitan su fetch de siempre
+    `fetch(url) -> html` es el fetch normal (con sus backends, breaker, etc.).
+    """
+    by_host = {}
+    for s in series:
+        url = s.get("url")
+        if url and site_key(url) in FEEDS:
+            by_host.setdefault(site_key(url), []).append(s)
+    done = set()
+
+    resolved, unchanged = [], []
+    for host, group in by_host.items():
+        tracked = {norm_url(s["url"]): s for s in group}
+        found = {}
+        complete = False
+        for page in range(1, max(1, FEED_MAX_PAGES) + 1):
+            feed_url = FEEDS[host].format(page=page)
+            try:
+                html = fetch(feed_url)
+            except Exception as e:
+                print(f"   [feed] {host}: error en la página {page} ({e}); fetch por serie")
+                break
+            entries = parse_feed(feed_url, html, tracked)
+            for key, nums in entries.items():
+                found.setdefault(key, []).extend(nums)
+            if any(not _is_newer(tracked[k], nums) for k, nums in entries.items()):
+                complete = True
+                break
+        print(f"   [feed] {host}: {len(found)} de {len(group)} series en {page} página(s)"
+              + ("" if complete else " (sin llegar al último run)"))
+
+        for key, s in tracked.items():
+            st = s.get("state") or {}
+            if key in found:
+                resolved.append((s, found[key]))
+            elif complete and Chapter.valid(s.get("last_chapter")) and not st.get("deferred"):
+                unchanged.append(s)
+            else:
+                continue
+            done.add(id(s))
+    # las pendientes mantienen el orden de entrada (prioridad del plazo, si lo hay)
+    return resolved, unchanged, [s for s in series if id(s) not in done]
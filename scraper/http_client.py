@@ -1,6 +1,11 @@
 import os
 import time
-import httpx
+
+from .backend_stats import Blocked, check_blocked, fetch_auto
+from .conditional import NotModified, conditional_headers, remember_validators
+from .proxy_pool import lease, playwright_proxy
+from .resilience import get_budget
+from .session import get_client
 
 BACKEND = os.getenv("FETCH_BACKEND", "auto").lower()
 USE_PROXY = os.getenv("HTTPS_PROXY") or os.getenv("HTTP_PROXY")
@@ -18,90 +23,84 @@ HEADERS = {
     "Connection": "keep-alive",
 }
 
-def _fetch_with_httpx(url: str) -> str:
+def _fetch_with_httpx(url: str, validators: dict | None = None, stream: bool = False, meta: dict | None = None):
     print(f"   [fetch] httpx → {url}")
-    proxies = USE_PROXY or None
     last_err = None
     delay = 0.5
     for i in range(RETRIES + 1):
+        t0 = time.perf_counter()
         try:
-            with httpx.Client(proxies=proxies, headers=HEADERS, timeout=TIMEOUT, follow_redirects=True) as cli:
-                r = cli.get(url)
-                if r.status_code == 403:
-                    raise RuntimeError(f"HTTP 403 for {url}")
+            # proxy por intento (PROXY_POOL): un reintento puede salir por otro
+            with lease(url) as proxy:
+                # cliente compartido: reintentos y series del mismo host reutilizan la conexión
+                cli = get_client(proxy)
+                if stream:
+                    from .streaming import stream_httpx
+                    return stream_httpx(cli, url, validators, meta)
+                r = cli.get(url, headers=conditional_headers(validators))
+                if r.status_code == 304:
+                    raise NotModified(url)
+                check_blocked(url, r.status_code, r.text)
                 r.raise_for_status()
+                remember_validators(meta, r.headers)
                 return r.text
+        except (NotModified, Blocked):
+            raise   # reintentar un 403 solo gasta round trips
         except Exception as e:
             last_err = e
-            if i < RETRIES:
-                time.sleep(delay)
+            if i:
+                get_budget().spend(time.perf_counter() - t0)
+            # el presupuesto de reintentos es del run entero: un host caído no se lo come todo
+            if i < RETRIES and get_budget().sleep(delay):
                 delay *= BACKOFF
             else:
                 raise last_err
 
 def _fetch_with_playwright(url: str) -> str:
     print(f"   [fetch] playwright → {url}")
-    from playwright.sync_api import sync_playwright
-    # Proxy para playwright
-    proxy = None
-    if USE_PROXY:
-        proxy = {"server": USE_PROXY}
+    from .browser_pool import get_pool, render
+
+    with lease(url) as pooled:
+        # Proxy para playwright: el del pool si hay PROXY_POOL; si no, HTTPS_PROXY / HTTP_PROXY
+        proxy = None
+        if pooled is not None:
+            proxy = playwright_proxy(pooled)
+        elif USE_PROXY:
+            proxy = {"server": USE_PROXY}
 
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        context = browser.new_context(
+        with get_pool().page(
             user_agent=UA,
             proxy=proxy,
             locale="es-ES",
             viewport={"width": 1280, "height": 1024},
-        )
-        page = context.new_page()
-        page.set_default_timeout(int(TIMEOUT * 1000))
-
-        page.goto(url, wait_until="domcontentloaded")
-
-        # Esperas específicas por dominio
-        u = url.lower()
-        try:
-            if "mangasnosekai.com" in u:
-                page.wait_for_selector(".container-capitulos, #section-list-cap, #section-sinopsis", timeout=5000)
-            elif "zonatmo.com" in u:
-                page.wait_for_selector("#chapters, .chapter-list, .list-group", timeout=5000)
-            elif "m440.in" in u:
-                page.wait_for_selector(".chapter-list, .wp-manga-chapter, .listing-chapters_wrap", timeout=5000)
-            elif "animebbg.net" in u:
-                page.wait_for_selector(".chapters, .entry-content, .list-group", timeout=5000)
-            elif "manga-oni.com" in u:
-                page.wait_for_selector("#c_list, .entry-title-h2", timeout=5000)
-            elif "leercapitulo.co" in u:
-                page.wait_for_selector(".chapter-list, .xanh", timeout=5000)
-        except Exception:
-            pass  # si no aparece, seguimos con el HTML cargado
-
-        html = page.content()
-        context.close()
-        browser.close()
-        return html
+        ) as page:
+            page.set_default_timeout(int(TIMEOUT * 1000))
+            return render(page, url, int(TIMEOUT * 1000))
 
-def fetch_html(url: str) -> str:
+def fetch_html(url: str, validators: dict | None = None, meta: dict | None = None, stream: bool = False):
     """
     Estrategia:
       - 'playwright': siempre Playwright
       - 'httpx': siempre httpx
-      - 'auto' (default):
-           httpx → si 403/anti-bot → fallback a Playwright
+      - 'auto' (default): por dominio, el backend más barato que ha funcionado
+           (backend_stats): httpx mientras su HTML traiga el listado; si lo
+           bloquean o no lo trae → Playwright, re-probando httpx de vez en cuando
+    `validators` activa el GET condicional en httpx (NotModified si 304).
+    `meta`, si se pasa, recibe el backend que sirvió la página.
+    `stream=True`: httpx lee y parsea por trozos y devuelve los capítulos (Extracted).
     """
+    meta = meta if meta is not None else {}
     if BACKEND == "playwright":
+        meta["backend"] = "playwright"
         return _fetch_with_playwright(url)
     if BACKEND == "httpx":
-        return _fetch_with_httpx(url)
+        meta["backend"] = "httpx"
+        return _fetch_with_httpx(url, validators, stream, meta)
 
     # auto
-    try:
-        return _fetch_with_httpx(url)
-    except Exception as e:
-        msg = str(e)
-        if "HTTP 403" in msg or "captcha" in msg.lower():
-            print(f"   [fallback] playwright → {url}")
-            return _fetch_with_playwright(url)
-        raise
+    return fetch_auto(
+        url, "httpx",
+        lambda: _fetch_with_httpx(url, validators, stream, meta),
+        lambda: _fetch_with_playwright(url),
+        meta,
+    )
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+# Tiempos por etapa (fetch / parse / sanity / notify / save) y export JSONL + textfile de Prometheus.
+import json
+import math
+import os
+import time
+from contextlib import contextmanager
+
+METRICS_FILE = os.getenv("METRICS_FILE", "")      # JSON-lines, una línea por span + una de resumen
+METRICS_PROM = os.getenv("METRICS_PROM", "")      # textfile para node_exporter
+
+
+def percentile(values: list, q: float):
+    """Percentil por rango más cercano (q en 0..100)."""
+    if not values:
+        return None
+    vals = sorted(values)
+    k = max(0, min(len(vals) - 1, math.ceil(q / 100 * len(vals)) - 1))
+    return vals[k]
+
+
+def peak_rss_mb():
+    """
+    Pico de memoria residente de este proceso (VmHWM), o None fuera de Linux.
+    No vale getrusage(): su ru_maxrss arrastra el RSS del padre en el fork.
+    """
+    try:
+        with open("/proc/self/status", "r") as fh:
+            for line in fh:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+
+class RunMetrics:
+    def __init__(self):
+        self.records = []
+        self.started = time.time()
+        self._t0 = time.perf_counter()
+
+    @contextmanager
+    def span(self, stage: str, series: str | None = None, host: str | None = None, **attrs):
+        """
+        Mide un bloque. El dict que se entrega se puede completar dentro del bloque
+        (backend, bytes, ok=False, error...). Una excepción marca ok=False y se propaga.
+        """
+        rec = {"stage": stage, "series": series, "host": host, **attrs}
+        t0 = time.perf_counter()
+        try:
+            yield rec
+        except BaseException as e:
+            rec["ok"] = False
+            rec["error"] = str(e)[:200]
+            raise
+        finally:
+            rec["duration"] = round(time.perf_counter() - t0, 4)
+            rec.setdefault("ok", True)
+            rec["ts"] = round(time.time(), 3)
+            self.records.append(rec)
+
+    def add(self, stage: str, duration: float, series: str | None = None, host: str | None = None, **attrs):
+        """Span medido fuera (p.ej. fetch del pipeline async)."""
+        rec = {"stage": stage, "series": series, "host": host, **attrs}
+        rec["duration"] = round(duration, 4)
+        rec.setdefault("ok", True)
+        rec["ts"] = round(time.time(), 3)
+        self.records.append(rec)
+
+    # ----- agregados -----
+    def stage_totals(self) -> dict:
+        out = {}
+        for r in self.records:
+            t = out.setdefault(r["stage"], {"count": 0, "seconds": 0.0, "errors": 0})
+            t["count"] += 1
+            t["seconds"] += r["duration"]
+            t["errors"] += 0 if r["ok"] else 1
+        for t in out.values():
+            t["seconds"] = round(t["seconds"], 3)
+        return out
+
+    def host_stats(self) -> dict:
+        lat = {}
+        out = {}
+        for r in self.records:
+            if r["stage"] != "fetch" or not r.get("host"):
+                continue
+            h = out.setdefault(r["host"], {"fetches": 0, "errors": 0, "bytes": 0})
+            h["fetches"] += 1
+            h["errors"] += 0 if r["ok"] else 1
+            h["bytes"] += r.get("bytes") or 0
+            lat.setdefault(r["host"], []).append(r["duration"])
+        for host, h in out.items():
+            for q in (50, 90, 99):
+                h[f"p{q}"] = percentile(lat[host], q)
+        return out
+
+    def summary(self) -> dict:
+        return {
+            "type": "run",
+            "started": round(self.started, 3),
+            "wall_seconds": round(time.perf_counter() - self._t0, 3),
+            "peak_rss_mb": peak_rss_mb(),
+            "stages": self.stage_totals(),
+            "hosts": self.host_stats(),
+        }
+
+    # ----- export -----
+    def write_jsonl(self, path: str):
+        with open(path, "a", encoding="utf-8") as fh:
+            for r in self.records:
+                fh.write(json.dumps(r, ensure_ascii=False) + "\n")
+            fh.write(json.dumps(self.summary(), ensure_ascii=False) + "\n")
+
+    def write_prometheus(self, path: str, counts: dict | None = None):
+        s = self.summary()
+        lines = [
+            "# HELP manga_run_duration_seconds Duración total del último run.",
+            "# TYPE manga_run_duration_seconds gauge",
+            f"manga_run_duration_seconds {s['wall_seconds']}",
+            "# HELP manga_stage_seconds Tiempo acumulado por etapa en el último run.",
+            "# TYPE manga_stage_seconds gauge",
+        ]
+        lines += [f'manga_stage_seconds{{stage="{k}"}} {v["seconds"]}' for k, v in s["stages"].items()]
+        if s["peak_rss_mb"] is not None:
+            lines += ["# TYPE manga_peak_rss_megabytes gauge", f"manga_peak_rss_megabytes {s['peak_rss_mb']}"]
+        lines += ["# TYPE manga_stage_errors gauge"]
+        lines += [f'manga_stage_errors{{stage="{k}"}} {v["errors"]}' for k, v in s["stages"].items()]
+        lines += ["# TYPE manga_fetch_latency_seconds gauge"]
+        for host, h in s["hosts"].items():
+            for q in (50, 90, 99):
+                lines.append(f'manga_fetch_latency_seconds{{host="{host}",quantile="0.{q}"}} {h[f"p{q}"]}')
+        lines += ["# TYPE manga_fetch_errors gauge"]
+        lines += [f'manga_fetch_errors{{host="{host}"}} {h["errors"]}' for host, h in s["hosts"].items()]
+        lines += ["# TYPE manga_fetch_bytes gauge"]
+        lines += [f'manga_fetch_bytes{{host="{host}"}} {h["bytes"]}' for host, h in s["hosts"].items()]
+        if counts:
+            lines += ["# TYPE manga_series gauge"]
+            lines += [f'manga_series{{result="{k}"}} {v}' for k, v in counts.items()]
+        # escritura atómica: node_exporter nunca ve un fichero a medias
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            fh.write("\n".join(lines) + "\n")
+        os.replace(tmp, path)
+
+    def export(self, counts: dict | None = None):
+        if METRICS_FILE:
+            self.write_jsonl(METRICS_FILE)
+        if METRICS_PROM:
+            self.write_prometheus(METRICS_PROM, counts)
@@ -1,10 +1,14 @@
 # -*- coding: utf-8 -*-
 import json
 import os
-import requests
+import queue
+import threading
+import time
 from typing import Optional, Tuple
 
-from .utils import comparable_tuple, cap_to_pretty
+from .session import get_session
+from .chapter import Chapter
+from .utils import cap_to_pretty
 
 DISCORD_WEBHOOK = os.environ.get("DISCORD_WEBHOOK", "").strip()
 
@@ -13,12 +17,21 @@ NOTIFY_ON_ERROR = os.environ.get("NOTIFY_ON_ERROR", "false").lower() == "true"
 NOTIFY_ON_INIT = os.environ.get("NOTIFY_ON_INIT", "false").lower() == "true"    # primera vez que guardamos cap
 NOTIFY_ON_FORMAT_CHANGE = os.environ.get("NOTIFY_ON_FORMAT_CHANGE", "false").lower() == "true"
 FORCE_NOTIFY_TEST = os.environ.get("FORCE_NOTIFY_TEST", "false").lower() == "true"
+NOTIFY_BATCH = os.environ.get("NOTIFY_BATCH", "true").lower() != "false"   # cola en segundo plano + embeds agrupados
+NOTIFY_FLUSH_S = float(os.environ.get("NOTIFY_FLUSH_S", "2"))                # espera para juntar eventos en un mensaje
+
+# Límites de Discord por mensaje de webhook
+MAX_EMBEDS = 10
+MAX_EMBED_TOTAL = 6000
+MAX_TITLE = 256
+MAX_DESCRIPTION = 4096
+MAX_ATTEMPTS = 5
 
 def _send_discord(content: str):
     if not DISCORD_WEBHOOK:
         return False, "DISCORD_WEBHOOK vacío"
     try:
-        r = requests.post(
+        r = get_session().post(
             DISCORD_WEBHOOK,
             json={"content": content},
             timeout=20,
@@ -29,23 +42,165 @@ def _send_discord(content: str):
     except Exception as e:
         return False, str(e)
 
+def batch_embeds(embeds: list) -> list:
+    """
+    Agrupa embeds en mensajes que respetan los límites de Discord:
+    máx. 10 embeds y 6000 caracteres entre todos por mensaje.
+    """
+    batches = []
+    cur, size = [], 0
+    for e in embeds:
+        e = dict(e)
+        e["title"] = (e.get("title") or "")[:MAX_TITLE]
+        e["description"] = (e.get("description") or "")[:MAX_DESCRIPTION]
+        n = len(e["title"]) + len(e["description"])
+        if cur and (len(cur) >= MAX_EMBEDS or size + n > MAX_EMBED_TOTAL):
+            batches.append(cur)
+            cur, size = [], 0
+        cur.append(e)
+        size += n
+    if cur:
+        batches.append(cur)
+    return batches
+
+
+def _retry_after(r) -> float:
+    """Segundos a esperar tras un 429 (cuerpo JSON de Discord o cabecera Retry-After)."""
+    try:
+        return float(r.json().get("retry_after"))
+    except Exception:
+        pass
+    try:
+        return float(r.headers.get("Retry-After", "1"))
+    except ValueError:
+        return 1.0
+
+
+_STOP = object()
+
+
+class NotifyQueue:
+    """
+    Cola de notificaciones que se vacía en un hilo aparte: el bucle de fetch solo encola.
+    Junta los eventos que llegan en NOTIFY_FLUSH_S segundos en mensajes con varios embeds,
+    reutiliza la sesión HTTP y respeta 429 / Retry-After y las cabeceras de bucket.
+    """
+
+    def __init__(self, webhook: str, flush_s: float = NOTIFY_FLUSH_S, session=None):
+        self.webhook = webhook
+        self.flush_s = flush_s
+        self.session = session or get_session()
+        self.q = queue.Queue()
+        self.sent = 0
+        self.failed = 0
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def put(self, embed: dict):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="discord-notify", daemon=True)
+                self._thread.start()
+        self.q.put(embed)
+
+    def _run(self):
+        stop = False
+        while not stop:
+            item = self.q.get()
+            if item is _STOP:
+                break
+            pending = [item]
+            deadline = time.monotonic() + self.flush_s
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    nxt = self.q.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if nxt is _STOP:
+                    stop = True
+                    break
+                pending.append(nxt)
+            for batch in batch_embeds(pending):
+                if self._post({"embeds": batch}):
+                    self.sent += len(batch)
+                else:
+                    self.failed += len(batch)
+
+    def _post(self, payload: dict) -> bool:
+        delay = 1.0
+        for _ in range(MAX_ATTEMPTS):
+            try:
+                r = self.session.post(self.webhook, json=payload, timeout=20)
+            except Exception as e:
+                print(f"   [notify] error enviando a Discord: {e}")
+                time.sleep(delay)
+                delay *= 2
+                continue
+            if r.status_code == 429:
+                time.sleep(_retry_after(r))
+                continue
+            if r.status_code in (200, 204):
+                # bucket agotado: esperar a que se recargue antes del siguiente mensaje
+                if r.headers.get("X-RateLimit-Remaining") == "0":
+                    try:
+                        time.sleep(float(r.headers.get("X-RateLimit-Reset-After", "0")))
+                    except ValueError:
+                        pass
+                return True
+            if r.status_code >= 500:
+                time.sleep(delay)
+                delay *= 2
+                continue
+            print(f"   [notify] Discord rechazó el mensaje: resp {r.status_code}: {r.text[:200]}")
+            return False
+        return False
+
+    def close(self, timeout: float = 60):
+        """Envía lo pendiente y espera al hilo (como mucho `timeout` segundos)."""
+        if self._thread is None:
+            return
+        self.q.put(_STOP)
+        self._thread.join(timeout)
+        self._thread = None
+
+
+_queue = None
+
+
+def get_queue() -> NotifyQueue:
+    global _queue
+    if _queue is None:
+        _queue = NotifyQueue(DISCORD_WEBHOOK)
+    return _queue
+
+
+def flush_notifications(timeout: float = 60) -> Tuple[int, int]:
+    """Vacía la cola al final del run; devuelve (enviadas, fallidas)."""
+    global _queue
+    if _queue is None:
+        return (0, 0)
+    q, _queue = _queue, None
+    q.close(timeout)
+    return (q.sent, q.failed)
+
 def _is_real_increase(prev: Optional[str], new: Optional[str]) -> bool:
     """
     True solo si new > prev numéricamente (no es mera normalización de formato).
     """
     if not prev or not new:
         return False
-    p = comparable_tuple(prev)
-    n = comparable_tuple(new)
-    return n > p
+    return Chapter.of(new) > Chapter.of(prev)
 
 def _is_pure_format_change(prev: Optional[str], new: Optional[str]) -> bool:
     """
-    True si comparable_tuple es igual (mismo valor) pero la representación cambió.
+    True si el capítulo es el mismo (mismo valor) pero la representación cambió.
     """
     if not prev or not new:
         return False
-    return comparable_tuple(prev) == comparable_tuple(new) and str(prev) != str(new)
+    return Chapter.of(prev) == Chapter.of(new) and str(prev) != str(new)
 
 def notify_event(
     event: str,  # 'init' | 'update' | 'keep' | 'ok' | 'error' | 'info'
@@ -108,5 +263,9 @@ def notify_event(
     if extra_msg and event != "error":
         body += f"\nNota: {extra_msg}"
 
+    if NOTIFY_BATCH and DISCORD_WEBHOOK:
+        get_queue().put({"title": f"{emoji} {title}", "description": body})
+        return
+
     content = f"{emoji} **{title}**\n{body}"
     _send_discord(content)
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+# Etapa de parseo en procesos aparte (PARSE_WORKERS > 0). El parseo es CPU puro: en línea
+# para los fetch mientras dura y el run usa un solo núcleo. Aquí el HTML descargado pasa a
+# un pool de procesos y un único escritor (el hilo principal) aplica los resultados en el
+# orden de series.yaml, así que estado, avisos y resumen salen igual que en serie.
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from .conditional import fragment_hash
+from .sites import chapter_fragment, pick_parser
+
+PARSE_WORKERS = int(os.getenv("PARSE_WORKERS", "0"))     # 0 = parsear en línea, como siempre
+# páginas pendientes de escribir como mucho; con más, el fetch espera (contrapresión)
+PARSE_QUEUE = int(os.getenv("PARSE_QUEUE", "0")) or 2 * max(1, PARSE_WORKERS)
+
+
+def _parse(url: str, html: str) -> tuple:
+    """En el worker: el mismo parser que en línea. Devuelve (candidato, segundos)."""
+    t0 = time.perf_counter()
+    value = pick_parser(url)(url, html)
+    return value, time.perf_counter() - t0
+
+
+class ParseJob:
+    """Parseo de una página: hash de su fragmento y, si hace falta parsear, el futuro del pool."""
+    __slots__ = ("fragment", "future")
+
+    def __init__(self, fragment: str, future=None):
+        self.fragment = fragment
+        self.future = future
+
+    def done(self) -> bool:
+        return self.future is None or self.future.done()
+
+    def result(self) -> tuple:
+        """(candidato, segundos en el worker); relanza la excepción del parser."""
+        return self.future.result()
+
+
+class ParsePool:
+    def __init__(self, workers: int = PARSE_WORKERS, queue: int = PARSE_QUEUE):
+        # spawn: el run ya tiene hilos (avisos, clientes HTTP) y fork con hilos no es seguro
+        self.executor = ProcessPoolExecutor(max_workers=max(1, workers),
+                                            mp_context=multiprocessing.get_context("spawn"))
+        self.queue = max(1, queue)
+        self.pending = deque()
+
+    def job(self, url: str, html: str, known_fragment: str | None = None) -> ParseJob:
+        """
+        El fragmento se calcula aquí (regex, barato): si coincide con el guardado o no hay
+        parser, no se manda nada al pool y process_series decide igual que en línea.
+        """
+        frag = fragment_hash(chapter_fragment(url, html))
+        if frag == known_fragment or pick_parser(url) is None:
+            return ParseJob(frag)
+        return ParseJob(frag, self.executor.submit(_parse, url, html))
+
+    def put(self, item: tuple, write):
+        """
+        Encola `item` (argumentos de `write`, con el ParseJob o None al final) y escribe,
+        en orden de llegada, todo lo que ya está listo. Con más de `queue` pendientes
+        espera a la más antigua.
+        """
+        self.pending.append(item)
+        while self.pending and (len(self.pending) > self.queue or _ready(self.pending[0])):
+            write(*self.pending.popleft())
+
+    def flush(self, write):
+        while self.pending:
+            write(*self.pending.popleft())
+
+    def close(self):
+        self.executor.shutdown(cancel_futures=True)
+
+
+def _ready(item: tuple) -> bool:
+    job = item[-1]
+    return job is None or job.done()
@@ -1,37 +1,121 @@
 # -*- coding: utf-8 -*-
+import os
 import re
-from bs4 import BeautifulSoup
+from lxml import etree, html as lxml_html
 
-def _bs(html: str) -> BeautifulSoup:
-    return BeautifulSoup(html, "html.parser")
+from .chapter import MAX_CHAPTER, Chapter
 
-def _norm_tuple(s: str):
-    # "119" -> (119, -1) ; "17.3" -> (17, 30) ; "17.30" -> (17, 30)
-    s = str(s).strip()
-    if "." in s:
-        a, b = s.split(".", 1)
-        return (int(a), int(b.ljust(2, "0")[:2]))
-    return (int(s), -1)
+_chapter = Chapter.of
 
-def _pick_max(nums: list[str]) -> str | None:
-    if not nums:
+# 0 = recorrer todos los enlaces; N = cortar tras N enlaces seguidos sin capítulo ya visto el listado
+PARSE_EARLY_STOP = int(os.getenv("PARSE_EARLY_STOP", "0"))
+
+# lxml (C) en lugar de BeautifulSoup/html.parser: el árbol se construye mucho más rápido
+# y con menos memoria, y las consultas XPath precompiladas solo tocan los nodos del listado.
+_PARSER = lxml_html.HTMLParser(encoding="utf-8")
+
+def _doc(html: str):
+    if not html or not html.strip():
         return None
-    parsed = []
-    for s in nums:
-        try:
-            t = _norm_tuple(s)
-            parsed.append((t, s))
-        except Exception:
-            pass
-    if not parsed:
+    try:
+        return lxml_html.document_fromstring(html.encode("utf-8", "replace"), parser=_PARSER)
+    except (etree.ParserError, ValueError):
         return None
-    # descarta números absurdos (> 2000) si hay opciones razonables
-    plaus = [p for p in parsed if p[0][0] <= 2000] or parsed
-    best = max(plaus, key=lambda x: x[0])[1]
-    if "." in best:
-        a, b = best.split(".", 1)
-        return f"{int(a)}.{b.ljust(2,'0')[:2]}"
-    return str(int(best))
+
+# BeautifulSoup.get_text() no incluye <script>/<style>/<template> ni comentarios
+_NO_TEXT = frozenset(("script", "style", "template"))
+
+def _strings(el):
+    if el.text and el.tag not in _NO_TEXT:
+        yield el.text
+    for child in el:
+        if isinstance(child.tag, str):
+            yield from _strings(child)
+        if child.tail:
+            yield child.tail
+
+def _text(el, sep: str = "") -> str:
+    """Equivalente a get_text(sep, strip=True) de BeautifulSoup."""
+    return sep.join(t for t in (x.strip() for x in _strings(el)) if t)
+
+def _has_class(name: str) -> str:
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+# -------- regex y XPath precompilados --------
+_CAP_RE = re.compile(r'Cap[ií]tulo\s*([0-9]+(?:\.[0-9]+)?)', re.I)
+_CAP_OR_HASH_RE = re.compile(r'(?:Cap[ií]tulo|#)\s*([0-9]+(?:\.[0-9]+)?)', re.I)
+_GENERIC_RE = re.compile(r'(?:Cap[ií]tulo|Capitulo|#)\s*([0-9]+(?:\.[0-9]+)?)', re.I)
+_HASH_RE = re.compile(r'#\s*([0-9]+(?:\.[0-9]+)?)\b')
+_NUMBER_RE = re.compile(r'\d+(?:\.\d+)?')
+
+# ancestor:: en vez de encadenar //*//*//a: libxml2 deduplica cada paso de descendientes y se vuelve cuadrático
+_X_BBG_TITLES = etree.XPath(
+    f"//*[{_has_class('structItem-title')}][ancestor::*[{_has_class('structItem--resourceAlbum')}]]"
+)
+_X_BBG_LINKS = etree.XPath(
+    "//a[starts-with(@href, '/comics/capitulo/')]"
+    f"[ancestor::*[{_has_class('structItem-title')}][ancestor::*[{_has_class('structItem--resourceAlbum')}]]]"
+)
+_X_M440_LINKS = etree.XPath("//h5//a[@data-number]")
+_X_M440_H5 = etree.XPath("//li[contains(@class, 'DTyuZxQygzByzNbtcmg-lis')]//h5")
+
+class _MaxPicker:
+    """
+    _pick_max incremental: se alimenta candidato a candidato sin guardar la lista.
+    Mismo criterio: el mayor entre los plausibles (<= MAX_CHAPTER) o, si no hay, el mayor
+    absoluto; en empate gana el primero visto.
+    """
+    __slots__ = ("best", "best_plaus")
+
+    def __init__(self):
+        self.best = None
+        self.best_plaus = None
+
+    def feed(self, s: str):
+        try:
+            ch = _chapter(s)
+        except ValueError:
+            return
+        # claves (tuplas) en lugar de Chapter.__gt__: esto corre por cada enlace
+        key = ch.key
+        if self.best is None or key > self.best.key:
+            self.best = ch
+        if ch.major <= MAX_CHAPTER and (self.best_plaus is None or key > self.best_plaus.key):
+            self.best_plaus = ch
+
+    @property
+    def seen(self) -> bool:
+        return self.best is not None
+
+    def result(self) -> str | None:
+        pick = self.best_plaus or self.best
+        return pick.pretty if pick is not None else None
+
+def _pick_max(nums: list[str]) -> str | None:
+    chapters = Chapter.many(nums)
+    pick = max((ch for ch in chapters if ch.plausible), default=None) or max(chapters, default=None)
+    return pick.pretty if pick is not None else None
+
+def _scan_links(doc, rx, picker: _MaxPicker):
+    """
+    Una sola pasada por los <a> del documento (cada elemento se visita una vez).
+    Filtro barato con el texto crudo antes de calcular el texto normalizado y la regex:
+    un enlace sin '#' ni 'cap' no puede casar con los patrones de capítulo.
+    Con PARSE_EARLY_STOP=N se corta tras N enlaces seguidos sin capítulo una vez visto el listado.
+    """
+    misses = 0
+    for a in doc.iter("a"):
+        raw = "".join(a.itertext())
+        m = None
+        if "#" in raw or "cap" in raw.lower():
+            m = rx.search(_text(a, " "))
+        if m:
+            picker.feed(m.group(1))
+            misses = 0
+        elif PARSE_EARLY_STOP and picker.seen:
+            misses += 1
+            if misses >= PARSE_EARLY_STOP:
+                break
 
 # -------- ANIMEBBG.NET --------
 def parse_animebbg(url: str, html: str) -> str | None:
@@ -40,24 +124,25 @@ def parse_animebbg(url: str, html: str) -> str | None:
       .structItem--resourceAlbum  .structItem-title  a[href^="/comics/capitulo/"]
     Ignora contadores 'Capítulos (N)' y números ajenos.
     """
-    soup = _bs(html)
-    nums = []
+    doc = _doc(html)
+    return None if doc is None else _animebbg_doc(doc)
+
+def _animebbg_doc(doc) -> str | None:
+    picker = _MaxPicker()
 
-    for a in soup.select('.structItem--resourceAlbum .structItem-title a[href^="/comics/capitulo/"]'):
-        t = a.get_text(strip=True)
-        m = re.search(r'Cap[ií]tulo\s*([0-9]+(?:\.[0-9]+)?)', t, re.I)
+    for a in _X_BBG_LINKS(doc):
+        m = _CAP_RE.search(_text(a))
         if m:
-            nums.append(m.group(1))
+            picker.feed(m.group(1))
 
-    if not nums:
+    if not picker.seen:
         # fallback: usa el texto completo del título del item
-        for title in soup.select('.structItem--resourceAlbum .structItem-title'):
-            t = title.get_text(" ", strip=True)
-            m = re.search(r'Cap[ií]tulo\s*([0-9]+(?:\.[0-9]+)?)', t, re.I)
+        for title in _X_BBG_TITLES(doc):
+            m = _CAP_RE.search(_text(title, " "))
             if m:
-                nums.append(m.group(1))
+                picker.feed(m.group(1))
 
-    return _pick_max(nums)
+    return picker.result()
 
 # -------- M440.IN --------
 def parse_m440(url: str, html: str) -> str | None:
@@ -65,51 +150,48 @@ def parse_m440(url: str, html: str) -> str | None:
     Fuente de verdad: <a ... data-number="N"> dentro de cada <h5>.
     Fallback: '#N' en el <h5>.
     """
-    soup = _bs(html)
-    nums = []
+    doc = _doc(html)
+    return None if doc is None else _m440_doc(doc)
 
-    for a in soup.select('h5 a[data-number]'):
+def _m440_doc(doc) -> str | None:
+    picker = _MaxPicker()
+    found = False
+
+    for a in _X_M440_LINKS(doc):
         raw = (a.get('data-number') or "").strip()
-        if re.fullmatch(r'\d+(?:\.\d+)?', raw):
-            nums.append(raw)
+        if _NUMBER_RE.fullmatch(raw):
+            picker.feed(raw)
+            found = True
 
-    if not nums:
-        for h5 in soup.select('li[class*="DTyuZxQygzByzNbtcmg-lis"] h5'):
-            t = h5.get_text(" ", strip=True)
-            m = re.search(r'#\s*([0-9]+(?:\.[0-9]+)?)\b', t)
+    if not found:
+        for h5 in _X_M440_H5(doc):
+            m = _HASH_RE.search(_text(h5, " "))
             if m:
-                nums.append(m.group(1))
+                picker.feed(m.group(1))
 
-    return _pick_max(nums)
+    return picker.result()
 
 # -------- ZONATMO --------
 def parse_zonatmo(url: str, html: str) -> str | None:
     """
     Extrae del listado de capítulos: enlaces con texto tipo 'Capítulo N' o '#N'.
+    Antes probaba 'a', '.chapters a', '.chapter-list a' y 'li a': todos son
+    subconjuntos de 'a', así que basta una pasada por los enlaces.
     """
-    soup = _bs(html)
-    nums = []
-    # prueba varios selectores típicos
-    for sel in [
-        'a', 
-        '.chapters a',
-        '.chapter-list a',
-        'li a',
-    ]:
-        for a in soup.select(sel):
-            t = a.get_text(" ", strip=True)
-            m = re.search(r'(?:Cap[ií]tulo|#)\s*([0-9]+(?:\.[0-9]+)?)', t, re.I)
-            if m:
-                nums.append(m.group(1))
-    return _pick_max(nums)
+    doc = _doc(html)
+    return None if doc is None else _zonatmo_doc(doc)
+
+def _zonatmo_doc(doc) -> str | None:
+    picker = _MaxPicker()
+    _scan_links(doc, _CAP_OR_HASH_RE, picker)
+    return picker.result()
 
 # -------- MANGASNOSekai / BOKUGENTS (genérico simple) --------
 def parse_generic_caplist(url: str, html: str) -> str | None:
-    soup = _bs(html)
-    nums = []
-    for a in soup.find_all('a'):
-        t = a.get_text(" ", strip=True)
-        m = re.search(r'(?:Cap[ií]tulo|Capitulo|#)\s*([0-9]+(?:\.[0-9]+)?)', t, re.I)
-        if m:
-            nums.append(m.group(1))
-    return _pick_max(nums)
+    doc = _doc(html)
+    return None if doc is None else _generic_doc(doc)
+
+def _generic_doc(doc) -> str | None:
+    picker = _MaxPicker()
+    _scan_links(doc, _GENERIC_RE, picker)
+    return picker.result()
@@ -0,0 +1,301 @@
+# -*- coding: utf-8 -*-
+# Pool de proxies (PROXY_POOL): en lugar de una sola salida (HTTPS_PROXY), cada petición
+# toma un proxy del pool según el dominio:
+#   - asignación fija por dominio mientras el proxy esté sano y tenga hueco
+#   - tope de peticiones simultáneas por (proxy, dominio): PROXY_PER_HOST; en async además
+#     la concurrencia y el intervalo de HOST_LIMITS se aplican por proxy, no al dominio entero
+#   - salud en vivo por (proxy, dominio): latencia, tasa de 403/429/captcha y de fallos de red
+#   - expulsión tras PROXY_MAX_FAILS fallos seguidos (o bloqueo sostenido) y readmisión a
+#     prueba pasado PROXY_COOLDOWN, que se dobla si vuelve a fallar
+# Sin PROXY_POOL todo sigue igual (HTTPS_PROXY / HTTP_PROXY si están definidas).
+import asyncio
+import os
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from urllib.parse import unquote, urlsplit
+
+from .backend_stats import Blocked
+from .conditional import NotModified
+from .sites import site_key
+
+PROXY_POOL = os.getenv("PROXY_POOL", "")                         # "direct,http://user:pass@p1:8080,..."
+PROXY_PER_HOST = int(os.getenv("PROXY_PER_HOST", "2"))            # peticiones a la vez por proxy y dominio
+PROXY_MAX_FAILS = int(os.getenv("PROXY_MAX_FAILS", "3"))          # fallos seguidos antes de expulsar
+PROXY_COOLDOWN = float(os.getenv("PROXY_COOLDOWN", "300"))        # segundos fuera antes de readmitir
+PROXY_COOLDOWN_MAX = 3600.0
+PROXY_BLOCK_RATE = 0.5        # tasa de bloqueo (EWMA) que expulsa del dominio...
+PROXY_MIN_SAMPLES = 4         # ...con al menos estas peticiones
+LATENCY_REF = 5.0             # segundos: a esta latencia la puntuación cae a la mitad
+ALPHA = 0.3
+
+DIRECT = "direct"             # entrada del pool sin proxy (salida propia)
+
+
+def _status(exc: BaseException) -> int | None:
+    resp = getattr(exc, "response", None)
+    return getattr(resp, "status_code", None)
+
+
+def outcome(exc: BaseException | None) -> str:
+    """
+    "ok" | "blocked" (403/429/captcha: el sitio veta esa IP) | "fail" (el proxy no responde).
+    Un 404 o un 5xx es cosa del sitio, no del proxy: cuenta como "ok".
+    """
+    if exc is None or isinstance(exc, NotModified):
+        return "ok"
+    status = _status(exc)
+    if isinstance(exc, Blocked) or status in (403, 429):
+        return "blocked"
+    if status is not None:
+        return "ok"
+    return "fail"
+
+
+class _Health:
+    __slots__ = ("n", "total", "latency", "block", "fail", "streak", "ejected_until", "cooldown", "active",
+                 "started")
+
+    def __init__(self):
+        self.n = 0                    # muestras desde la última readmisión
+        self.total = 0
+        self.latency = None
+        self.block = 0.0
+        self.fail = 0.0
+        self.streak = 0               # resultados malos seguidos
+        self.ejected_until = 0.0
+        self.cooldown = PROXY_COOLDOWN
+        self.active = 0               # peticiones en curso
+        self.started = 0.0            # arranque de la última petición (intervalo del dominio por IP)
+
+    def update(self, result: str, latency: float):
+        self.n += 1
+        self.total += 1
+        if result != "fail":
+            self.latency = latency if self.latency is None else ALPHA * latency + (1 - ALPHA) * self.latency
+        self.block = ALPHA * (result == "blocked") + (1 - ALPHA) * self.block
+        self.fail = ALPHA * (result == "fail") + (1 - ALPHA) * self.fail
+        self.streak = 0 if result == "ok" else self.streak + 1
+
+    def should_eject(self) -> bool:
+        return (self.streak >= PROXY_MAX_FAILS
+                or (self.n >= PROXY_MIN_SAMPLES and self.block >= PROXY_BLOCK_RATE))
+
+    def eject(self, now: float):
+        self.ejected_until = now + self.cooldown
+        self.cooldown = min(self.cooldown * 2, PROXY_COOLDOWN_MAX)
+        # readmitido a prueba: un fallo más y vuelve a salir
+        self.streak = PROXY_MAX_FAILS - 1
+        self.n = 0
+        self.block = self.fail = 0.0
+
+    def score(self) -> float:
+        latency = self.latency or 0.0
+        return (1 - self.block) * (1 - self.fail) / (1 + latency / LATENCY_REF)
+
+
+class ProxyPool:
+    def __init__(self, proxies: list, per_host: int = PROXY_PER_HOST):
+        self.proxies = list(dict.fromkeys(proxies))
+        self.per_host = max(1, per_host)
+        self.sticky = {}            # dominio → proxy asignado
+        self.health = {}            # (proxy, dominio) → _Health
+        self.down = {}              # proxy → _Health de conectividad (todos los dominios)
+        self.ejections = []         # (proxy, dominio o None, motivo) para el resumen
+        self.host_limits = None     # dominio → (concurrencia, segundos entre peticiones) por IP de salida
+        self._cond = threading.Condition()
+
+    def _ip_limit(self, host: str) -> tuple:
+        """Tope de peticiones a la vez y separación mínima para un (proxy, dominio)."""
+        if self.host_limits is None:
+            return self.per_host, 0.0
+        conc, delay = self.host_limits(host)
+        return min(self.per_host, max(1, conc)), delay
+
+    def _h(self, proxy: str, host: str) -> _Health:
+        h = self.health.get((proxy, host))
+        if h is None:
+            h = self.health[(proxy, host)] = _Health()
+        return h
+
+    def _d(self, proxy: str) -> _Health:
+        d = self.down.get(proxy)
+        if d is None:
+            d = self.down[proxy] = _Health()
+        return d
+
+    def _admitted(self, proxy: str, host: str, now: float) -> bool:
+        return self._h(proxy, host).ejected_until <= now and self._d(proxy).ejected_until <= now
+
+    def _pick(self, host: str) -> str | None:
+        """Proxy para `host` con hueco, o None si todos están a tope (con el lock tomado)."""
+        now = time.monotonic()
+        admitted = [p for p in self.proxies if self._admitted(p, host, now)]
+        if not admitted:
+            # todos expulsados para este dominio: se readmite antes de tiempo el que menos le queda
+            p = min(self.proxies, key=lambda p: max(self._h(p, host).ejected_until, self._d(p).ejected_until))
+            self._h(p, host).ejected_until = self._d(p).ejected_until = 0.0
+            admitted = [p]
+        # cada IP de salida respeta por su cuenta el ritmo del dominio (HOST_LIMITS)
+        conc, delay = self._ip_limit(host)
+        free = [p for p in admitted
+                if self._h(p, host).active < conc and self._h(p, host).started + delay <= now]
+        if not free:
+            return None
+        sticky = self.sticky.get(host)
+        if sticky in free:
+            return sticky
+        best = max(free, key=lambda p: self._h(p, host).score() * self._d(p).score())
+        if sticky not in admitted:
+            self.sticky[host] = best      # el fijo cayó: el dominio pasa al mejor
+        return best
+
+    def _take(self, host: str) -> str | None:
+        with self._cond:
+            proxy = self._pick(host)
+            if proxy is not None:
+                self._start(proxy, host)
+            return proxy
+
+    def acquire(self, host: str) -> str:
+        with self._cond:
+            while True:
+                proxy = self._pick(host)
+                if proxy is not None:
+                    self._start(proxy, host)
+                    return proxy
+                self._cond.wait(0.05)   # también se libera hueco cuando pasa el intervalo del dominio
+
+    def _start(self, proxy: str, host: str):
+        h = self._h(proxy, host)
+        h.active += 1
+        h.started = time.monotonic()
+
+    async def acquire_async(self, host: str) -> str:
+        # sin bloquear el event loop: se reintenta hasta que algún proxy tenga hueco
+        while True:
+            proxy = self._take(host)
+            if proxy is not None:
+                return proxy
+            await asyncio.sleep(0.05)
+
+    def release(self, proxy: str, host: str, latency: float, exc: BaseException | None = None):
+        result = outcome(exc)
+        now = time.monotonic()
+        with self._cond:
+            h = self._h(proxy, host)
+            h.active -= 1
+            h.update(result, latency)
+            if result == "ok":
+                h.cooldown = PROXY_COOLDOWN
+            elif h.should_eject():
+                h.eject(now)
+                self.ejections.append((proxy, host, result))
+                print(f"   [proxy] {_label(proxy)} fuera de {host} por {h.ejected_until - now:.0f}s ({result})")
+            # la conectividad es del proxy entero: si no responde, no sirve para ningún dominio
+            d = self._d(proxy)
+            if result != "blocked":
+                d.update(result, latency)
+                if result == "ok":
+                    d.cooldown = PROXY_COOLDOWN
+                elif d.should_eject():
+                    d.eject(now)
+                    self.ejections.append((proxy, None, result))
+                    print(f"   [proxy] {_label(proxy)} no responde: fuera del pool por {d.ejected_until - now:.0f}s")
+            self._cond.notify_all()
+
+    def summary(self) -> list:
+        """Una línea por proxy: peticiones, latencia media, bloqueos y expulsiones."""
+        lines = []
+        for p in self.proxies:
+            pairs = [h for (q, _), h in self.health.items() if q == p]
+            n = sum(h.total for h in pairs)
+            lat = [h.latency for h in pairs if h.latency is not None]
+            ejected = sum(1 for q, _, _ in self.ejections if q == p)
+            hosts = sorted(host for host, q in self.sticky.items() if q == p)
+            lines.append(f"{_label(p)}: {n} peticiones"
+                         + (f", {sum(lat) / len(lat):.2f}s" if lat else "")
+                         + (f", {ejected} expulsiones" if ejected else "")
+                         + (f" (fijo para {', '.join(hosts)})" if hosts else ""))
+        return lines
+
+
+def _label(proxy: str) -> str:
+    # sin credenciales en el log
+    return proxy.rsplit("@", 1)[-1] if proxy != DIRECT else DIRECT
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_proxy_pool() -> ProxyPool | None:
+    """El pool del proceso, o None sin PROXY_POOL."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            proxies = [p.strip() for p in PROXY_POOL.split(",") if p.strip()]
+            if not proxies:
+                return None
+            _pool = ProxyPool(proxies)
+        return _pool
+
+
+@contextmanager
+def lease(url: str):
+    """
+    Proxy para una petición a `url`: la URL del proxy, DIRECT o None (sin PROXY_POOL:
+    el fetch usa su configuración de siempre). Al salir anota latencia y resultado.
+    """
+    pool = get_proxy_pool()
+    if pool is None:
+        yield None
+        return
+    host = site_key(url)
+    proxy = pool.acquire(host)
+    t0 = time.perf_counter()
+    try:
+        yield proxy
+    except BaseException as e:
+        pool.release(proxy, host, time.perf_counter() - t0, e)
+        raise
+    pool.release(proxy, host, time.perf_counter() - t0)
+
+
+@asynccontextmanager
+async def lease_async(url: str):
+    pool = get_proxy_pool()
+    if pool is None:
+        yield None
+        return
+    host = site_key(url)
+    proxy = await pool.acquire_async(host)
+    t0 = time.perf_counter()
+    try:
+        yield proxy
+    except BaseException as e:
+        pool.release(proxy, host, time.perf_counter() - t0, e)
+        raise
+    pool.release(proxy, host, time.perf_counter() - t0)
+
+
+def requests_proxies(proxy: str) -> dict:
+    # None por esquema: requests no mezcla entonces HTTP(S)_PROXY del entorno
+    url = None if proxy == DIRECT else proxy
+    return {"http": url, "https": url}
+
+
+def playwright_proxy(proxy: str) -> dict | None:
+    if proxy == DIRECT:
+        return None
+    # Chromium no acepta usuario:clave en la URL: van aparte
+    p = urlsplit(proxy)
+    out = {"server": f"{p.scheme}://{p.hostname}" + (f":{p.port}" if p.port else "")}
+    if p.username:
+        out["username"] = unquote(p.username)
+        out["password"] = unquote(p.password or "")
+    return out
+
+
+def httpx_proxy(proxy: str) -> str | None:
+    return None if proxy == DIRECT else proxy
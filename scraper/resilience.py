@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+# Un host caído o que nos bloquea no debe comerse el run:
+#   - HostBreaker: tras N fallos seguidos de un host, el resto de sus series fallan al instante
+#   - RetryBudget: tope de segundos que el run entero puede gastar en reintentos
+import os
+import threading
+import time
+
+from .conditional import NotModified
+from .sites import site_key
+
+BREAKER_THRESHOLD = int(os.getenv("BREAKER_THRESHOLD", "3"))     # 0 = sin circuit breaker
+RETRY_BUDGET = float(os.getenv("RETRY_BUDGET", "120"))           # segundos por run para esperas + reintentos
+
+
+class CircuitOpen(RuntimeError):
+    """El host acumuló demasiados fallos seguidos en este run: no se intenta."""
+
+
+def _status(exc: BaseException) -> int | None:
+    resp = getattr(exc, "response", None)
+    return getattr(resp, "status_code", None)
+
+
+def is_host_failure(exc: BaseException | None) -> bool:
+    """
+    Fallos que hablan del host (caída, timeout, 5xx, 403/429), no de la serie:
+    un 404 de una URL vieja no debe cerrar el circuito de todo el sitio.
+    """
+    if exc is None or isinstance(exc, (NotModified, CircuitOpen)):
+        return False
+    status = _status(exc)
+    if status is not None and 400 <= status < 500 and status not in (403, 429):
+        return False
+    return True
+
+
+class HostBreaker:
+    def __init__(self, threshold: int = BREAKER_THRESHOLD):
+        self.threshold = threshold
+        self.fails = {}
+        self.opened = {}      # host → último error antes de abrir
+        self.skipped = {}     # host → series que fallaron rápido
+        self._lock = threading.Lock()
+
+    def check(self, url: str):
+        host = site_key(url)
+        if host in self.opened:
+            with self._lock:
+                self.skipped[host] = self.skipped.get(host, 0) + 1
+            raise CircuitOpen(f"circuito abierto para {host} ({self.opened[host]})")
+
+    def record(self, url: str, exc: BaseException | None):
+        if not self.threshold or isinstance(exc, CircuitOpen):
+            return
+        host = site_key(url)
+        with self._lock:
+            if not is_host_failure(exc):
+                self.fails[host] = 0
+                return
+            self.fails[host] = self.fails.get(host, 0) + 1
+            if self.fails[host] >= self.threshold and host not in self.opened:
+                self.opened[host] = str(exc)[:120]
+                print(f"   [breaker] {host}: {self.fails[host]} fallos seguidos → se salta el resto del run")
+
+    def call(self, url: str, fn):
+        """fn() protegido: falla al instante con el circuito abierto y anota el resultado."""
+        self.check(url)
+        try:
+            result = fn()
+        except Exception as e:
+            self.record(url, e)
+            raise
+        self.record(url, None)
+        return result
+
+
+class RetryBudget:
+    """
+    Segundos compartidos por todos los reintentos del run (esperas de backoff y
+    duración de los reintentos). Agotado, cada fetch se queda con su primer intento.
+    """
+
+    def __init__(self, seconds: float = RETRY_BUDGET):
+        self.remaining = seconds
+        self.exhausted = False
+        self._lock = threading.Lock()
+
+    def take(self, seconds: float) -> bool:
+        """Reserva `seconds` para esperar antes de un reintento; False si ya no queda."""
+        with self._lock:
+            if self.remaining < seconds:
+                if not self.exhausted:
+                    self.exhausted = True
+                    print("   [retry] presupuesto de reintentos agotado: sin más reintentos en este run")
+                return False
+            self.remaining -= seconds
+            return True
+
+    def spend(self, seconds: float):
+        """Descuenta lo que tardó un reintento."""
+        with self._lock:
+            self.remaining -= seconds
+
+    def sleep(self, seconds: float) -> bool:
+        if not self.take(seconds):
+            return False
+        time.sleep(seconds)
+        return True
+
+
+_breaker = None
+_budget = None
+
+
+def get_breaker() -> HostBreaker:
+    global _breaker
+    if _breaker is None:
+        _breaker = HostBreaker()
+    return _breaker
+
+
+def get_budget() -> RetryBudget:
+    global _budget
+    if _budget is None:
+        _budget = RetryBudget()
+    return _budget
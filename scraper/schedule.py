@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+# Calendario adaptativo por serie: cada serie se revisa según su ritmo de publicación.
+# Todo vive en serie["state"]: "changes" (últimos cambios de capítulo), "checked" y "next_due";
+# con plazo por run también "deferred" (se quedó fuera del último run). El coste estimado de
+# cada serie va aparte, en SCHEDULE_COST_FILE, para no reescribir series.yaml en cada run.
+import json
+import os
+import statistics
+import time
+from datetime import datetime, timezone
+
+ADAPTIVE_SCHEDULE = os.getenv("ADAPTIVE_SCHEDULE", "false").lower() == "true"
+FULL_SWEEP = os.getenv("FULL_SWEEP", "false").lower() == "true"            # revisa todo aunque no toque
+MIN_INTERVAL = float(os.getenv("SCHEDULE_MIN_MINUTES", "20")) * 60
+MAX_INTERVAL = float(os.getenv("SCHEDULE_MAX_HOURS", "24")) * 3600
+POLLS_PER_CYCLE = float(os.getenv("SCHEDULE_POLLS_PER_CYCLE", "8"))       # revisiones entre dos capítulos
+HISTORY = 8
+SLACK = 120   # el cron no arranca siempre al mismo segundo: margen para no saltarse un run
+
+
+def to_iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def from_iso(s) -> float | None:
+    if not s:
+        return None
+    try:
+        return datetime.strptime(str(s), "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc).timestamp()
+    except ValueError:
+        return None
+
+
+def cadence(state: dict) -> float | None:
+    """Mediana (segundos) entre cambios de capítulo registrados; None con menos de 2."""
+    ts = sorted(t for t in (from_iso(x) for x in state.get("changes") or []) if t)
+    if len(ts) < 2:
+        return None
+    return statistics.median(b - a for a, b in zip(ts, ts[1:]))
+
+
+def next_interval(state: dict, now: float) -> float:
+    """
+    Cada cuánto revisar:
+      - con cadencia conocida: cadencia / POLLS_PER_CYCLE, pero al mínimo cuando
+        ya estamos cerca de la fecha esperada del siguiente capítulo
+      - con un solo cambio: una fracción del tiempo transcurrido desde él
+      - sin historial: el mínimo
+    Siempre dentro de [MIN_INTERVAL, MAX_INTERVAL].
+    """
+    changes = [t for t in (from_iso(x) for x in state.get("changes") or []) if t]
+    last_change = max(changes) if changes else None
+    cad = cadence(state)
+    if cad:
+        expected = last_change + cad
+        interval = MIN_INTERVAL if now >= expected - cad * 0.2 else cad / POLLS_PER_CYCLE
+    elif last_change:
+        interval = (now - last_change) / POLLS_PER_CYCLE
+    else:
+        interval = MIN_INTERVAL
+    return max(MIN_INTERVAL, min(MAX_INTERVAL, interval))
+
+
+def is_due(s: dict, now: float | None = None) -> bool:
+    if FULL_SWEEP or not ADAPTIVE_SCHEDULE:
+        return True
+    due = from_iso((s.get("state") or {}).get("next_due"))
+    return due is None or due <= (now or time.time()) + SLACK
+
+
+def record_check(state: dict, changed: bool, ok: bool = True, now: float | None = None):
+    """
+    Anota el resultado de una revisión. Los cambios se registran siempre (para que
+    haya historial al activar el calendario); "checked"/"next_due" solo con
+    ADAPTIVE_SCHEDULE, para no reescribir series.yaml en cada run sin necesidad.
+    Si el fetch falló no se mueve next_due: se reintenta en el siguiente run.
+    """
+    now = now or time.time()
+    state.pop("deferred", None)
+    if changed:
+        state["changes"] = ((state.get("changes") or []) + [to_iso(now)])[-HISTORY:]
+    if not ADAPTIVE_SCHEDULE or not ok:
+        return
+    state["checked"] = to_iso(now)
+    state["next_due"] = to_iso(now + next_interval(state, now))
+
+
+# ----- plazo por run (RUN_DEADLINE_MINUTES) -----
+# El cron salta cada 20 min: un run lento no debe pisarse con el siguiente.
+RUN_DEADLINE = float(os.getenv("RUN_DEADLINE_MINUTES", "0")) * 60      # 0 = sin plazo
+RUN_RESERVE = float(os.getenv("RUN_RESERVE_SECONDS", "30"))            # para avisos, guardado y commit
+DEFAULT_COST = float(os.getenv("SCHEDULE_DEFAULT_COST", "5"))          # segundos estimados sin historial
+COST_FILE = os.getenv("SCHEDULE_COST_FILE", ".cache/costs.json")     # {url: segundos}, fuera de git
+RECENT_ACTIVITY = 7 * 86400
+
+
+class Deferred(Exception):
+    """La serie no se empezó: no cabía en lo que quedaba del plazo del run."""
+
+
+class RunDeadline:
+    def __init__(self, seconds: float = RUN_DEADLINE, reserve: float = RUN_RESERVE):
+        self.seconds = seconds
+        self.reserve = reserve
+        self._t0 = time.monotonic()
+
+    @property
+    def enabled(self) -> bool:
+        return self.seconds > 0
+
+    def remaining(self) -> float:
+        return self.seconds - (time.monotonic() - self._t0)
+
+    def fits(self, cost: float) -> bool:
+        return not self.enabled or self.remaining() - self.reserve >= cost
+
+
+_costs = None
+
+
+def _cost_table() -> dict:
+    global _costs
+    if _costs is None:
+        try:
+            with open(COST_FILE, "r", encoding="utf-8") as fh:
+                _costs = json.load(fh)
+        except (OSError, ValueError):
+            _costs = {}
+    return _costs
+
+
+def save_costs():
+    if _costs is None or not COST_FILE:
+        return
+    os.makedirs(os.path.dirname(COST_FILE) or ".", exist_ok=True)
+    tmp = COST_FILE + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(_costs, fh, indent=1, sort_keys=True)
+    os.replace(tmp, COST_FILE)
+
+
+def series_cost(s: dict) -> float | None:
+    """Coste guardado de la serie; el "cost" de series.yaml es del formato anterior."""
+    c = _cost_table().get(s.get("url") or "")
+    return c or (s.get("state") or {}).get("cost")
+
+
+def host_costs(series: list, key) -> dict:
+    """Mediana del coste conocido por dominio (para series sin historial propio)."""
+    by_host = {}
+    for s in series:
+        c = series_cost(s)
+        if c and s.get("url"):
+            by_host.setdefault(key(s["url"]), []).append(c)
+    return {h: statistics.median(v) for h, v in by_host.items()}
+
+
+def estimate_cost(s: dict, per_host: dict, key) -> float:
+    c = series_cost(s)
+    if c:
+        return c
+    return per_host.get(key(s["url"]), DEFAULT_COST) if s.get("url") else 0.0
+
+
+def priority_order(series: list, key, now: float | None = None) -> list:
+    """
+    Orden de visita con plazo:
+      1. las que se quedaron fuera en el run anterior ("deferred")
+      2. las más atrasadas respecto a next_due
+      3. las que publicaron hace poco
+      4. las más baratas (dominios rápidos primero)
+    Orden estable: a igualdad, el de series.yaml.
+    """
+    now = now or time.time()
+    per_host = host_costs(series, key)
+
+    def rank(s):
+        st = s.get("state") or {}
+        due = from_iso(st.get("next_due"))
+        overdue = max(0.0, now - due) if due else 0.0
+        changes = [t for t in (from_iso(x) for x in st.get("changes") or []) if t]
+        active = bool(changes) and now - max(changes) < RECENT_ACTIVITY
+        return (
+            0 if st.get("deferred") else 1,
+            -(overdue // 3600),     # por horas: minutos de diferencia no cambian el orden
+            0 if active else 1,
+            estimate_cost(s, per_host, key),
+        )
+
+    return sorted(series, key=rank)
+
+
+def record_cost(s: dict, seconds: float):
+    """Coste medio (EWMA) de revisar la serie, en SCHEDULE_COST_FILE. Solo con plazo activo."""
+    if not RUN_DEADLINE or not s.get("url"):
+        return
+    old = series_cost(s)
+    new = seconds if not old else 0.3 * seconds + 0.7 * old
+    _cost_table()[s["url"]] = max(0.1, round(new, 1))
+    (s.get("state") or {}).pop("cost", None)     # formato anterior: se iba reescribiendo en series.yaml
+
+
+def defer(state: dict, now: float | None = None):
+    """Marca la serie para ir la primera en el siguiente run."""
+    state["deferred"] = to_iso(now or time.time())
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+# Clientes HTTP compartidos durante todo el run (keep-alive, pool por host, HTTP/2 si hay `h2`).
+import atexit
+import os
+import threading
+
+HTTP_POOL_HOSTS = int(os.getenv("HTTP_POOL_HOSTS", "20"))          # hosts con pool propio (requests)
+HTTP_POOL_PER_HOST = int(os.getenv("HTTP_POOL_PER_HOST", "6"))     # conexiones vivas por host
+HTTP_KEEPALIVE = float(os.getenv("HTTP_KEEPALIVE", "30"))          # segundos que dura una conexión ociosa
+HTTP2 = os.getenv("HTTP2", "true").lower() != "false"
+
+_lock = threading.Lock()
+_client = None
+_session = None
+_proxied = {}     # proxy del pool (proxy_pool.py) → httpx.Client propio
+
+
+def proxy_url():
+    return os.getenv("HTTPS_PROXY") or os.getenv("HTTP_PROXY") or None
+
+
+def _http2_available() -> bool:
+    if not HTTP2:
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def client_kwargs(**overrides) -> dict:
+    """Config común para httpx.Client / httpx.AsyncClient."""
+    import httpx
+
+    kw = {
+        "http2": _http2_available(),
+        "proxy": proxy_url(),
+        "follow_redirects": True,
+        "limits": httpx.Limits(
+            max_connections=HTTP_POOL_HOSTS * HTTP_POOL_PER_HOST,
+            max_keepalive_connections=HTTP_POOL_HOSTS * HTTP_POOL_PER_HOST,
+            keepalive_expiry=HTTP_KEEPALIVE,
+        ),
+    }
+    kw.update(overrides)
+    return kw
+
+
+def get_client(proxy: str | None = None):
+    """
+    httpx.Client único del proceso (se crea la primera vez que se pide).
+    Con `proxy` (del pool de proxy_pool.py), uno por proxy: httpx fija el proxy al crear el cliente.
+    """
+    global _client
+    with _lock:
+        import httpx
+        from .http_client import HEADERS, TIMEOUT
+        if proxy is not None:
+            if proxy not in _proxied:
+                _proxied[proxy] = httpx.Client(**proxied_kwargs(proxy, headers=HEADERS, timeout=TIMEOUT))
+            return _proxied[proxy]
+        if _client is None:
+            _client = httpx.Client(**client_kwargs(headers=HEADERS, timeout=TIMEOUT))
+        return _client
+
+
+def proxied_kwargs(proxy: str, **overrides) -> dict:
+    """client_kwargs para un proxy del pool; sin leer HTTP(S)_PROXY del entorno."""
+    from .proxy_pool import httpx_proxy
+
+    return client_kwargs(proxy=httpx_proxy(proxy), trust_env=False, **overrides)
+
+
+def get_session():
+    """requests.Session única del proceso, con pool de conexiones por host."""
+    global _session
+    with _lock:
+        if _session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            s = requests.Session()
+            adapter = HTTPAdapter(pool_connections=HTTP_POOL_HOSTS, pool_maxsize=HTTP_POOL_PER_HOST, max_retries=0)
+            s.mount("http://", adapter)
+            s.mount("https://", adapter)
+            _session = s
+        return _session
+
+
+def close_all():
+    global _client, _session
+    with _lock:
+        for cli in [_client, *_proxied.values()]:
+            if cli is not None:
+                try:
+                    cli.close()
+                except Exception:
+                    pass
+        _client = None
+        _proxied.clear()
+        if _session is not None:
+            try:
+                _session.close()
+            except Exception:
+                pass
+            _session = None
+
+
+atexit.register(close_all)
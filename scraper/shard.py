@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+# Reparto de series.yaml en N shards (procesos o jobs de matrix) y fusión de resultados parciales.
+import hashlib
+import json
+import os
+
+from .sites import site_key
+from .state_store import open_store
+
+SHARD_COUNT = int(os.getenv("SHARD_COUNT", "1"))
+SHARD_INDEX = int(os.getenv("SHARD_INDEX", "0"))
+SHARD_KEY = os.getenv("SHARD_KEY", "host").lower()      # host | url
+SHARD_OUT = os.getenv("SHARD_OUT", "")
+
+
+def shard_of(s: dict, count: int, key: str = SHARD_KEY) -> int:
+    """
+    Shard estable (no depende del orden ni de PYTHONHASHSEED).
+    key="host" agrupa cada dominio en un único shard, así la cortesía por dominio se mantiene.
+    """
+    url = s.get("url") or s.get("name") or ""
+    value = site_key(url) if key == "host" and s.get("url") else url
+    return int(hashlib.sha1(value.encode("utf-8")).hexdigest(), 16) % max(1, count)
+
+
+def select_shard(series: list, index: int, count: int, key: str = SHARD_KEY) -> list:
+    return [s for s in series if shard_of(s, count, key) == index]
+
+
+class PartialResult:
+    """
+    Hace de "store" dentro de un shard: no toca el estado compartido,
+    solo anota lo procesado y al final lo vuelca a un JSON para la fusión.
+    """
+
+    def __init__(self, path: str, index: int, count: int, stats: dict):
+        self.path = path
+        self.index = index
+        self.count = count
+        self.stats = stats        # contadores del run (se vuelcan junto a las series)
+        self.entries = []
+
+    def commit_series(self, s: dict, outcome: str):
+        self.entries.append({
+            "url": s.get("url"),
+            "outcome": outcome,
+            "last_chapter": s.get("last_chapter"),
+            "state": s.get("state") or {},
+        })
+
+    def save(self, data: dict) -> bool:
+        stats = self.stats
+        out = {
+            "shard": self.index,
+            "count": self.count,
+            "series": self.entries,
+            "updated": stats.get("updated", 0),
+            "same": stats.get("same", 0),
+            "not_due": stats.get("not_due", 0),
+            "deferred": stats.get("deferred", 0),
+            "errors": [list(e) for e in stats.get("errors", [])],
+        }
+        with open(self.path, "w", encoding="utf-8") as fh:
+            json.dump(out, fh, ensure_ascii=False, indent=1)
+        return True
+
+    def close(self):
+        pass
+
+
+def merge_partials(series_file: str, paths: list) -> dict:
+    """
+    Aplica los resultados de todos los shards al estado (YAML o SQLite según STATE_BACKEND)
+    y devuelve el resumen combinado. Se quejan los shards repetidos o que falten.
+    """
+    store = open_store(series_file)
+    data = store.load()
+    by_url = {s.get("url"): s for s in data.get("series", []) if s.get("url")}
+    total = {"updated": 0, "same": 0, "not_due": 0, "deferred": 0, "errors": [], "shards": set(), "count": None}
+
+    for path in sorted(paths):
+        with open(path, "r", encoding="utf-8") as fh:
+            part = json.load(fh)
+        if part["shard"] in total["shards"]:
+            raise ValueError(f"shard {part['shard']} repetido ({path})")
+        total["shards"].add(part["shard"])
+        total["count"] = part["count"]
+        for key in ("updated", "same", "not_due", "deferred"):
+            total[key] += part.get(key, 0)
+        total["errors"].extend(tuple(e) for e in part.get("errors", []))
+
+        for entry in part["series"]:
+            s = by_url.get(entry["url"])
+            if s is None:
+                continue   # la serie se quitó de series.yaml mientras corría el shard
+            s["last_chapter"] = entry["last_chapter"]
+            if entry["state"]:
+                s["state"] = entry["state"]
+            store.commit_series(s, entry["outcome"])
+
+    store.save(data)
+    store.close()
+    missing = set(range(total["count"] or 0)) - total["shards"]
+    total["missing"] = sorted(missing)
+    return total
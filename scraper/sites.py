@@ -1,4 +1,5 @@
 # -*- coding: utf-8 -*-
+import re
 from urllib.parse import urlsplit
 
 from .parsers import (
@@ -19,12 +20,93 @@ SITES = {
     "leercapitulo.co": parse_generic_caplist,
 }
 
-def pick_parser(url: str):
+# Límites por dominio para el pipeline concurrente: (peticiones simultáneas, segundos mínimos entre peticiones)
+# Se pueden sobreescribir con HOST_LIMITS="zonatmo.com=1/2.0,m440.in=2/0.5"
+HOST_LIMITS = {
+    "bokugents.com": (2, 0.5),
+    "mangasnosekai.com": (2, 0.5),
+    "m440.in": (2, 0.5),
+    "zonatmo.com": (1, 1.5),
+    "animebbg.net": (1, 1.0),
+    "leercapitulo.co": (2, 0.5),
+}
+
+# Selector del listado de capítulos por dominio: el fetch con navegador devuelve
+# la página en cuanto aparece (sin selector se usa una espera fija). Solo elementos
+# de capítulo que pinta el JS: un contenedor o la sinopsis ya están en el DOM inicial
+# y cortarían la espera antes de tiempo.
+WAIT_SELECTORS = {
+    "mangasnosekai.com": ".contenedor-capitulo-miniatura, .wp-manga-chapter",
+    "zonatmo.com": "#chapters li.upload-link, .chapter-list li",
+    "m440.in": "[data-number], .wp-manga-chapter, .chapter-title-rtl",
+    "animebbg.net": ".structItem--resourceAlbum .structItem-title",
+    "manga-oni.com": "#c_list a",
+    "leercapitulo.co": ".chapter-list a, a.xanh",
+}
+
+# Sitios WordPress (tema Madara) con endpoints ligeros de capítulos (wp_api.py)
+WP_SITES = ("bokugents.com", "mangasnosekai.com")
+
+# Páginas de "últimas actualizaciones" (FEED_FASTPATH): {page} = 1, 2, ...
+FEEDS = {
+    "bokugents.com": "https://bokugents.com/manga/page/{page}/?m_orderby=latest",
+    "mangasnosekai.com": "https://mangasnosekai.com/manga/page/{page}/?m_orderby=latest",
+}
+
+# Marcas de la zona del listado de capítulos en el HTML crudo (para el hash de fragmento)
+_FRAGMENT_RE = re.compile(r'Cap[ií]tulo|data-number=|>\s*#\s*\d', re.I)
+# Las mismas marcas con el número detrás: la página trae el listado (has_chapter_list)
+_LISTED_RE = re.compile(r'Cap[ií]tulo\s*\d|data-number=|>\s*#\s*\d', re.I)
+
+def chapter_fragment(url: str, html: str) -> str:
+    """
+    Recorte barato (sin parsear) del HTML que contiene el listado de capítulos:
+    desde la primera marca hasta la última. Si no hay marcas, devuelve todo el HTML.
+    """
+    first = _FRAGMENT_RE.search(html)
+    if not first:
+        return html
+    end = first.end()
+    for m in _FRAGMENT_RE.finditer(html, end):
+        end = m.end()
+    # cola corta para incluir el número que sigue a la última marca
+    return html[first.start():end + 64]
+
+def host_of(url: str) -> str:
     host = urlsplit(url).netloc.lower()
     if host.startswith("www."):
         host = host[4:]
+    return host
+
+def wait_selector(url: str) -> str | None:
+    host = host_of(url)
+    for base, selector in WAIT_SELECTORS.items():
+        if host == base or host.endswith("." + base):
+            return selector
+    return None
+
+def site_key(url: str) -> str:
+    """Dominio base registrado (sin subdominios) o el host tal cual si no se conoce."""
+    host = host_of(url)
+    for base in SITES:
+        if host == base or host.endswith("." + base):
+            return base
+    return host
+
+def pick_parser(url: str):
+    host = host_of(url)
     # busca match exacto o subdominio
     for base, func in SITES.items():
         if host == base or host.endswith("." + base):
             return func
     return parse_generic_caplist
+
+def has_chapter_list(url: str, html: str) -> bool:
+    """
+    El HTML trae un listado de capítulos (marca seguida de número, sin parsear).
+    Solo decide qué backend sirve en 'auto': el parseo de verdad se hace una vez,
+    después, en process_series o en el pool de procesos.
+    """
+    if not isinstance(html, str):
+        return bool(html.chapter())   # extractors.Extracted (EXTRACT_MODE=dom|both, streaming)
+    return _LISTED_RE.search(html) is not None
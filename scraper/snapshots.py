@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+# Copia en disco del HTML descargado, para probar cambios de parser sin volver a pedir las páginas.
+#   <dir>/objects/ab/<sha1>.html.gz   contenido comprimido, una sola vez por contenido idéntico
+#   <dir>/index.json                  url → {sha, time, backend, name, size}
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", "")                      # vacío = desactivado
+SNAPSHOT_MAX_MB = float(os.getenv("SNAPSHOT_MAX_MB", "200"))
+
+
+class SnapshotStore:
+    def __init__(self, root: str, max_bytes: float = SNAPSHOT_MAX_MB * 1024 * 1024):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.index_path = os.path.join(root, "index.json")
+        self._lock = threading.Lock()
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as fh:
+                self.index = json.load(fh)
+        except (OSError, ValueError):
+            self.index = {}
+
+    def object_path(self, sha: str) -> str:
+        return os.path.join(self.root, "objects", sha[:2], sha + ".html.gz")
+
+    def put(self, url: str, html: str, backend: str | None = None, name: str | None = None) -> str:
+        """Guarda el HTML de `url`; si el mismo contenido ya está, solo se actualiza el índice."""
+        data = html.encode("utf-8")
+        sha = hashlib.sha1(data).hexdigest()
+        path = self.object_path(sha)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with gzip.open(tmp, "wb", compresslevel=6) as fh:
+                fh.write(data)
+            os.replace(tmp, path)
+        with self._lock:
+            self.index[url] = {
+                "sha": sha,
+                "time": round(time.time(), 3),
+                "backend": backend,
+                "name": name,
+                "size": os.path.getsize(path),
+                "raw": len(data),
+            }
+        return sha
+
+    def get(self, url: str) -> str | None:
+        meta = self.index.get(url)
+        if not meta:
+            return None
+        return read_object(self.object_path(meta["sha"]))
+
+    def evict(self) -> int:
+        """
+        Borra los objetos que ya no referencia ninguna URL y, si aún se pasa de
+        `max_bytes`, las URLs con la copia más antigua. Devuelve cuántos objetos borró.
+        """
+        newest = {}
+        for url, meta in self.index.items():
+            newest[meta["sha"]] = max(newest.get(meta["sha"], 0), meta["time"])
+
+        on_disk = {}
+        objects = os.path.join(self.root, "objects")
+        for dirpath, _, files in os.walk(objects):
+            for f in files:
+                if f.endswith(".html.gz"):
+                    on_disk[f[:-8]] = os.path.join(dirpath, f)
+
+        removed = 0
+        for sha, path in on_disk.items():
+            if sha not in newest:
+                os.remove(path)
+                removed += 1
+
+        total = sum(os.path.getsize(p) for sha, p in on_disk.items() if sha in newest)
+        for sha in sorted(newest, key=newest.get):
+            if total <= self.max_bytes:
+                break
+            path = on_disk.get(sha)
+            if path:
+                total -= os.path.getsize(path)
+                os.remove(path)
+                removed += 1
+            self.index = {u: m for u, m in self.index.items() if m["sha"] != sha}
+        return removed
+
+    def save(self):
+        os.makedirs(self.root, exist_ok=True)
+        with self._lock:
+            self.evict()
+            tmp = self.index_path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as fh:
+                json.dump(self.index, fh, ensure_ascii=False, indent=1, sort_keys=True)
+            os.replace(tmp, self.index_path)
+
+
+def read_object(path: str) -> str:
+    with gzip.open(path, "rb") as fh:
+        return fh.read().decode("utf-8")
+
+
+_store = None
+
+
+def get_snapshots() -> SnapshotStore | None:
+    global _store
+    if _store is None and SNAPSHOT_DIR:
+        _store = SnapshotStore(SNAPSHOT_DIR)
+    return _store
+
+
+def save_snapshots():
+    if _store is not None:
+        _store.save()
@@ -0,0 +1,305 @@
+# -*- coding: utf-8 -*-
+# Dónde vive el estado de las series: series.yaml (default) o una base SQLite indexada.
+import copy
+import json
+import os
+import sqlite3
+import time
+
+from .utils import load_yaml, save_yaml
+
+STATE_BACKEND = os.getenv("STATE_BACKEND", "yaml").lower()      # yaml | sqlite
+STATE_DB = os.getenv("STATE_DB", "state.db")
+STATE_EXPORT_YAML = os.getenv("STATE_EXPORT_YAML", "true").lower() != "false"
+
+# claves de la entrada y de state que tienen columna propia; el resto va a `extra` (JSON).
+# last_checked y error_count son solo de la base: no se exportan a series.yaml.
+_ENTRY_COLS = ("name", "site", "url", "last_chapter")
+_STATE_COLS = {"etag": "etag", "last_modified": "last_modified", "fragment": "fragment", "next_due": "next_due"}
+
+
+def _chapter_text(value) -> str:
+    return "" if value is None else str(value)
+
+
+def _clean(series: list):
+    # no ensuciar series.yaml con estados vacíos
+    for s in series:
+        if not s.get("state"):
+            s.pop("state", None)
+
+
+class YamlStore:
+    """series.yaml entero en memoria; solo se reescribe si algo cambió."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._loaded = None
+
+    def load(self) -> dict:
+        data = load_yaml(self.path)
+        self._loaded = copy.deepcopy(data)
+        return data
+
+    def commit_series(self, s: dict, outcome: str):
+        pass   # se guarda todo junto al final
+
+    def save(self, data: dict) -> bool:
+        _clean(data.get("series", []))
+        if data == self._loaded:
+            return False
+        save_yaml(self.path, data)
+        self._loaded = copy.deepcopy(data)
+        return True
+
+    def close(self):
+        pass
+
+
+class SqliteStore:
+    """
+    Una fila por serie, con índices por url, sitio y next_due.
+    Cada serie se guarda en su propia transacción al terminar de procesarla,
+    así un crash a mitad de run no pierde lo ya hecho.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS series (
+        id            INTEGER PRIMARY KEY,
+        position      INTEGER NOT NULL,
+        name          TEXT,
+        site          TEXT,
+        url           TEXT UNIQUE,
+        last_chapter  TEXT,
+        last_checked  TEXT,
+        next_due      TEXT,
+        etag          TEXT,
+        last_modified TEXT,
+        fragment      TEXT,
+        error_count   INTEGER NOT NULL DEFAULT 0,
+        extra         TEXT,
+        yaml_chapter  TEXT
+    );
+    CREATE INDEX IF NOT EXISTS idx_series_site ON series(site);
+    CREATE INDEX IF NOT EXISTS idx_series_next_due ON series(next_due);
+    CREATE INDEX IF NOT EXISTS idx_series_position ON series(position);
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(self.SCHEMA)
+        cols = {r["name"] for r in self.conn.execute("PRAGMA table_info(series)")}
+        if "yaml_chapter" not in cols:
+            # last_chapter tal como quedó en series.yaml al importar / volcar (reconcile_yaml)
+            with self.conn:
+                self.conn.execute("ALTER TABLE series ADD COLUMN yaml_chapter TEXT")
+        self._ids = {}        # id(entrada) → rowid
+        self.dirty = False
+        self.export_path = None   # si se fija, save() vuelca también a este series.yaml
+
+    # ----- filas <-> entradas de series.yaml -----
+    @staticmethod
+    def _to_row(s: dict, position: int) -> dict:
+        state = dict(s.get("state") or {})
+        row = {c: s.get(c) for c in _ENTRY_COLS}
+        row["position"] = position
+        for key, col in _STATE_COLS.items():
+            row[col] = state.pop(key, None)
+        extra = {k: v for k, v in s.items() if k not in _ENTRY_COLS and k != "state"}
+        if state:
+            extra["state"] = state
+        row["extra"] = json.dumps(extra, ensure_ascii=False) if extra else None
+        return row
+
+    @staticmethod
+    def _to_entry(row) -> dict:
+        s = {c: row[c] for c in _ENTRY_COLS if row[c] is not None}
+        extra = json.loads(row["extra"]) if row["extra"] else {}
+        state = extra.pop("state", {})
+        s.update(extra)
+        for key, col in _STATE_COLS.items():
+            if row[col] is not None:
+                state[key] = row[col]
+        if state:
+            s["state"] = state
+        return s
+
+    def _upsert(self, s: dict, position: int, error_count: int | None = None, checked: str | None = None):
+        row = self._to_row(s, position)
+        rowid = self._ids.get(id(s))
+        if rowid is None and row["url"]:
+            found = self.conn.execute("SELECT id FROM series WHERE url = ?", (row["url"],)).fetchone()
+            rowid = found["id"] if found else None
+        cols = list(row)
+        if rowid is None:
+            cur = self.conn.execute(
+                f"INSERT INTO series ({', '.join(cols)}) VALUES ({', '.join('?' * len(cols))})",
+                [row[c] for c in cols],
+            )
+            rowid = cur.lastrowid
+        else:
+            self.conn.execute(
+                f"UPDATE series SET {', '.join(c + ' = ?' for c in cols)} WHERE id = ?",
+                [row[c] for c in cols] + [rowid],
+            )
+        if error_count is not None:
+            self.conn.execute("UPDATE series SET error_count = ? WHERE id = ?", (error_count, rowid))
+        if checked is not None:
+            self.conn.execute("UPDATE series SET last_checked = ? WHERE id = ?", (checked, rowid))
+        self._ids[id(s)] = rowid
+
+    # ----- API común con YamlStore -----
+    def load(self) -> dict:
+        rows = self.conn.execute("SELECT * FROM series ORDER BY position").fetchall()
+        series = []
+        for row in rows:
+            s = self._to_entry(row)
+            self._ids[id(s)] = row["id"]
+            series.append(s)
+        return {"series": series}
+
+    def get(self, url: str) -> dict | None:
+        row = self.conn.execute("SELECT * FROM series WHERE url = ?", (url,)).fetchone()
+        return self._to_entry(row) if row else None
+
+    def error_count(self, url: str) -> int:
+        row = self.conn.execute("SELECT error_count FROM series WHERE url = ?", (url,)).fetchone()
+        return row["error_count"] if row else 0
+
+    def commit_series(self, s: dict, outcome: str):
+        pos = self.conn.execute("SELECT position FROM series WHERE id = ?", (self._ids.get(id(s)),)).fetchone()
+        errors = self.error_count(s["url"]) + 1 if outcome == "error" and s.get("url") else 0
+        with self.conn:
+            self._upsert(
+                s, pos["position"] if pos else self._next_position(),
+                error_count=errors, checked=time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            )
+        self.dirty = True
+
+    def _next_position(self) -> int:
+        row = self.conn.execute("SELECT COALESCE(MAX(position), -1) + 1 AS p FROM series").fetchone()
+        return row["p"]
+
+    def save(self, data: dict) -> bool:
+        """Las series procesadas ya se guardaron una a una; aquí solo entran las altas."""
+        series = data.get("series", [])
+        _clean(series)
+        with self.conn:
+            for pos, s in enumerate(series):
+                if id(s) not in self._ids:
+                    self._upsert(s, pos)
+                    self.dirty = True
+        changed, self.dirty = self.dirty, False
+        if changed and self.export_path:
+            self.export_yaml(self.export_path)
+        return changed
+
+    # ----- import / export al formato de series.yaml -----
+    def import_yaml(self, path: str) -> int:
+        """Carga series.yaml (sustituye lo que hubiera); devuelve cuántas series importó."""
+        series = load_yaml(path).get("series", [])
+        with self.conn:
+            self.conn.execute("DELETE FROM series")
+            self._ids.clear()
+            for pos, s in enumerate(series):
+                self._upsert(s, pos)
+            self.conn.execute("UPDATE series SET yaml_chapter = COALESCE(last_chapter, '')")
+        return len(series)
+
+    def reconcile_yaml(self, path: str) -> tuple:
+        """
+        Lleva a la base lo que se tocó a mano en series.yaml (manda el fichero):
+          - series nuevas (por url) → altas
+          - cambios de name / site / url; una entrada con url desconocida y el mismo
+            nombre que una fila cuya url ya no está en el fichero es esa serie con la url cambiada
+          - last_chapter distinto del último volcado/importado (vaciado para re-inicializar,
+            corregido con tools/clean_bad_caps.py...) → se adopta y se olvidan validadores y hash
+          - filas cuya url ya no está en el fichero → bajas
+        El resto del estado (validadores, calendario) sigue siendo el de la base.
+        Devuelve (altas, modificadas, bajas).
+        """
+        series = load_yaml(path).get("series", [])
+        rows = {r["url"]: r for r in self.conn.execute("SELECT id, name, site, url, yaml_chapter FROM series")}
+        urls = {s.get("url") for s in series}
+        orphans = {r["name"]: r for u, r in rows.items() if u not in urls and r["name"]}
+        added = updated = 0
+        kept = set()
+        with self.conn:
+            for s in series:
+                if not s.get("url"):
+                    continue
+                row = rows.get(s["url"]) or orphans.pop(s.get("name"), None)
+                if row is None:
+                    self._upsert(s, self._next_position())
+                    self._mark_exported(s["url"], s.get("last_chapter"))
+                    added += 1
+                    continue
+                kept.add(row["id"])
+                new = {c: s.get(c) for c in ("name", "site", "url")}
+                stale = row["url"] != new["url"]        # los validadores y el hash eran de la página vieja
+                edited = any(row[c] != v for c, v in new.items())
+                chapter = _chapter_text(s.get("last_chapter"))
+                if row["yaml_chapter"] is None:
+                    # base anterior a esta columna: lo que hay en el fichero es la referencia
+                    self._mark_exported(new["url"], chapter, row["id"])
+                elif chapter != row["yaml_chapter"]:
+                    self.conn.execute("UPDATE series SET last_chapter = ?, yaml_chapter = ? WHERE id = ?",
+                                      (chapter or None, chapter, row["id"]))
+                    stale = edited = True
+                if edited:
+                    self.conn.execute("UPDATE series SET name = ?, site = ?, url = ? WHERE id = ?",
+                                      (new["name"], new["site"], new["url"], row["id"]))
+                    updated += 1
+                if stale:
+                    self.conn.execute("UPDATE series SET etag = NULL, last_modified = NULL, fragment = NULL "
+                                      "WHERE id = ?", (row["id"],))
+            gone = [r["id"] for u, r in rows.items() if u and r["id"] not in kept and u not in urls]
+            self.conn.executemany("DELETE FROM series WHERE id = ?", [(i,) for i in gone])
+        self._ids.clear()
+        return added, updated, len(gone)
+
+    def _mark_exported(self, url: str, chapter, rowid: int | None = None):
+        """Anota el last_chapter que tiene la serie en series.yaml (para detectar ediciones a mano)."""
+        if rowid is None:
+            self.conn.execute("UPDATE series SET yaml_chapter = ? WHERE url = ?", (_chapter_text(chapter), url))
+        else:
+            self.conn.execute("UPDATE series SET yaml_chapter = ? WHERE id = ?", (_chapter_text(chapter), rowid))
+
+    def export_yaml(self, path: str) -> bool:
+        """Escribe la base en formato series.yaml (solo si el contenido difiere)."""
+        data = self.load()
+        with self.conn:
+            self.conn.execute("UPDATE series SET yaml_chapter = COALESCE(last_chapter, '')")
+        if os.path.exists(path) and load_yaml(path) == data:
+            return False
+        save_yaml(path, data)
+        return True
+
+    def close(self):
+        self.conn.close()
+
+
+def open_store(series_file: str):
+    """
+    STATE_BACKEND=yaml   → series.yaml tal cual
+    STATE_BACKEND=sqlite → STATE_DB; si la base está vacía se importa series_file y, si
+                           no, se incorporan sus altas, bajas y ediciones (reconcile_yaml);
+                           con STATE_EXPORT_YAML se vuelca de vuelta al terminar
+    """
+    if STATE_BACKEND != "sqlite":
+        return YamlStore(series_file)
+    store = SqliteStore(STATE_DB)
+    if STATE_EXPORT_YAML:
+        store.export_path = series_file
+    if not store.conn.execute("SELECT 1 FROM series LIMIT 1").fetchone() and os.path.exists(series_file):
+        n = store.import_yaml(series_file)
+        print(f"[state] importadas {n} series de {series_file} a {STATE_DB}")
+    elif os.path.exists(series_file):
+        added, updated, removed = store.reconcile_yaml(series_file)
+        if added or updated or removed:
+            print(f"[state] {series_file}: {added} series nuevas, {updated} editadas y {removed} quitadas"
+                  f" llevadas a {STATE_DB}")
+    return store
@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+# Fetch + parse en streaming para los backends sin navegador: la respuesta se lee por trozos,
+# cada trozo entra en un parser HTML incremental (lxml HTMLPullParser) y la conexión se
+# cierra en cuanto se han visto STREAM_MIN_CHAPTERS capítulos. En todos los sitios el
+# listado va del más nuevo al más viejo, así que el resto de la página no cambia el máximo.
+import os
+
+from lxml import etree
+
+from .backend_stats import check_blocked
+from .conditional import NotModified, conditional_headers, remember_validators
+from .extractors import Extracted
+from .parsers import (
+    _CAP_OR_HASH_RE,
+    _CAP_RE,
+    _GENERIC_RE,
+    _NUMBER_RE,
+    _MaxPicker,
+    _animebbg_doc,
+    _generic_doc,
+    _m440_doc,
+    _text,
+    _zonatmo_doc,
+    parse_animebbg,
+    parse_generic_caplist,
+    parse_m440,
+    parse_zonatmo,
+)
+from .sites import pick_parser
+
+STREAM_PARSE = os.getenv("STREAM_PARSE", "false").lower() == "true"
+STREAM_MIN_CHAPTERS = int(os.getenv("STREAM_MIN_CHAPTERS", "30"))    # 0 = leer siempre hasta el final
+STREAM_CHUNK = 16 * 1024
+
+
+def _classes(el) -> set:
+    return set((el.get("class") or "").split())
+
+
+# Reglas por <a> cerrado: mismas condiciones que el parser de cada sitio (parsers.py)
+def _link_animebbg(a):
+    if not (a.get("href") or "").startswith("/comics/capitulo/"):
+        return None
+    in_title = False
+    for anc in a.iterancestors():
+        cls = _classes(anc)
+        if "structItem-title" in cls:
+            in_title = True
+        elif in_title and "structItem--resourceAlbum" in cls:
+            m = _CAP_RE.search(_text(a))
+            return m.group(1) if m else None
+    return None
+
+
+def _link_m440(a):
+    raw = a.get("data-number")
+    if raw is None or not any(anc.tag == "h5" for anc in a.iterancestors()):
+        return None
+    raw = raw.strip()
+    return raw if _NUMBER_RE.fullmatch(raw) else None
+
+
+def _links(rx):
+    def rule(a):
+        raw = "".join(a.itertext())
+        if "#" not in raw and "cap" not in raw.lower():
+            return None
+        m = rx.search(_text(a, " "))
+        return m.group(1) if m else None
+    return rule
+
+
+# parser de parsers.py → (regla por enlace, parser del documento para el final sin candidatos)
+_RULES = {
+    parse_animebbg: (_link_animebbg, _animebbg_doc),
+    parse_m440: (_link_m440, _m440_doc),
+    parse_zonatmo: (_links(_CAP_OR_HASH_RE), _zonatmo_doc),
+    parse_generic_caplist: (_links(_GENERIC_RE), _generic_doc),
+}
+
+
+class StreamParser:
+    def __init__(self, url: str, encoding: str | None = None):
+        self.url = url
+        self.rule, self.doc_parser = _RULES[pick_parser(url)]
+        self.picker = _MaxPicker()
+        self.found = 0
+        self.bytes = 0
+        self._pp = etree.HTMLPullParser(events=("end",), tag="a", encoding=encoding or "utf-8")
+
+    def feed(self, chunk: bytes) -> bool:
+        """Procesa un trozo; True cuando ya hay capítulos suficientes para decidir."""
+        self.bytes += len(chunk)
+        self._pp.feed(chunk)
+        for _, a in self._pp.read_events():
+            value = self.rule(a)
+            if value:
+                self.picker.feed(value)
+                self.found += 1
+        return bool(STREAM_MIN_CHAPTERS) and self.found >= STREAM_MIN_CHAPTERS
+
+    def result(self, complete: bool) -> Extracted:
+        """
+        complete=True si se leyó la página entera: sin candidatos por enlace se aplica
+        el parser completo al árbol (fallbacks de animebbg y m440).
+        """
+        value = self.picker.result()
+        if complete:
+            try:
+                root = self._pp.close()
+            except etree.XMLSyntaxError:
+                root = None
+            if value is None and root is not None:
+                value = self.doc_parser(root)
+        return Extracted(self.url, [value] if value else [], source="stream")
+
+
+def _start(url: str, status: int, first: bytes, encoding: str | None):
+    if status == 304:
+        raise NotModified(url)
+    check_blocked(url, status, first[:20000].decode(encoding or "utf-8", "replace"))
+
+
+def stream_requests(session, url: str, headers: dict, timeout, validators=None, meta=None, **kw) -> Extracted:
+    headers = {**headers, **conditional_headers(validators)}
+    r = session.get(url, headers=headers, timeout=timeout, stream=True, **kw)
+    try:
+        chunks = r.iter_content(STREAM_CHUNK)
+        first = next(chunks, b"") if r.status_code == 200 else b""
+        _start(url, r.status_code, first, r.encoding)
+        r.raise_for_status()
+        sp = StreamParser(url, r.encoding)
+        done = sp.feed(first)
+        for chunk in ([] if done else chunks):
+            if sp.feed(chunk):
+                done = True
+                break
+        remember_validators(meta, r.headers)
+        if meta is not None:
+            meta["bytes"] = sp.bytes
+        return sp.result(complete=not done)
+    finally:
+        r.close()    # con done=True corta la descarga: la conexión no vuelve al pool
+
+
+def stream_httpx(client, url: str, validators=None, meta=None) -> Extracted:
+    with client.stream("GET", url, headers=conditional_headers(validators)) as r:
+        chunks = r.iter_bytes(STREAM_CHUNK)
+        first = next(chunks, b"") if r.status_code == 200 else b""
+        _start(url, r.status_code, first, r.charset_encoding)
+        r.raise_for_status()
+        sp = StreamParser(url, r.charset_encoding)
+        done = sp.feed(first)
+        for chunk in ([] if done else chunks):
+            if sp.feed(chunk):
+                done = True
+                break
+        remember_validators(meta, r.headers)
+    if meta is not None:
+        meta["bytes"] = sp.bytes
+    return sp.result(complete=not done)
+
+
+async def stream_httpx_async(client, url: str, validators=None, meta=None) -> Extracted:
+    async with client.stream("GET", url, headers=conditional_headers(validators)) as r:
+        chunks = r.aiter_bytes(STREAM_CHUNK)
+        first = b""
+        if r.status_code == 200:
+            first = await anext(chunks, b"")
+        _start(url, r.status_code, first, r.charset_encoding)
+        r.raise_for_status()
+        sp = StreamParser(url, r.charset_encoding)
+        done = sp.feed(first)
+        if not done:
+            async for chunk in chunks:
+                if sp.feed(chunk):
+                    done = True
+                    break
+        remember_validators(meta, r.headers)
+    if meta is not None:
+        meta["bytes"] = sp.bytes
+    return sp.result(complete=not done)
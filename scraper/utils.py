@@ -4,9 +4,14 @@ import re
 import time
 import yaml
 import random
-import requests
 from typing import Optional, Tuple
 
+from .backend_stats import check_blocked, fetch_auto
+from .chapter import Chapter
+from .conditional import NotModified, conditional_headers, remember_validators
+from .proxy_pool import lease, playwright_proxy, requests_proxies
+from .session import get_session
+
 # ------- YAML IO -------
 def load_yaml(path: str) -> dict:
     if not os.path.exists(path):
@@ -25,24 +30,42 @@ UA_POOL = [
     "Mozilla/5.0 (Macintosh; Intel Mac OS X 13_4) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/16.5 Safari/605.1.15",
 ]
 
-def http_get(url: str, backend: str = "playwright", timeout: int = 40) -> str:
+def http_get(url: str, backend: str = "playwright", timeout: int = 40, validators: Optional[dict] = None,
+             meta: Optional[dict] = None, stream: bool = False) -> str:
     """
-    backend='playwright' | 'requests'
+    backend='playwright' | 'requests' | 'auto'
     Intenta playwright primero (si está disponible) y cae a requests.
+    'auto' elige por dominio según lo aprendido en runs anteriores (backend_stats).
     Respeta HTTP(S)_PROXY si están definidas.
+    `validators` (etag / last_modified) activa el GET condicional en requests:
+    lanza NotModified si el servidor responde 304.
+    `meta`, si se pasa, recibe el backend que sirvió la página.
+    `stream=True`: requests lee y parsea por trozos (streaming.py) y devuelve los
+    capítulos (Extracted) en lugar del HTML.
     """
+    meta = meta if meta is not None else {}
     backend = (backend or "").lower()
+    if backend == "auto":
+        return fetch_auto(
+            url, "requests",
+            lambda: _fetch_requests(url, timeout=timeout, validators=validators, stream=stream, meta=meta),
+            lambda: _fetch_playwright(url, timeout=timeout),
+            meta,
+        )
     if backend == "playwright":
         try:
+            meta["backend"] = "playwright"
             html = _fetch_playwright(url, timeout=timeout)
-            if html and len(html) > 200:
+            if html and (not isinstance(html, str) or len(html) > 200):
                 return html
         except Exception:
             # fallback a requests
             pass
-    return _fetch_requests(url, timeout=timeout)
+    meta["backend"] = "requests"
+    return _fetch_requests(url, timeout=timeout, validators=validators, stream=stream, meta=meta)
 
-def _fetch_requests(url: str, timeout: int = 40) -> str:
+def _fetch_requests(url: str, timeout: int = 40, validators: Optional[dict] = None,
+                    stream: bool = False, meta: Optional[dict] = None) -> str:
     headers = {
         "User-Agent": random.choice(UA_POOL),
         "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
@@ -51,86 +74,80 @@ def _fetch_requests(url: str, timeout: int = 40) -> str:
         "Pragma": "no-cache",
         "Upgrade-Insecure-Requests": "1",
     }
-    proxies = {}
-    if os.environ.get("HTTPS_PROXY"):
-        proxies["https"] = os.environ["HTTPS_PROXY"]
-    if os.environ.get("HTTP_PROXY"):
-        proxies["http"] = os.environ["HTTP_PROXY"]
-
-    r = requests.get(url, headers=headers, timeout=timeout, proxies=proxies, allow_redirects=True)
-    r.raise_for_status()
-    return r.text
+    with lease(url) as pooled:
+        if pooled is not None:
+            proxies = requests_proxies(pooled)
+        else:
+            proxies = {}
+            if os.environ.get("HTTPS_PROXY"):
+                proxies["https"] = os.environ["HTTPS_PROXY"]
+            if os.environ.get("HTTP_PROXY"):
+                proxies["http"] = os.environ["HTTP_PROXY"]
+
+        if stream:
+            from .streaming import stream_requests
+            return stream_requests(get_session(), url, headers, timeout, validators, meta,
+                                   proxies=proxies, allow_redirects=True)
+        headers.update(conditional_headers(validators))
+        r = get_session().get(url, headers=headers, timeout=timeout, proxies=proxies, allow_redirects=True)
+        if r.status_code == 304:
+            raise NotModified(url)
+        check_blocked(url, r.status_code, r.text)
+        r.raise_for_status()
+        remember_validators(meta, r.headers)
+        return r.text
 
 def _fetch_playwright(url: str, timeout: int = 40) -> str:
-    try:
-        from playwright.sync_api import sync_playwright
-    except Exception as e:
-        raise RuntimeError("playwright no disponible") from e
+    from .browser_pool import get_pool, render
 
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        context = browser.new_context(
+    # Chromium se lanza una sola vez por run; aquí solo se abre un contexto nuevo
+    with lease(url) as pooled:
+        extra = {"proxy": playwright_proxy(pooled)} if pooled is not None else {}
+        with get_pool().page(
             user_agent=random.choice(UA_POOL),
             java_script_enabled=True,
             viewport={"width": 1366, "height": 900},
-        )
-        page = context.new_page()
-        page.set_default_navigation_timeout(timeout * 1000)
-        page.goto(url, wait_until="domcontentloaded")
-        page.wait_for_timeout(1200)
-        html = page.content()
-        context.close()
-        browser.close()
-        return html
+            **extra,
+        ) as page:
+            return render(page, url, timeout * 1000)
 
 # ------- Normalización y cordura -------
-def _cap_to_tuple(s: str) -> Tuple[int, int]:
-    s = str(s).strip()
-    if "." in s:
-        a, b = s.split(".", 1)
-        return (int(a), int(b.ljust(2, "0")[:2]))
-    return (int(s), -1)
-
 def comparable_tuple(s: str) -> Tuple[int, int]:
     if not s:
         return (-1, -1)
-    return _cap_to_tuple(s)
+    return Chapter.of(s).key
 
 def cap_to_pretty(s: str) -> str:
-    a, b = comparable_tuple(s)
-    return f"{a}.{str(b).zfill(2)}" if b >= 0 else str(a)
+    if not s:
+        return "-1"
+    return Chapter.of(s).pretty
 
 def sanity_filter(site: str, new_cap: Optional[str], prev_cap: Optional[str]) -> Tuple[bool, Optional[str], str]:
     """
     (aceptar, valor_normalizado, motivo)
     Reglas:
-      - descarta >2000
+      - descarta > MAX_CHAPTER (2000)
       - descarta saltos enormes (new >= prev*5 y diff >=200)
       - evita regresiones fuertes (prev - new >=5): mantiene prev
       - normaliza centésimas a 2 dígitos
+    Un prev que no es un capítulo (id > MAX_CHAPTER guardado por error) no cuenta.
     """
     if not new_cap:
         return (False, None, "no-detectado")
 
     try:
-        n = _cap_to_tuple(new_cap)
-    except Exception:
+        n = Chapter.of(new_cap)
+    except ValueError:
         return (False, None, "parse-invalido")
 
-    if n[0] > 2000:
+    if not n.plausible:
         return (False, None, "cap-demasiado-grande")
 
-    if prev_cap:
-        try:
-            p = _cap_to_tuple(prev_cap)
-        except Exception:
-            p = None
-
-        if p:
-            if (n[0] >= p[0] * 5) and (n[0] - p[0] >= 200):
-                return (False, None, "salto-sospechoso")
-            if (n[0] < p[0]) and ((p[0] - n[0]) >= 5):
-                return (False, cap_to_pretty(prev_cap), "regresion-evitada")
+    p = Chapter.valid(prev_cap)
+    if p is not None:
+        if (n.major >= p.major * 5) and (n.major - p.major >= 200):
+            return (False, None, "salto-sospechoso")
+        if (n.major < p.major) and ((p.major - n.major) >= 5):
+            return (False, p.pretty, "regresion-evitada")
 
-    val = f"{n[0]}" if n[1] < 0 else f"{n[0]}.{str(n[1]).zfill(2)}"
-    return (True, cap_to_pretty(val), "ok")
+    return (True, n.pretty, "ok")
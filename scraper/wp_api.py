@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+# Endpoints ligeros de los sitios WordPress (tema Madara): en lugar de la página entera
+# renderizada, solo el listado de capítulos.
+#   ajax: POST <serie>/ajax/chapters/  → fragmento HTML con los <li> de capítulos
+#   rss:  GET  <serie>/feed/           → RSS con un <item> por capítulo
+# Si no existen o están bloqueados, se vuelve al fetch HTML de siempre. Lo que funciona
+# en cada dominio se aprende con backend_stats ("wp-ajax" / "wp-rss").
+import os
+import time
+from urllib.parse import urlsplit
+
+from lxml import etree
+
+from .backend_stats import Blocked, check_blocked, get_stats
+from .extractors import Extracted
+from .parsers import _GENERIC_RE, parse_generic_caplist
+from .proxy_pool import lease, lease_async
+from .sites import WP_SITES, site_key
+
+# opt-in, como FEED_FASTPATH: activado, estos dominios no pasan por FETCH_BACKEND
+WP_ENDPOINTS = os.getenv("WP_ENDPOINTS", "false").lower() == "true"
+
+_XML_PARSER = etree.XMLParser(resolve_entities=False, no_network=True, recover=True)
+
+
+class EndpointUnavailable(Exception):
+    """Ningún endpoint ligero dio capítulos para esta serie: toca el fetch HTML."""
+
+
+def enabled_for(url: str) -> bool:
+    return WP_ENDPOINTS and site_key(url) in WP_SITES
+
+
+def parse_ajax(url: str, body: str) -> list:
+    value = parse_generic_caplist(url, body)
+    return [value] if value else []
+
+
+def _under(link: str, url: str) -> bool:
+    """`link` es una página bajo la serie (un capítulo), no la serie misma ni otro sitio."""
+    a, b = urlsplit(link.strip()), urlsplit(url)
+    host_a = (a.hostname or "").removeprefix("www.")
+    host_b = (b.hostname or "").removeprefix("www.")
+    base = b.path.rstrip("/") + "/"
+    path = a.path.rstrip("/") + "/"
+    return host_a == host_b and path.startswith(base) and path != base
+
+
+def parse_rss(url: str, body: str) -> list:
+    try:
+        root = etree.fromstring(body.encode("utf-8"), parser=_XML_PARSER)
+    except (etree.XMLSyntaxError, ValueError):
+        return []
+    if root is None:
+        return []
+    # solo los <item> que enlazan a un capítulo de la serie: el título del canal no es un
+    # capítulo y el /feed/ de Madara a menudo es el de comentarios (enlaces a la serie con #comment-N)
+    nums = []
+    for item in root.iterfind("channel/item"):
+        if not _under(item.findtext("link") or "", url):
+            continue
+        m = _GENERIC_RE.search(item.findtext("title") or "")
+        if m:
+            nums.append(m.group(1))
+    return nums
+
+
+_PARSE = {"ajax": parse_ajax, "rss": parse_rss}
+
+
+def _plan(url: str) -> list:
+    """Endpoints a probar, saltando los que ya sabemos que en este dominio no sirven."""
+    base = url.split("?", 1)[0].rstrip("/") + "/"
+    stats = get_stats()
+    host = site_key(url)
+    plan = []
+    for kind, method, ep in (("ajax", "POST", base + "ajax/chapters/"), ("rss", "GET", base + "feed/")):
+        if stats.choose(host, "wp-" + kind, expensive="") == "wp-" + kind:
+            plan.append((kind, method, ep))
+    return plan
+
+
+def _headers(url: str) -> dict:
+    return {"X-Requested-With": "XMLHttpRequest", "Referer": url}
+
+
+def _result(url: str, kind: str, status: int | None, body: str, elapsed: float):
+    """Anota el intento en backend_stats; devuelve Extracted si trajo capítulos."""
+    host = site_key(url)
+    if status is None:
+        get_stats().record(host, "wp-" + kind, False, elapsed)    # error de red: no dice nada del endpoint
+        return None
+    if status == 403:
+        get_stats().record(host, "wp-" + kind, False, elapsed, blocked=True)
+        return None
+    nums = _PARSE[kind](url, body) if status == 200 else []
+    # 404 o respuesta sin capítulos: el endpoint no sirve en este sitio
+    get_stats().record(host, "wp-" + kind, True, elapsed, chapters=bool(nums))
+    return Extracted(url, nums, source="wp-" + kind) if nums else None
+
+
+def fetch_endpoint(url: str):
+    from .session import get_client
+
+    for kind, method, ep in _plan(url):
+        t0 = time.perf_counter()
+        try:
+            with lease(url) as proxy:
+                r = get_client(proxy).request(method, ep, headers=_headers(url))
+                check_blocked(ep, r.status_code, r.text)     # 403/captcha: cuenta contra el proxy (PROXY_POOL)
+            status, body = r.status_code, r.text
+        except Blocked:
+            status, body = 403, ""
+        except Exception:
+            status, body = None, ""
+        res = _result(url, kind, status, body, time.perf_counter() - t0)
+        if res is not None:
+            return res
+    raise EndpointUnavailable(url)
+
+
+async def fetch_endpoint_async(clients, url: str):
+    """`clients.get(proxy)` da el AsyncClient de cada proxy (async_fetch._Clients)."""
+    for kind, method, ep in _plan(url):
+        t0 = time.perf_counter()
+        try:
+            async with lease_async(url) as proxy:
+                r = await clients.get(proxy).request(method, ep, headers=_headers(url))
+                check_blocked(ep, r.status_code, r.text)
+            status, body = r.status_code, r.text
+        except Blocked:
+            status, body = 403, ""
+        except Exception:
+            status, body = None, ""
+        res = _result(url, kind, status, body, time.perf_counter() - t0)
+        if res is not None:
+            return res
+    raise EndpointUnavailable(url)
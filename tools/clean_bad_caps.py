@@ -1,7 +1,11 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import sys, yaml, re
+import os, sys, yaml, re
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scraper.chapter import Chapter  # noqa: E402
 
 PATH = sys.argv[1] if len(sys.argv) > 1 else "series.yaml"
 
@@ -13,13 +17,8 @@ for s in data.get("series", []):
     cap = (s.get("last_chapter") or "").strip()
     if not cap:
         continue
-    m = re.fullmatch(r'\d+(?:\.\d+)?', cap)
-    if not m:
-        s["last_chapter"] = ""
-        changed += 1
-        continue
-    entero = int(cap.split(".", 1)[0])
-    if entero > 2000:
+    # no numérico o id en lugar de capítulo (> MAX_CHAPTER)
+    if not re.fullmatch(r'\d+(?:\.\d+)?', cap) or Chapter.valid(cap) is None:
         s["last_chapter"] = ""   # resetea para que el próximo run recalcule bien
         changed += 1
 
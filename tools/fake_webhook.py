@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Webhook de Discord de mentira para probar la cola de notificaciones sin red.
+#   python tools/fake_webhook.py [puerto] [429 cada N mensajes]
+#   DISCORD_WEBHOOK=http://127.0.0.1:8790/webhook python main.py
+# Imita los límites de Discord: 10 embeds / 6000 caracteres por mensaje,
+# 429 con retry_after y cabeceras X-RateLimit-* de bucket.
+
+import json
+import sys
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PORT = int(sys.argv[1]) if len(sys.argv) > 1 else 8790
+LIMIT_EVERY = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+BUCKET = 5
+WINDOW = 2.0
+
+state = {"count": 0, "window_start": time.monotonic(), "in_window": 0, "embeds": 0}
+
+
+class Handler(BaseHTTPRequestHandler):
+    def _reply(self, code, body=None, headers=None):
+        data = json.dumps(body).encode() if body is not None else b""
+        self.send_response(code)
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        if data:
+            self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        embeds = payload.get("embeds") or []
+        size = sum(len(e.get("title", "")) + len(e.get("description", "")) for e in embeds)
+        if len(embeds) > 10 or size > 6000 or len(payload.get("content") or "") > 2000:
+            print(f"[400] mensaje fuera de límites: {len(embeds)} embeds, {size} caracteres")
+            return self._reply(400, {"message": "Invalid Form Body", "code": 50035})
+
+        now = time.monotonic()
+        if now - state["window_start"] > WINDOW:
+            state["window_start"], state["in_window"] = now, 0
+        state["count"] += 1
+        if LIMIT_EVERY and state["count"] % LIMIT_EVERY == 0:
+            print("[429] rate limit simulado")
+            return self._reply(429, {"message": "You are being rate limited.", "retry_after": 0.5, "global": False},
+                               {"Retry-After": "1"})
+
+        state["in_window"] += 1
+        state["embeds"] += len(embeds)
+        remaining = max(0, BUCKET - state["in_window"])
+        reset_after = max(0.0, WINDOW - (now - state["window_start"]))
+        print(f"[204] {len(embeds)} embeds ({size} caracteres), total {state['embeds']}, quedan {remaining}")
+        self._reply(204, headers={
+            "X-RateLimit-Limit": str(BUCKET),
+            "X-RateLimit-Remaining": str(remaining),
+            "X-RateLimit-Reset-After": f"{reset_after:.3f}",
+        })
+
+    def log_message(self, *args):
+        pass
+
+
+print(f"webhook falso en http://127.0.0.1:{PORT}/webhook (429 cada {LIMIT_EVERY} mensajes)")
+ThreadingHTTPServer(("127.0.0.1", PORT), Handler).serve_forever()
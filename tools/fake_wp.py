@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Sitio WordPress/Madara de mentira para probar scraper/wp_api.py sin red.
+#   python tools/fake_wp.py [--port 8791] [--dir wp_responses] [--fail ajax=404] [--fail rss=403]
+#   python tools/fake_wp.py --record https://bokugents.com/manga/slug/ [--dir wp_responses]
+# Sirve por serie (<dir>/<slug>/):
+#   POST /manga/<slug>/ajax/chapters/  → ajax.html
+#   GET  /manga/<slug>/feed/           → feed.xml
+#   GET  /manga/<slug>/                → page.html
+# Lo que no está grabado se genera con bench/markup.py (capítulos estables por slug).
+
+import argparse
+import hashlib
+import os
+import sys
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench.markup import chapter_labels, render_series_page, render_wp_ajax, render_wp_feed  # noqa: E402
+
+FILES = {"ajax": "ajax.html", "rss": "feed.xml", "page": "page.html"}
+
+
+def labels_for(slug: str) -> list:
+    n = 20 + int(hashlib.sha1(slug.encode()).hexdigest(), 16) % 60
+    return chapter_labels(n, seed=n)
+
+
+def synth(kind: str, slug: str, host: str) -> str:
+    labels = labels_for(slug)
+    if kind == "ajax":
+        return render_wp_ajax(host, slug, labels)
+    if kind == "rss":
+        return render_wp_feed(host, slug, labels)
+    return render_series_page(host, labels).replace("serie-de-prueba", slug)
+
+
+def record(url: str, root: str):
+    import httpx
+
+    slug = url.rstrip("/").rsplit("/", 1)[-1]
+    base = url.rstrip("/") + "/"
+    out = os.path.join(root, slug)
+    os.makedirs(out, exist_ok=True)
+    with httpx.Client(follow_redirects=True, timeout=30, headers={"User-Agent": "Mozilla/5.0"}) as cli:
+        for kind, method, target in (("ajax", "POST", base + "ajax/chapters/"), ("rss", "GET", base + "feed/"),
+                                     ("page", "GET", base)):
+            r = cli.request(method, target, headers={"X-Requested-With": "XMLHttpRequest", "Referer": base})
+            print(f"{kind}: HTTP {r.status_code}, {len(r.content)} bytes")
+            if r.status_code == 200:
+                with open(os.path.join(out, FILES[kind]), "w", encoding="utf-8") as fh:
+                    fh.write(r.text)
+
+
+def make_handler(root: str, fail: dict):
+    class Handler(BaseHTTPRequestHandler):
+        def _serve(self, method: str):
+            parts = [p for p in self.path.split("?", 1)[0].split("/") if p]
+            if len(parts) < 2 or parts[0] != "manga":
+                return self._reply(404, "")
+            slug, rest = parts[1], parts[2:]
+            if rest == ["ajax", "chapters"] and method == "POST":
+                kind = "ajax"
+            elif rest == ["feed"] and method == "GET":
+                kind = "rss"
+            elif not rest and method == "GET":
+                kind = "page"
+            else:
+                return self._reply(404, "")
+            if kind in fail:
+                return self._reply(fail[kind], "")
+            path = os.path.join(root, slug, FILES[kind])
+            if os.path.exists(path):
+                with open(path, "r", encoding="utf-8") as fh:
+                    body = fh.read()
+            else:
+                body = synth(kind, slug, self.headers.get("Host", "localhost"))
+            ctype = "application/rss+xml" if kind == "rss" else "text/html"
+            self._reply(200, body, ctype)
+
+        def _reply(self, code: int, body: str, ctype: str = "text/html"):
+            data = body.encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", f"{ctype}; charset=UTF-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            self._serve("GET")
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0) or 0))
+            self._serve("POST")
+
+        def log_message(self, fmt, *args):
+            print(f"[{self.command}] {self.path} → {args[1] if len(args) > 1 else ''}")
+
+    return Handler
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--port", type=int, default=8791)
+    ap.add_argument("--dir", default="wp_responses")
+    ap.add_argument("--fail", action="append", default=[], help="kind=status, p.ej. ajax=404 o rss=403")
+    ap.add_argument("--record", metavar="URL", help="graba las respuestas reales de una serie en --dir")
+    args = ap.parse_args()
+
+    if args.record:
+        record(args.record, args.dir)
+        return 0
+    fail = {k: int(v) for k, v in (f.split("=", 1) for f in args.fail)}
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), make_handler(args.dir, fail))
+    print(f"fake WordPress en http://127.0.0.1:{args.port}/manga/<slug>/ (respuestas en {args.dir})")
+    server.serve_forever()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Fusiona los resultados parciales de los shards en el estado y muestra un único resumen.
+#   python tools/merge_shards.py [series.yaml] shard-0.json shard-1.json ...
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scraper.shard import merge_partials  # noqa: E402
+
+args = sys.argv[1:]
+SERIES_FILE = args.pop(0) if args and not args[0].endswith(".json") else os.environ.get("SERIES_FILE", "series.yaml")
+if not args:
+    print("uso: merge_shards.py [series.yaml] shard-0.json shard-1.json ...")
+    sys.exit(2)
+
+total = merge_partials(SERIES_FILE, args)
+
+print("\nResumen:")
+print(f"  Shards: {len(total['shards'])}/{total['count']}")
+print(f"  Actualizados: {total['updated']}")
+print(f"  Sin actualización: {total['same']}")
+if total["not_due"]:
+    print(f"  No tocaba revisar (calendario adaptativo): {total['not_due']}")
+if total["deferred"]:
+    print(f"  Aplazadas al siguiente run (plazo): {total['deferred']}")
+print(f"  Con errores (silenciados en Discord): {len(total['errors'])}")
+for name, err in total["errors"][:50]:
+    print(f"   - {name}: {err}")
+if total["missing"]:
+    print(f"  [warn] faltan shards: {total['missing']}")
+    sys.exit(1)
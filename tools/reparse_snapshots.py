@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Vuelve a pasar el parser de cada sitio por las copias guardadas con SNAPSHOT_DIR,
+# sin red: muestra a qué capítulo resolvería cada serie con el código actual.
+#   python tools/reparse_snapshots.py [series.yaml] [--dir snapshots] [--workers N] [--diff]
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scraper.sites import pick_parser  # noqa: E402
+from scraper.snapshots import SNAPSHOT_DIR, SnapshotStore, read_object  # noqa: E402
+from scraper.utils import cap_to_pretty, load_yaml, sanity_filter  # noqa: E402
+
+
+def reparse(job):
+    # en el proceso hijo: se le pasa la ruta, no el HTML (no viaja por el pipe)
+    url, path = job
+    try:
+        return pick_parser(url)(url, read_object(path)), None
+    except Exception as e:
+        return None, str(e)
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("series", nargs="?", default="series.yaml")
+    ap.add_argument("--dir", default=SNAPSHOT_DIR or "snapshots")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    ap.add_argument("--diff", action="store_true", help="solo las series cuyo resultado cambia")
+    args = ap.parse_args()
+
+    store = SnapshotStore(args.dir)
+    series = [s for s in load_yaml(args.series).get("series", []) if s.get("url")]
+    have = [s for s in series if s["url"] in store.index]
+    jobs = [(s["url"], store.object_path(store.index[s["url"]]["sha"])) for s in have]
+
+    t0 = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        results = list(pool.map(reparse, jobs, chunksize=8))
+    elapsed = time.perf_counter() - t0
+
+    changed = 0
+    for s, (candidate, err) in zip(have, results):
+        prev = s.get("last_chapter") or ""
+        meta = store.index[s["url"]]
+        if err:
+            value, mark = f"error: {err}", "!"
+        else:
+            ok, sane, reason = sanity_filter(s.get("site", ""), candidate, prev)
+            value = cap_to_pretty(sane) if ok else f"{candidate} ({reason})"
+            mark = " " if ok and prev and cap_to_pretty(prev) == cap_to_pretty(sane) else "*"
+        changed += mark != " "
+        if args.diff and mark == " ":
+            continue
+        taken = time.strftime("%Y-%m-%d %H:%M", time.localtime(meta["time"]))
+        print(f"{mark} {s.get('name') or s['url']}: {prev or '∅'} → {value}  [{taken}, {meta.get('backend')}]")
+
+    print(f"\n{len(have)} series re-parseadas en {elapsed:.2f}s ({len(series) - len(have)} sin copia); "
+          f"{changed} con resultado distinto a series.yaml")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
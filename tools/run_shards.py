@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Lanza main.py en N procesos (un shard cada uno) y fusiona el resultado.
+#   python tools/run_shards.py N [series.yaml]
+
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+N = int(sys.argv[1]) if len(sys.argv) > 1 else 2
+SERIES_FILE = sys.argv[2] if len(sys.argv) > 2 else os.environ.get("SERIES_FILE", "series.yaml")
+
+tmp = tempfile.mkdtemp(prefix="shards-")
+procs = []
+for i in range(N):
+    env = dict(os.environ, SERIES_FILE=SERIES_FILE, SHARD_COUNT=str(N), SHARD_INDEX=str(i),
+               SHARD_OUT=os.path.join(tmp, f"shard-{i}.json"))
+    log = open(os.path.join(tmp, f"shard-{i}.log"), "w", encoding="utf-8")
+    procs.append((subprocess.Popen([sys.executable, os.path.join(ROOT, "main.py")], env=env,
+                                   stdout=log, stderr=subprocess.STDOUT), log))
+
+failed = 0
+for i, (p, log) in enumerate(procs):
+    rc = p.wait()
+    log.close()
+    if rc != 0:
+        failed += 1
+        print(f"[shard {i}] terminó con código {rc} (log: {log.name})")
+
+parts = [os.path.join(tmp, f) for f in sorted(os.listdir(tmp)) if f.endswith(".json")]
+print(f"Logs de los shards en {tmp}")
+rc = subprocess.call([sys.executable, os.path.join(ROOT, "tools", "merge_shards.py"), SERIES_FILE] + parts)
+sys.exit(rc or (1 if failed else 0))
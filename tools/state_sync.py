@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Sincroniza series.yaml con la base SQLite (STATE_BACKEND=sqlite).
+#   python tools/state_sync.py import [series.yaml] [state.db]
+#   python tools/state_sync.py export [series.yaml] [state.db]
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scraper.state_store import SqliteStore  # noqa: E402
+
+if len(sys.argv) < 2 or sys.argv[1] not in ("import", "export"):
+    print("uso: state_sync.py import|export [series.yaml] [state.db]")
+    sys.exit(2)
+
+CMD = sys.argv[1]
+YAML_PATH = sys.argv[2] if len(sys.argv) > 2 else "series.yaml"
+DB_PATH = sys.argv[3] if len(sys.argv) > 3 else os.environ.get("STATE_DB", "state.db")
+
+store = SqliteStore(DB_PATH)
+if CMD == "import":
+    print(f"Importadas: {store.import_yaml(YAML_PATH)}")
+else:
+    print("Exportado" if store.export_yaml(YAML_PATH) else "Sin cambios")
+store.close()